@@ -0,0 +1,366 @@
+#!/usr/bin/python3
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Iterator
+import parser_classes as PC
+import templates_and_constants as TC
+
+# Reference component that provides the pulled in tb components
+# (syn/rtlenv/tb_tcon*)
+REF_COMPONENT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "debounce")
+
+DEFAULT_RESULTS_FILE = "benchmark_results.json"
+
+# Phases timed by the benchmark, in execution order
+PHASES = ["file_read", "parser_type", "entity", "assign_buses", "tb_init",
+          "generate_mapping", "render", "write"]
+
+# Port templates for every bus type the generator knows about. Each entry is
+# (port suffix, direction, is vector). Directions are from the UUT's side and
+# follow the debounce sample component.
+BUS_PORTS = {
+    "IRBS": [("addr", "in", "AWIDTH"), ("rd", "in", None),
+             ("wr", "in", None), ("ack", "out", None),
+             ("din", "in", "DWIDTH"), ("dout", "out", "DWIDTH")],
+    "IRBM": [("addr", "out", "AWIDTH"), ("rd", "out", None),
+             ("wr", "out", None), ("ack", "in", None),
+             ("busy", "in", None), ("din", "in", "DWIDTH"),
+             ("dout", "out", "DWIDTH")],
+    "SAIFM": [("rts", "out", None), ("cts", "in", None),
+              ("dout", "out", "DWIDTH")],
+    "SAIFS": [("rtr", "out", None), ("ctr", "in", None),
+              ("din", "in", "DWIDTH")],
+    "SDM": [("start", "out", None), ("done", "in", None),
+            ("data", "out", "DWIDTH")],
+    "SDS": [("start", "in", None), ("done", "out", None),
+            ("data", "in", "DWIDTH")],
+}
+
+
+def port_type(width: str) -> str:
+    if width:
+        return f"std_logic_vector({width} - 1 downto 0)"
+    return "std_logic"
+
+
+def synthesize_entity(name: str, num_ports: int, num_generics: int,
+                      bus_instances: int, comment_density: float,
+                      seed: int=0) -> Dict[str, str]:
+    """Generate VHDL source and a matching bus configuration for a synthetic
+    UUT.
+
+    Args:
+        name : Entity name
+        num_ports : Number of misc ports on top of clk, rst and bus ports
+        num_generics : Number of integer generics on top of DWIDTH/AWIDTH
+        bus_instances : Number of instances of every supported bus type
+        comment_density : Fraction (0..1) of lines that carry a comment.
+                          Values above 1 add extra full line comments
+        seed : Seed for the comment placement
+
+    Returns:
+        Dictionary with "vhd" and "cfg" file contents
+
+    """
+    rnd = random.Random(seed)
+
+    def comment(line: str) -> str:
+        if rnd.random() < comment_density:
+            line += f" -- {name} port description {rnd.randrange(1 << 16)}"
+        return line
+
+    def extra_comments(lines: List[str], fill: str):
+        extra = comment_density - 1
+        while extra > 0:
+            if rnd.random() < extra:
+                lines.append(f"{fill}-- {'-' * 20} filler {'-' * 20}")
+            extra -= 1
+
+    generics = [("DWIDTH", "integer", "32"), ("AWIDTH", "integer", "16")]
+    generics += [(f"G_PARAM_{i}", "integer", str(i))
+                 for i in range(num_generics)]
+
+    # (name, direction, type) and matching config lines
+    ports = [("clk", "in", "std_logic"), ("rst", "in", "std_logic")]
+    cfg = ["clk : CLK", "rst : None"]
+    for bus_type, templates in BUS_PORTS.items():
+        for inst in range(bus_instances):
+            prefix = f"{bus_type.lower()}{inst}"
+            for i, (suffix, direction, width) in enumerate(templates):
+                port = f"{prefix}_{suffix}"
+                ports.append((port, direction, port_type(width)))
+                cfg.append(f"{port} : {bus_type}_{inst}" if i == 0
+                           else f"{port} :")
+            cfg.append("")
+
+    for i in range(num_ports):
+        direction = "in" if i % 2 else "out"
+        width = "DWIDTH" if i % 3 else None
+        ports.append((f"misc_{i}", direction, port_type(width)))
+        cfg.append(f"misc_{i} : None" if i == 0 else f"misc_{i} :")
+
+    vhd = ["library ieee;", "use ieee.std_logic_1164.all;",
+           "use ieee.numeric_std.all;", "",
+           comment(f"entity {name} is"), "\tgeneric ("]
+    for i, (gen, gtype, default) in enumerate(generics):
+        last = ";" if i < len(generics) - 1 else ""
+        extra_comments(vhd, "\t\t")
+        vhd.append(comment(f"\t\t{gen} : {gtype} := {default}{last}"))
+    vhd += ["\t);", "\tport ("]
+    for i, (port, direction, ptype) in enumerate(ports):
+        last = ";" if i < len(ports) - 1 else ""
+        extra_comments(vhd, "\t\t")
+        vhd.append(comment(f"\t\t{port} : {direction} {ptype}{last}"))
+    vhd += ["\t);", f"end entity {name};", "",
+            f"architecture rtl of {name} is", "begin",
+            f"end architecture rtl;", ""]
+
+    return {"vhd": "\n".join(vhd), "cfg": "\n".join(cfg) + "\n"}
+
+
+def create_component(root: str, name: str, sources: Dict[str, str],
+                     ref_component: str=REF_COMPONENT) -> str:
+    """Lay out a synthetic component in SEL RTL folder structure with the
+    tb components copied from the reference component
+
+    Returns:
+        Path to the component
+    """
+    comppath = os.path.join(root, name)
+    os.makedirs(os.path.join(comppath, "src"), exist_ok=True)
+    with open(os.path.join(comppath, "src", f"{name}.vhd"), "w") as f:
+        f.write(sources["vhd"])
+    with open(os.path.join(comppath, TC.BUS_CFG_FILE), "w") as f:
+        f.write(sources["cfg"])
+
+    ref_rtlenv = os.path.join(ref_component, TC.TB_SRC_LOCATION)
+    rtlenv = os.path.join(comppath, TC.TB_SRC_LOCATION)
+    for dep in os.listdir(ref_rtlenv):
+        if dep.startswith("tb_tcon"):
+            shutil.copytree(os.path.join(ref_rtlenv, dep, "src"),
+                            os.path.join(rtlenv, dep, "src"),
+                            dirs_exist_ok=True)
+    return comppath
+
+
+@contextmanager
+def quiet_logging() -> Iterator[None]:
+    """Detach the console handler so log output stays out of the measurement.
+    The logging level is left alone, parser_classes.log_scope restores it"""
+    PC.log.removeHandler(PC.console)
+    null = logging.NullHandler()
+    PC.log.addHandler(null)
+    try:
+        yield
+    finally:
+        PC.log.removeHandler(null)
+        PC.log.addHandler(PC.console)
+
+
+def run_once(comppath: str) -> Dict[str, float]:
+    """Time every generator phase once for the component at comppath. The
+    component directory must be the current directory since the bus
+    configuration file is resolved relative to it.
+
+    Returns:
+        Dictionary of phase name to seconds
+    """
+    name = os.path.basename(comppath)
+    vhd = os.path.join(comppath, "src", f"{name}.vhd")
+    times = {}
+
+    def timed(phase: str, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        times[phase] = time.perf_counter() - start
+        return result
+
+    filestring = timed("file_read", PC.get_filestring, vhd)
+
+    def parse():
+        entity_glob = PC.ParserType("entity", filestring, name).string
+        return (PC.ParserType("port", entity_glob),
+                PC.ParserType("generic", entity_glob))
+    ports_parser, generics_parser = timed("parser_type", parse)
+
+    # Entity construction runs assign_buses internally; it is also timed on
+    # its own below
+    timed("entity", PC.Entity, name, ports_parser, generics_parser)
+    timed("assign_buses", PC.assign_buses, TC.BUS_CFG_FILE)
+
+    tb = timed("tb_init", PC.TB, comppath, name)
+    timed("generate_mapping", tb.generate_mapping)
+    tb_data = timed("render", tb.render_tb)
+
+    def write():
+        out_dir = os.path.join(comppath, "bench_out")
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, f"{name}_tb.vhd"), "w") as f:
+            f.write(tb_data)
+    timed("write", write)
+
+    return times
+
+
+def summarize(runs: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    phases = {}
+    for phase in PHASES:
+        samples = [run[phase] for run in runs]
+        phases[phase] = {"min": min(samples),
+                         "median": statistics.median(samples),
+                         "max": max(samples)}
+    totals = [sum(run[phase] for phase in PHASES if phase != "assign_buses")
+              for run in runs]
+    phases["total"] = {"min": min(totals),
+                       "median": statistics.median(totals),
+                       "max": max(totals)}
+    return phases
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def benchmark(config: Dict[str, Any], repeat: int,
+              keep_dir: str="") -> Dict[str, Any]:
+    """Synthesize a component for config and time the generator on it
+
+    Args:
+        config : Dictionary with ports, generics, buses, comment_density
+        repeat : Number of timed runs
+        keep_dir : Directory to generate the component in. A temporary
+                   directory, removed afterwards, is used if empty
+
+    Returns:
+        Result record with configuration, environment and phase timings
+
+    """
+    name = (f"bench_p{config['ports']}_g{config['generics']}"
+            f"_b{config['buses']}")
+    sources = synthesize_entity(name, config["ports"], config["generics"],
+                                config["buses"], config["comment_density"])
+    root = keep_dir or tempfile.mkdtemp(prefix="tcon_bench_")
+    cwd = os.getcwd()
+    runs = []
+    try:
+        comppath = create_component(root, name, sources)
+        os.chdir(comppath)
+        with quiet_logging():
+            for _ in range(repeat):
+                runs.append(run_once(comppath))
+    finally:
+        os.chdir(cwd)
+        if not keep_dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    return {"timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_rev": git_revision(),
+            "python": platform.python_version(),
+            "config": dict(config, repeat=repeat,
+                           vhd_bytes=len(sources["vhd"])),
+            "phases": summarize(runs)}
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    if not os.path.isfile(path):
+        return []
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def previous_result(results: List[Dict[str, Any]],
+                    config: Dict[str, Any]) -> Dict[str, Any]:
+    keys = ["ports", "generics", "buses", "comment_density"]
+    for result in reversed(results):
+        if all(result["config"].get(k) == config[k] for k in keys):
+            return result
+    return {}
+
+
+def print_result(result: Dict[str, Any], previous: Dict[str, Any]):
+    cfg = result["config"]
+    print(f"\nports={cfg['ports']} generics={cfg['generics']} "
+          f"buses={cfg['buses']} comment_density={cfg['comment_density']} "
+          f"({cfg['vhd_bytes']} bytes, best of {cfg['repeat']})")
+    header = f"  {'phase':<18}{'min [ms]':>12}{'median [ms]':>14}"
+    if previous:
+        header += f"{'prev [ms]':>12}{'ratio':>8}"
+    print(header)
+    for phase, stats in result["phases"].items():
+        line = (f"  {phase:<18}{stats['min'] * 1e3:>12.3f}"
+                f"{stats['median'] * 1e3:>14.3f}")
+        if previous and phase in previous["phases"]:
+            prev = previous["phases"][phase]["min"]
+            ratio = stats["min"] / prev if prev else float("nan")
+            line += f"{prev * 1e3:>12.3f}{ratio:>8.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="""
+        Benchmark the TCON TB generator (parser_classes) on synthetic
+        components. For every combination of the scale arguments a VHDL
+        entity and a matching BUS_CONFIG.cfg are generated and every generator
+        phase is timed. Results are appended to a JSON file and compared
+        against the last run with the same configuration.""")
+
+    parser.add_argument('--ports', type=int, nargs='+', default=[50, 500],
+                        help="Number of misc ports (list for a sweep)")
+    parser.add_argument('--generics', type=int, nargs='+', default=[5],
+                        help="Number of extra generics (list for a sweep)")
+    parser.add_argument('--buses', type=int, nargs='+', default=[1],
+                        help="Instances of every bus type (list for a sweep)")
+    parser.add_argument('--comment_density', type=float, nargs='+',
+                        default=[0.5], help="Fraction of commented lines, "
+                        "above 1 adds full line comments (list for a sweep)")
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help="Timed runs per configuration")
+    parser.add_argument('-o', '--output', type=str,
+                        default=DEFAULT_RESULTS_FILE,
+                        help="JSON file the results are appended to")
+    parser.add_argument('--no_save', action='store_true',
+                        help="Do not append results to the output file")
+    parser.add_argument('--keep', type=str, default="",
+                        help="Generate components in this directory and keep "
+                        "them for inspection")
+
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+    keep_dir = os.path.abspath(args.keep) if args.keep else ""
+    results = load_results(output)
+    new_results = []
+    for ports in args.ports:
+        for generics in args.generics:
+            for buses in args.buses:
+                for density in args.comment_density:
+                    config = {"ports": ports, "generics": generics,
+                              "buses": buses, "comment_density": density}
+                    result = benchmark(config, args.repeat, keep_dir)
+                    print_result(result, previous_result(results, config))
+                    new_results.append(result)
+
+    if not args.no_save:
+        with open(output, "w") as f:
+            json.dump(results + new_results, f, indent=2)
+        print(f"\nResults appended to {output}")
+    sys.exit(0)
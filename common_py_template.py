@@ -1,10 +1,55 @@
 import os
+import re
+import json
+import time
 import logging
 import sys
+import asyncio
+import functools
+import threading
 import pytcon
 
 from zeromq_manager import ZeromqManager
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    # tcon_trace.py of create_tcon_infra, on PYTHONPATH. TCON_TRACE=1 records
+    # the TCON transactions of the test for offline replay
+    import tcon_trace
+    tcon_trace.install_from_env()
+except ImportError:
+    tcon_trace = None
+
+try:
+    # Generated by create_tcon_infra.py next to this file
+    import tb_info
+except ImportError:
+    tb_info = None
+UUT_PATH = getattr(tb_info, "UUT_PATH", None)
+UUT_SIGNALS = getattr(tb_info, "UUT_SIGNALS", None)
+STIM_FILES = getattr(tb_info, "STIM_FILES", {})
+LOG_FILES = getattr(tb_info, "LOG_FILES", {})
+UUT_GENERICS = getattr(tb_info, "UUT_GENERICS", {})
+UUT_CONSTANTS = getattr(tb_info, "UUT_CONSTANTS", {})
+UUT_RANGES = getattr(tb_info, "UUT_RANGES", {})
+
+try:
+    # vhdl_expr.py of create_tcon_infra, on PYTHONPATH
+    import vhdl_expr
+except ImportError:
+    vhdl_expr = None
+
+try:
+    # stim_stream.py of create_tcon_infra, on PYTHONPATH. Also importable
+    # without common.py, e.g. from a before_sim command (gen_data.py)
+    from stim_stream import StimulusStream, stim_file, stream_stimulus
+except ImportError:
+    pass
+
 # Import and initialize pytcon objects
 from pytcon_objects import TconClocker
 from pytcon_objects import TconSAIF
@@ -34,12 +79,17 @@ tcon.resolution = tcon.NANOSECONDS
 TIME_UNIT = "ps" if tcon.resolution == tcon.PICOSECONDS else \
             "ns" if tcon.resolution == tcon.NANOSECONDS else \
             "ms"
+# Set by print_banner(), see print_timing()
+test_start_time = None
 
 ##########################################################
 # System Definitions
 ##########################################################
 GPIO_RESET          = (1 << 0)   # Output
 
+# Seconds LogChecker waits for new log lines before reading again
+LOG_POLL_S          = 0.05
+
 
 def do_reset(num_clocks):
     """Asserts reset for number of cycles to reset, if implemented, the
@@ -104,7 +154,7 @@ def verify_signal(name, sig, exp):
 
     Args:
         name (str) = name of the signal to be printed in message
-        sig  (str) = signal identifier
+        sig  (str) = signal identifier or SignalHandle
         exp  (int/str) = expected value of "sig". Valid values are
                          0, 1, "0", "1", "0", "1"
 
@@ -119,12 +169,12 @@ def verify_signal(name, sig, exp):
         True
 
     """
-    # Read tcon gpio value
-    output = tcon.get_signal(sig)
+    handle = tb_signals.resolve(sig)
+    output = handle.read_raw()
     if isinstance(exp, str):
         result = output == exp
     elif isinstance(exp, int):
-        result = int(output, 2) == exp
+        result = decode_signal(output) == exp
     else:
         result = False
 
@@ -150,18 +200,21 @@ def print_banner(test_dir, testplan_no):
         >>> print_banner("001_reset", "1.1")
 
     """
+    global test_start_time
+    test_start_time = time.time()
     print("**************************************************************")
     print(f"***  {test_dir}:  Test {testplan_no}")
 
 
-def print_complete():
+def print_complete(words=None):
     """Print a message after a test has completed (successfully or otherwise).
     This function also checks if test has actually run for non-zero time. This
     function should be called at the end of every tcon.py, right befor
     simulation is halted with tcon.halt()
 
     Args:
-        None
+        words (int): Number of words the test transferred, for the throughput
+                     recorded in the regression timing database
 
     Returns:
         None
@@ -173,6 +226,28 @@ def print_complete():
     else:
         print(f"\n************ Time {tcon.now()} {TIME_UNIT}: "
               f"Testbench Completed *****************")
+    print_timing(words)
+
+
+def print_timing(words=None):
+    """Print the RTLTIMING line that RTL_sim_lib records in the regression
+    timing database (rtl_make/rtl_timing_db.py) when RTL_make runs with the
+    'timing' option
+
+    Args:
+        words (int): Number of words the test transferred
+
+    Returns:
+        None
+
+    Example:
+        >>> print_timing(16384)
+        RTLTIMING: {"wall_s": 1.52, "sim_time": 131072, "sim_unit": "ns", ...}
+
+    """
+    print("RTLTIMING: " + json.dumps({
+        "wall_s": time.time() - test_start_time if test_start_time else None,
+        "sim_time": tcon.now(), "sim_unit": TIME_UNIT, "words": words}))
 
 
 def read_reg(req, addr, mask=0xFFFFFFFF, name=None, expected=None):
@@ -271,7 +346,8 @@ def wait_on_signal(name, sig, expected, timeout=100):
 
     Args:
         name     (str): Name to represent the register
-        sig      (int): Internal signal name with full RTL hierarchy
+        sig      (str): Internal signal name with full RTL hierarchy or
+                        SignalHandle from tb_signals.register()
         expected (int): Expected value of the register
         timeout  (int): Number of clock cycles to wait before timeout
 
@@ -289,12 +365,13 @@ def wait_on_signal(name, sig, expected, timeout=100):
     """
 
     cnt = 0
-    signal_value = int(tcon.get_signal(sig))
+    handle = tb_signals.resolve(sig)
+    signal_value = handle.read()
     start_time = str(tcon.now())
     status = "OK"
     while (signal_value != expected and (cnt < timeout or timeout <= 0)):
         tcon.sync(1)
-        signal_value = int(tcon.get_signal(sig))
+        signal_value = handle.read()
         cnt = cnt + 1
 
     if cnt == timeout:
@@ -393,6 +470,560 @@ def get_generics(sim_dir):
         return None
 
 
+def signal_widths(sim_dir=None):
+    """Returns the width in bits of the UUT signals for this simulation.
+    Widths that depend on generics are recomputed from the generics in
+    sim_params.txt, the generic defaults and the package constants in
+    tb_info.py. Needs vhdl_expr.py, otherwise the widths for the generic
+    defaults (UUT_SIGNALS) are returned.
+
+    Args:
+        sim_dir (str): Test directory with the sim_params.txt, None for the
+                       generic defaults
+
+    Returns:
+        dict: {signal name: width}, width None if unknown
+
+    Example:
+        >>> width_dtype(signal_widths(testdir)["irbs_din"])
+        dtype('uint32')
+
+    """
+    widths = dict(UUT_SIGNALS or {})
+    if vhdl_expr is None:
+        return widths
+    overrides = {}
+    fname = (f"{sim_dir}/sim_params.txt").replace("\\", "/") if sim_dir \
+        else None
+    if fname and os.path.exists(fname):
+        overrides = vhdl_expr.read_sim_params(fname)
+    values = vhdl_expr.resolve(UUT_GENERICS.items(), UUT_CONSTANTS,
+                               overrides)
+    for name, (datatype, vrange) in UUT_RANGES.items():
+        widths[name] = vhdl_expr.type_width(datatype, vrange, values)
+    return widths
+
+
+def width_dtype(width):
+    """Returns the smallest NumPy dtype holding a bus of width bits
+
+    Args:
+        width (int): Width in bits, e.g. from signal_widths()
+
+    Returns:
+        numpy.dtype: uint8/16/32/64, a packed array of bytes (most
+        significant byte first) for buses wider than 64 bits, object (Python
+        ints) if the width is unknown
+
+    """
+    if np is None:
+        raise ImportError("width_dtype() needs numpy")
+    if width is None:
+        return np.dtype(object)
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if width <= np.iinfo(dtype).bits:
+            return np.dtype(dtype)
+    return np.dtype((np.uint8, (width + 7) // 8))
+
+
+@functools.lru_cache(maxsize=4096)
+def decode_signal(value):
+    """Convert the binary string returned by tcon.get_signal() to an int
+
+    Args:
+        value (str): Signal value, MSB first
+
+    Returns:
+        int: Signal value, None if any bit is not 0 or 1 (U, X, Z, ...)
+
+    Example:
+        >>> decode_signal("0101")
+        5
+
+    """
+    try:
+        return int(value, 2)
+    except ValueError:
+        return None
+
+
+def slice_width(index):
+    """Width of an index or slice suffix of a signal path
+
+    Args:
+        index (str): Suffix such as "(3)" or "(7 downto 4)"
+
+    Returns:
+        int: Number of bits, None if the suffix is not a literal index/slice
+
+    """
+    found = re.fullmatch(r"\(\s*(\d+)\s*(?:(downto|to)\s+(\d+)\s*)?\)",
+                         index.strip(), re.IGNORECASE)
+    if not found:
+        return None
+    if found.group(2) is None:
+        return 1
+    return abs(int(found.group(1)) - int(found.group(3))) + 1
+
+
+class SignalHandle:
+    """A TB signal resolved by SignalRegistry.resolve()
+
+    Args:
+        tcon_inst (pytcon.Tcon): Connected TCON object
+        path (str): Normalized signal path with full RTL hierarchy
+        width (int): Width in bits from tb_info.py, None if unknown
+
+    """
+
+    def __init__(self, tcon_inst, path, width=None):
+        self.tcon = tcon_inst
+        self.path = path
+        self.width = width
+
+    def read_raw(self):
+        """Return the signal value as the binary string TCON returns"""
+        return self.tcon.get_signal(self.path)
+
+    def read(self):
+        """Return the signal value as int, None if it has U/X/Z bits"""
+        return decode_signal(self.tcon.get_signal(self.path))
+
+    def __repr__(self):
+        return f"SignalHandle({self.path!r}, width={self.width})"
+
+
+class SignalRegistry:
+    """Cache of resolved TB signals for get_signal based checks.
+
+    A path is normalized and validated once, on first use, and the resulting
+    SignalHandle is kept, so loops that poll signals every clock cycle do not
+    redo the path handling. Paths naming a UUT signal directly (optionally
+    indexed) are checked against UUT_SIGNALS from tb_info.py, which
+    create_tcon_infra.py generates from the UUT entity and architecture; a
+    typo fails at once instead of after a timeout. Deeper paths (signals of
+    sub-instances, record fields) are passed through unchecked. Decoded
+    values are memoized by decode_signal().
+
+    Args:
+        tcon_inst (pytcon.Tcon): Connected TCON object
+        uut_path (str): Hierarchy prefix of the UUT, e.g. ".debounce_tb.uut"
+        uut_signals (dict): UUT signal name to width in bits. No validation
+                            is done if None
+
+    Example:
+        >>> flags = tb_signals.register(UUT_PATH + ".begin_counting",
+        ...                             UUT_PATH + ".end_counting")
+        >>> tb_signals.read_many(flags)
+        [1, 0]
+
+    """
+
+    def __init__(self, tcon_inst, uut_path=None, uut_signals=None):
+        self.tcon = tcon_inst
+        self.uut_path = uut_path.lower() + "." if uut_path else None
+        self.uut_signals = uut_signals
+        self._handles = {}
+
+    def resolve(self, sig):
+        """Return the SignalHandle of a signal path, resolving it on first use
+
+        Args:
+            sig (str or SignalHandle): Signal name with full RTL hierarchy
+
+        Returns:
+            SignalHandle
+
+        Raises:
+            KeyError: If the path names a UUT signal directly but is not a
+                      UUT port or architecture signal
+
+        """
+        if isinstance(sig, SignalHandle):
+            return sig
+        handle = self._handles.get(sig)
+        if handle is None:
+            path = sig.strip()
+            width = None
+            if self.uut_path and self.uut_signals is not None and \
+                    path.lower().startswith(self.uut_path):
+                rest = path[len(self.uut_path):].lower()
+                # Name and index/slice, e.g. data(3) or data(7 downto 4)
+                name, _, index = rest.partition("(")
+                if "." not in name:
+                    if name not in self.uut_signals:
+                        raise KeyError(f"{path} is not a signal of the UUT "
+                                       f"(see tb_info.py)")
+                    width = self.uut_signals[name]
+                    if index and width is not None:
+                        width = slice_width("(" + index)
+            handle = self._handles.get(path) or \
+                SignalHandle(self.tcon, path, width)
+            self._handles[sig] = self._handles[path] = handle
+        return handle
+
+    def register(self, *sigs):
+        """Resolve a set of signals up front
+
+        Returns:
+            list: SignalHandle per signal, in argument order
+
+        """
+        return [self.resolve(sig) for sig in sigs]
+
+    def read_many(self, sigs, as_array=False):
+        """Read a set of signals at the current simulation time
+
+        Args:
+            sigs (list): Signal paths or SignalHandles
+            as_array (bool): Return a NumPy array instead of a list
+
+        Returns:
+            list/numpy.ndarray: Decoded value per signal, None (object array
+            entries) for values with U/X/Z bits
+
+        """
+        values = [self.resolve(sig).read() for sig in sigs]
+        if not as_array:
+            return values
+        if np is None:
+            raise ImportError("read_many(as_array=True) needs numpy")
+        wide = any(value is None or value >= 1 << 63 for value in values)
+        return np.array(values, dtype=object if wide else np.int64)
+
+    def read_dict(self, sigs):
+        """Like read_many(), keyed by signal path"""
+        handles = self.register(*sigs)
+        return {handle.path: handle.read() for handle in handles}
+
+
+def log_file(test_dir, inst):
+    """Path of the LOG_FILE of a tb component instance
+
+    Args:
+        test_dir (str): Test directory (TEST_FOLDER of the TB)
+        inst (str): Instance name of the tb component in the TB
+
+    Returns:
+        str: Path of the log file
+
+    Raises:
+        KeyError: If tb_info.py lists the log files of the TB and inst is
+                  not one of them
+
+    """
+    if LOG_FILES and inst not in LOG_FILES:
+        raise KeyError(f"{inst} has no LOG_FILE generic (see tb_info.py)")
+    return os.path.join(test_dir, LOG_FILES.get(inst, f"{inst}.log"))
+
+
+class LogChecker:
+    """Check the LOG_FILE of a tb component while the simulation runs.
+
+    A background thread follows the log as the component writes it and
+    checks every complete line against a reference. Once more than
+    max_errors lines failed, failed is set; sync_checked() then halts the
+    simulation instead of running the test to the end.
+
+    The reference is either an iterable of expected lines, compared with
+    compare(line, expected), or a model called with every line that returns
+    an error message or None.
+
+    The log is followed as a regular file: the component opens it at time
+    0, before tcon.py runs, so a named pipe would block the simulator
+    without a reader. Lines are only seen once the simulator flushes them.
+
+    Args:
+        path (str): LOG_FILE path, see log_file()
+        expected (iterable or callable): Expected lines, or a model
+        compare (callable): compare(line, expected) -> bool, default
+                            compares the stripped strings
+        max_errors (int): Mismatches tolerated before failed is set
+
+    Example:
+        >>> checker = LogChecker(log_file(test_dir, "out_saif_slave"),
+        ...                      (f"{x:08x}" for x in model_output()),
+        ...                      compare=lambda line, exp: line.endswith(exp))
+        >>> sync_checked(100000, [checker.start()])
+        >>> checker.finish()
+
+    """
+
+    def __init__(self, path, expected, compare=None, max_errors=0):
+        self.path = path
+        if callable(expected):
+            self.model, self.expected = expected, None
+        else:
+            self.model, self.expected = None, iter(expected)
+        self.compare = compare or (lambda line, exp: line == str(exp).strip())
+        self.max_errors = max_errors
+        self.lines = 0
+        self.errors = []
+        self.failed = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._log = None
+        self._partial = ""
+
+    def _error(self, msg):
+        self.errors.append(f"{os.path.basename(self.path)} line "
+                           f"{self.lines}: {msg}")
+        # Runs in the checker thread: TCON must not be used here
+        log.error(self.errors[-1])
+        if len(self.errors) > self.max_errors:
+            self.failed.set()
+
+    def check_line(self, line):
+        """Check one log line against the reference"""
+        self.lines += 1
+        if self.model:
+            msg = self.model(line)
+            if msg:
+                self._error(msg)
+            return
+        exp = next(self.expected, self)
+        if exp is self:
+            self._error(f"unexpected {line!r}")
+        elif not self.compare(line, exp):
+            self._error(f"{line!r}, expected {exp!r}")
+
+    def poll(self):
+        """Check the complete lines written since the last poll
+
+        Returns:
+            int: Number of lines checked
+        """
+        if self._log is None:
+            if not os.path.exists(self.path):
+                return 0
+            self._log = open(self.path, "r")
+        data = self._partial + self._log.read()
+        lines = data.split("\n")
+        # The last element is a line the simulator has not finished yet
+        self._partial = lines.pop()
+        for line in lines:
+            if line.strip():
+                self.check_line(line.strip())
+        return len(lines)
+
+    def _run(self):
+        while not self._stop.is_set() and not self.failed.is_set():
+            if not self.poll():
+                self._stop.wait(LOG_POLL_S)
+
+    def start(self):
+        """Follow the log in a background thread
+
+        Returns:
+            LogChecker: self
+        """
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"log:{self.path}")
+        self._thread.start()
+        return self
+
+    def finish(self):
+        """Stop following the log, check the rest of it and report expected
+        lines that never arrived (unless the checker already failed)
+
+        Returns:
+            list: Error messages, empty if the log matched
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if not self.failed.is_set():
+            self.poll()
+            if self._partial.strip():
+                self.check_line(self._partial.strip())
+                self._partial = ""
+        if self._log:
+            self._log.close()
+            self._log = None
+        if self.expected is not None and not self.failed.is_set():
+            missing = sum(1 for _ in self.expected)
+            if missing:
+                self._error(f"{missing} expected lines missing")
+        return self.errors
+
+
+def sync_checked(cycles, checkers, step=1000):
+    """Run the simulation for a number of clock cycles and halt it as soon
+    as a LogChecker exceeded its error budget
+
+    Args:
+        cycles (int): Clock cycles to run
+        checkers (list): Started LogChecker objects
+        step (int): Clock cycles between checks, the simulation overruns the
+                    first failing line by at most this much
+
+    Returns:
+        bool: True if no checker failed (the simulation is halted otherwise)
+
+    """
+    remaining = cycles
+    while remaining > 0:
+        tcon.sync(min(step, remaining))
+        remaining -= step
+        if any(x.failed.is_set() for x in checkers):
+            for checker in checkers:
+                checker.finish()
+            log.error(f"({tcon.now()} {TIME_UNIT}) log check failed, "
+                      f"halting the simulation")
+            print_complete()
+            tcon.halt()
+            return False
+    return True
+
+
+class AsyncTcon:
+    """Asyncio front end for the blocking TCON connection.
+
+    TCON is a single request/response connection, so transactions are never
+    in flight at the same time. What AsyncTcon adds is structure: stimulus
+    for independent buses is written as one coroutine per bus, and the
+    coroutines interleave transaction by transaction instead of running one
+    test phase after another. Each call runs on the thread of the event loop,
+    which is the thread that created the connection (ZMQ sockets must not be
+    shared between threads), then yields to the other coroutines.
+
+    Note that a sync() issued by one coroutine advances simulation time for
+    every bus.
+
+    Args:
+        tcon_inst (pytcon.Tcon): Connected TCON object
+
+    Example:
+        >>> atcon = get_atcon()
+        >>> irb = atcon.driver(TconIRBMaster(tcon, req_no=1))
+        >>> saif = atcon.driver(TconSAIF(tcon, req_no=2))
+        >>> run_concurrently(irb.write(0x10, 5), saif.unpause())
+
+    """
+
+    def __init__(self, tcon_inst):
+        self.tcon = tcon_inst
+        self.transactions = 0
+
+    async def call(self, func, *args, **kwargs):
+        """Run a blocking TCON call, then let the other coroutines run
+
+        Args:
+            func (callable): Function that talks to the TCON connection
+
+        Returns:
+            Whatever "func" returns
+
+        """
+        result = func(*args, **kwargs)
+        self.transactions += 1
+        await asyncio.sleep(0)
+        return result
+
+    async def read(self, req, addr):
+        """Asynchronous tcon.read()"""
+        return await self.call(self.tcon.read, req, addr)
+
+    async def write(self, req, addr, val):
+        """Asynchronous tcon.write()"""
+        return await self.call(self.tcon.write, req, addr, val)
+
+    async def sync(self, num_clocks):
+        """Asynchronous tcon.sync()"""
+        return await self.call(self.tcon.sync, num_clocks)
+
+    def line(self, req):
+        """Return an AsyncReqLine for TCON request line req"""
+        return AsyncReqLine(self, req)
+
+    def driver(self, obj):
+        """Return an AsyncDriver for a pytcon_objects instance"""
+        return AsyncDriver(self, obj)
+
+
+class AsyncReqLine:
+    """Register access on a single TCON request line through AsyncTcon
+
+    Example:
+        >>> regs = get_atcon().line(0)
+        >>> await regs.write(4, 0x5)
+        >>> await regs.read(4)
+        5
+
+    """
+
+    def __init__(self, atcon_inst, req):
+        self.atcon = atcon_inst
+        self.req = req
+
+    async def read(self, addr):
+        return await self.atcon.read(self.req, addr)
+
+    async def write(self, addr, val):
+        return await self.atcon.write(self.req, addr, val)
+
+
+class AsyncDriver:
+    """Awaitable wrapper around a pytcon_objects instance (TconSAIF,
+    TconIRBMaster, TconSDSlave, ...). Every method of the wrapped object
+    becomes a coroutine function that runs through AsyncTcon.
+
+    Example:
+        >>> irb = get_atcon().driver(TconIRBMaster(tcon, req_no=1))
+        >>> await irb.write(0x10, 5)
+
+    """
+
+    def __init__(self, atcon_inst, obj):
+        self.atcon = atcon_inst
+        self.obj = obj
+
+    def __getattr__(self, name):
+        attr = getattr(self.obj, name)
+        if not callable(attr):
+            return attr
+
+        async def method(*args, **kwargs):
+            return await self.atcon.call(attr, *args, **kwargs)
+        method.__name__ = name
+        return method
+
+
+def run_concurrently(*coros):
+    """Run coroutines that drive independent buses concurrently and wait for
+    all of them. This is the entry point for asyncio based stimulus from a
+    synchronous tcon.py.
+
+    Args:
+        coros: Coroutine objects, typically one per bus
+
+    Returns:
+        list: Result of each coroutine, in argument order
+
+    Example:
+        >>> async def irb_traffic():
+        ...     for addr in range(16):
+        ...         await irb.write(addr, addr)
+        >>> async def saif_traffic():
+        ...     await saif.unpause()
+        >>> run_concurrently(irb_traffic(), saif_traffic())
+
+    """
+    async def gather_all():
+        return await asyncio.gather(*coros)
+    return asyncio.run(gather_all())
+
+
+@functools.lru_cache(maxsize=None)
+def get_atcon():
+    """Return the AsyncTcon of the TCON connection, created on first use"""
+    return AsyncTcon(tcon)
+
+
+# Resolved signals for verify_signal()/wait_on_signal()
+tb_signals = SignalRegistry(tcon, UUT_PATH, UUT_SIGNALS)
+
+
 ###############################################################################
 #
 #                      UUT/TB-specific functions
@@ -6,6 +6,8 @@ import time
 import argparse
 import sys
 import parser_classes as PC
+from generator_profile import Profiler
+from generator_watch import Watcher
 from inspect import currentframe
 import logging
 from typing import NoReturn
@@ -66,6 +68,36 @@ if __name__ == "__main__":
                         info, debug, warn, error, critical", default="error",
                         required=False)
 
+    parser.add_argument('-n', '--tcon_masters', type=int, help="Number of \
+                        TCON masters (tb_tcon instances) to spread the bus \
+                        components across. Each master runs its own \
+                        tcon_<k>.py", default=1, required=False)
+
+    parser.add_argument('-w', '--watch', action='store_true', help="Keep \
+                        running and regenerate the TB whenever the UUT, the \
+                        bus configuration or the tb components change. The \
+                        TB file is overwritten without prompting",
+                        required=False)
+
+    parser.add_argument('--patch', action='store_true', help="Update only \
+                        the generated regions of an existing TB file that \
+                        changed, keeping code outside the region markers. \
+                        The file is not touched if nothing changed",
+                        required=False)
+
+    parser.add_argument('--profile', type=str, nargs='?', const="-",
+                        help="Profile the generation run: per-phase timings "
+                        "and call counts. Optional JSON output file, report "
+                        "is printed to the console otherwise", required=False)
+
+    parser.add_argument('--cprofile', action='store_true', help="Add cProfile \
+                        statistics to the profile (implies --profile)",
+                        required=False)
+
+    parser.add_argument('--tracemalloc', action='store_true', help="Add \
+                        memory allocation statistics to the profile \
+                        (implies --profile)", required=False)
+
     ###########################################################################
     #
     #           TODO:: perform sanity checks
@@ -83,5 +115,41 @@ if __name__ == "__main__":
     else:
         uutpath = os.getcwd()
     uutname = os.path.basename(uutpath)
-    tb_obj = PC.TB(uutpath, uutname)
-    tb_obj.generate_tb_file()
+    if args.watch:
+        Watcher(uutpath, args.tcon_masters).run()
+    elif args.patch:
+        tb_obj = PC.TB(uutpath, uutname, args.tcon_masters)
+        tb_obj.generate_mapping()
+        # None: TB left alone, the generated files would not match it
+        if tb_obj.patch_tb_file(tb_obj.render_tb()) is not None:
+            tb_obj.generate_sim_common()
+            tb_obj.generate_wave_lists()
+            tb_obj.generate_tb_info()
+    elif args.profile or args.cprofile or args.tracemalloc:
+        prof = Profiler(use_cprofile=args.cprofile,
+                        use_tracemalloc=args.tracemalloc)
+        with prof.instrumented():
+            with prof.phase("tb_init"):
+                tb_obj = PC.TB(uutpath, uutname, args.tcon_masters)
+            with prof.phase("generate_mapping"):
+                tb_obj.generate_mapping()
+            with prof.phase("render"):
+                tb_data = tb_obj.render_tb()
+            if tb_obj.confirm_overwrite():
+                with prof.phase("write"):
+                    tb_obj.write_tb_file(tb_data)
+                tb_obj.generate_sim_common()
+                tb_obj.generate_wave_lists()
+                tb_obj.generate_tb_info()
+        print(prof.report())
+        if args.cprofile:
+            print(prof.cprofile_stats())
+        if args.profile and args.profile != "-":
+            prof.dump(args.profile)
+    else:
+        tb_obj = PC.TB(uutpath, uutname, args.tcon_masters)
+        # Files describing the TB only go with a TB that was written
+        if tb_obj.generate_tb_file():
+            tb_obj.generate_sim_common()
+            tb_obj.generate_wave_lists()
+            tb_obj.generate_tb_info()
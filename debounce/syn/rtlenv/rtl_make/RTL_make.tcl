@@ -131,7 +131,7 @@ source $sim_lib
 # Load the garbage file. Initially assume that either .garbage exists or that
 # the folder is clean. The other command may be used to clean view-private
 # files if this one does not do what the users expect.
-dict set trash_tracker contents [RTL_sim_lib::ls_recurse ..]
+dict set trash_tracker manifest [RTL_sim_lib::manifest_snapshot .. $RTL_sim_lib::static_subtrees]
 
 dict set trash_tracker garbage {}
 if {[file exists ".garbage"]} {
@@ -209,6 +209,37 @@ if {$help_opt} {
     set before_all_opt [info exists before_all_commands]
     set after_all_opt [info exists after_all_commands]
   }
+
+  # Restrict the tests to this host's shard. The simulation map, coverage and
+  # the environment log then only see the shard's tests.
+  set shard_opt [dict exists $RTL_sim_lib::sim_options shard]
+  set shard_tests {}
+  set all_tests {}
+  if {$shard_opt && [info exists test_parameters]} {
+    set all_tests [dict keys $test_parameters]
+    set shard_tests [RTL_sim_lib::shard_tests [dict keys $test_parameters] [dict get $RTL_sim_lib::sim_options shard]]
+    set test_parameters [dict filter $test_parameters script {testno value} {
+      expr {[lsearch -exact $shard_tests $testno] >= 0}
+    }]
+    if {[info exists simulation_map]} {
+      dict for {tb_name tb_tests} $simulation_map {
+        set shard_tb_tests {}
+        foreach testno $tb_tests {
+          if {[lsearch -exact $shard_tests $testno] >= 0} {
+            lappend shard_tb_tests $testno
+          }
+        }
+        dict set simulation_map $tb_name $shard_tb_tests
+      }
+    }
+    lassign [dict get $RTL_sim_lib::sim_options shard] shard_index shard_count shard_epoch
+    puts $rtlmake_log "  shard = \"$shard_index/$shard_count[expr {$shard_epoch != "" ? "@$shard_epoch" : ""}]\""
+    if {[llength $shard_tests] == 0} {
+      puts "RTLMAKE: Shard has no tests, skipping simulate and report_coverage."
+      set simulate_opt false
+      set coverage_opt false
+    }
+  }
   close $rtlmake_log
 
   # Run before_all if specified in test_parameters and doing a full run
@@ -311,7 +342,9 @@ if {$help_opt} {
       if {$build_opt} {
         puts "--------------------------------------------------"
         puts "RTLMAKE: Starting build."
+        set phasestart [clock milliseconds]
         set success [catch {RTL_sim_lib::build_dependencies $tb_name} err_msg]
+        RTL_sim_lib::record_timing $tb_name build [expr {([clock milliseconds] - $phasestart) / 1000.0}] [expr {$success ? "fail" : "pass"}]
         if {$success != 0} {
           puts $rtlmake_log "    build_dependencies = \"error\""
           error $err_msg
@@ -329,6 +362,7 @@ if {$help_opt} {
       if {$compile_opt} {
         puts "--------------------------------------------------"
         puts "RTLMAKE: Starting compile."
+        set phasestart [clock milliseconds]
         set success [catch {source ./vhd_source_list.tcl} err_msg]
         if {$success != 0} {
           puts $rtlmake_log "    compile = \"error\""
@@ -355,6 +389,7 @@ if {$help_opt} {
             set success [catch {RTL_sim_lib::compile $src_list $compile_mode} err_msg]
           }
         }
+        RTL_sim_lib::record_timing $tb_name compile [expr {([clock milliseconds] - $phasestart) / 1000.0}] [expr {$success ? "fail" : "pass"}]
         if {$success != 0} {
           puts $rtlmake_log "    compile = \"error\""
           error $err_msg
@@ -406,6 +441,16 @@ if {$help_opt} {
         if {[info exists wave_list]} {
           dict set run_test_params wave_list $wave_list
         }
+        # Named lists for per test selection (see RTL_sim_lib::run_tests)
+        if {[info exists wave_lists]} {
+          dict set run_test_params wave_lists $wave_lists
+          if {[info exists test_wave_lists]} {
+            dict set run_test_params test_wave_lists $test_wave_lists
+          }
+          if {[info exists default_wave_list]} {
+            dict set run_test_params default_wave_list $default_wave_list
+          }
+        }
         if {[llength $RTL_sim_lib::tb_src_list] > 1} {
           dict set run_test_params simulation_map $simulation_map
           dict set run_test_params tb_entity $tb_name
@@ -427,6 +472,11 @@ if {$help_opt} {
           dict set run_test_params resolution_options $resolution_options
         }
 
+        # Extra inputs of the 'cached' result cache
+        if {[info exists cache_inputs]} {
+          dict set run_test_params cache_inputs $cache_inputs
+        }
+
         # Run the simulations.
         set success [catch {RTL_sim_lib::run_tests $run_test_params} err_msg]
         if {$success != 0} {
@@ -442,6 +492,13 @@ if {$help_opt} {
   }
   close $rtlmake_log
 
+  # Record the outcome of this host's tests for rtl_shard_merge.py.
+  if {$shard_opt} {
+    lassign [dict get $RTL_sim_lib::sim_options shard] shard_index shard_count
+    RTL_sim_lib::write_shard_results shard_${shard_index}_of_${shard_count}.json \
+      [dict get $RTL_sim_lib::sim_options shard] $shard_tests $all_tests
+  }
+
   # Update the contents of the garbage tracking variables.
   set trash_tracker [RTL_sim_lib::update_garbage $trash_tracker]
 
@@ -455,7 +512,9 @@ if {$help_opt} {
   if {$verify_opt} {
     # We allow it to run, if the dictionary exists
     if {[info exists command_dictionary]} {
+      set phasestart [clock milliseconds]
       set success [catch {RTL_sim_lib::exec_cmd_dictionary $command_dictionary {command dictionary} verify} err_msg]
+      RTL_sim_lib::record_timing all verify [expr {([clock milliseconds] - $phasestart) / 1000.0}] [expr {$success ? "fail" : "pass"}]
       if {$success != 0} {
         puts $rtlmake_log "  verify = \"error\""
         error $err_msg
@@ -501,7 +560,9 @@ if {$help_opt} {
   puts $rtlmake_log "\[after_all\]"
   if {$after_all_opt} {
     #Run the commands in the after_all dictionary
+    set phasestart [clock milliseconds]
     set success [catch {RTL_sim_lib::exec_cmd_dictionary $after_all_commands "after_all_commands" after_all} err_msg]
+    RTL_sim_lib::record_timing all after_all [expr {([clock milliseconds] - $phasestart) / 1000.0}] [expr {$success ? "fail" : "pass"}]
     if {$success != 0} {
       puts $rtlmake_log "  after_all = \"error\""
       error $err_msg
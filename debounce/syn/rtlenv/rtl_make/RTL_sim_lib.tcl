@@ -76,6 +76,10 @@
 #         It directs ::RTL_sim_lib::run_tests to provide a list of signals to
 #         log to ::RTL_sim_lib::log_signal_wave.
 #
+#         Without any of the log options above, ::RTL_sim_lib::run_tests logs
+#         the named list selected per test (test_wave_lists) or the
+#         default_wave_list, if test_parameters.tcl defines wave_lists.
+#
 #       testbench <test bench name>
 #         It specifies which test bench, as specified in <test bench name> to
 #         use for simulation. If multiple test benches are present and
@@ -88,11 +92,39 @@
 #         identifier>. <test identifier> can be numeric, alphabetic, or
 #         alphanumeric. Underscores are allowed anywhere in the identifier.
 #
+#       cached
+#         It directs ::RTL_sim_lib::run_tests to skip the simulation of tests
+#         whose inputs are unchanged since their last passing run and report
+#         the cached pass instead. The inputs of a test are the compiled
+#         working library, the Python scripts and sim_params.txt of the test
+#         folder, the Python scripts of the common folder, the files matching
+#         the cache_inputs patterns of test_parameters.tcl (e.g. stimulus
+#         data kept in the test folders), the generics and the simulation
+#         options. Files the run writes (stimulus, logs, results) are not
+#         inputs. Passing results are kept
+#         in the .cache folder of the sim directory; the transcript and
+#         coverage database of a cached test are restored from there.
+#
+#       force
+#         Simulate every test even if 'cached' is given, refreshing the
+#         cached results.
+#
 #   verify
 #     It sets ::RTL_sim_lib::sim_options verify.
 #
 #   report_coverage
 #     It sets ::RTL_sim_lib::sim_options report_coverage.
+#     report_coverage options (ModelSim only):
+#
+#       cover_jobs <N>
+#         Merges the per-test coverage databases as a tree with up to <N>
+#         parallel vcover processes (rtl_cover_merge.py next to this file)
+#         and writes per-test coverage summaries to coverage/summary.json.
+#
+#       cover_incr
+#         Keeps the merged database as coverage/merged_base.ucdb and only
+#         merges new tests into it on the next run. The base is rebuilt if a
+#         merged test changed. Implies the parallel merge.
 #
 #   clean
 #     It sets ::RTL_sim_lib::sim_options to only clean files generated during
@@ -105,6 +137,43 @@
 #     It sets ::RTL_sim_lib::sim_options clean to all view-private, as
 #     determined by ClearCase files in the sim, and tb directories.
 #
+#   timing
+#     Records the wall time of the build, compile, simulation, verify and
+#     after_all phases, and the figures the TCON scripts print (see
+#     print_timing in common.py), in the regression timing database. Refer to
+#     rtl_timing_db.py next to this file for reports.
+#
+#   shard K/N[@EPOCH]
+#     Runs only the K-th of N disjoint shares of the tests, so that N hosts
+#     can run the same sim directory without overlap. Tests are distributed
+#     by a hash of their name. With @EPOCH (seconds, e.g. the start time of
+#     the CI pipeline) they are balanced by their simulation times recorded
+#     before EPOCH (see 'timing') instead; runs recorded later, e.g. by the
+#     other hosts, do not change the shards. All hosts must pass the same
+#     EPOCH and see the same timing database, e.g. through RTL_TIMING_DB.
+#     The results of the shard and the list of all tests are written to
+#     shard_K_of_N.json; merge them with rtl_shard_merge.py next to this
+#     file.
+#
+#   watch <slice>
+#     Runs each simulation in slices of <slice> simulation time (e.g. 100us)
+#     while rtl_transcript_watch.py next to this file follows the transcript.
+#     A test whose transcript matches a cant_have rule of pysim_rules.xml is
+#     stopped at the end of the current slice instead of running to its end;
+#     the matching line is reported as the reason of its failure. Ignored
+#     with 'runfor'. ModelSim only.
+#
+#   adaptive
+#     Limits each simulation to a multiple of its recorded history (see
+#     'timing'): the p99 of the wall time and of the simulated time of its
+#     last passing runs, times 3, at least 60 s and 1 ms. A test exceeding a
+#     limit is stopped and reported as hung. If a single run slice blocks for
+#     twice the wall time limit, e.g. in a TCON script that never returns to
+#     the simulator, a Tcl timer stops the run with 'stop' (see
+#     ::RTL_sim_lib::stop_limited_simulation), the test is reported as hung
+#     and the remaining tests continue. Tests without history run unlimited. Implies 'timing', so passing runs extend the
+#     history. Takes precedence over 'watch'. ModelSim only.
+#
 #   runfor
 #     Determines a time limit for either a single simulation (if specified) or
 #     all simulations to be executed. Accepts up to two inputs as arguments and
@@ -162,6 +231,8 @@ namespace eval ::RTL_sim_lib {
     initialize_simulation \
     run_simulation \
     run_timed_simulation \
+    run_watched_simulation \
+    run_limited_simulation \
     run_tests \
     log_signal_wave \
     post_verify \
@@ -169,7 +240,10 @@ namespace eval ::RTL_sim_lib {
     ls_recurse \
     lsubtract \
     update_garbage \
-    clean
+    manifest_snapshot \
+    clean \
+    auto_discover_tests \
+    shard_tests
 
   # This is a set of namespace constant variables used across procs. TCL does
   # not have the concept of const, thus, it is up to the developers to make
@@ -190,6 +264,32 @@ namespace eval ::RTL_sim_lib {
   # entry so that it exists!
   variable sim_options [dict create created 1]
 
+  # Result cache of passing tests, relative to the sim folder.
+  variable cache_folder .cache
+  # Declared inputs of a test in its folder and in the common folder, see
+  # ::RTL_sim_lib::test_fingerprint. Other inputs come from cache_inputs.
+  variable cache_test_inputs {*.py sim_params.txt}
+  variable cache_common_inputs {*.py}
+
+  # Outcome of each test run by ::RTL_sim_lib::run_tests: testno -> dict of
+  # tb_entity, status, reason, seconds and cached.
+  variable test_results [dict create]
+
+  # Set by the wall time timer of ::RTL_sim_lib::run_limited_simulation.
+  variable limit_expired 0
+
+  # Python interpreter for the helper scripts next to this file.
+  variable python_cmd [expr {[auto_execok py] != "" ? {py -3} : {python3}}]
+  variable timing_db_script [file join [file dirname [info script]] rtl_timing_db.py]
+  variable cover_merge_script [file join [file dirname [info script]] rtl_cover_merge.py]
+  variable clean_script [file join [file dirname [info script]] rtl_clean.py]
+  variable watch_script [file join [file dirname [info script]] rtl_transcript_watch.py]
+
+  # Garbage tracking: subtrees, relative to the component folder, that never
+  # hold generated files, and the size from which clean removes in parallel.
+  variable static_subtrees {src syn/rtlenv/*/src syn/rtlenv/*/.git .git}
+  variable parallel_clean_min 200
+
   variable is_clearcase [expr ![catch {exec cleartool catcs}]]
 }
 
@@ -279,7 +379,7 @@ proc ::RTL_sim_lib::parse_command_line {} {
 
       if {$argind == $runfor_param_index1} {
         # error if this arg is a known command to RTL_make
-        if {[string equal -nocase $arg "help"] || [string equal -nocase $arg "run"] || [string equal -nocase $arg "build"] || [string equal -nocase $arg "compile"] || [string equal -nocase $arg "simulate"] || [string equal -nocase $arg "logunits"] || [string equal -nocase $arg "loguuts"] || [string equal -nocase $arg "logrecursive"] || [string equal -nocase $arg "loglist"] || [string equal -nocase $arg "testbench"] || [string equal -nocase $arg "testno"] || [string equal -nocase $arg "verify"] || [string equal -nocase $arg "report_coverage"] || [string equal -nocase $arg "clean_private"] || [string equal -nocase $arg "clean"]} {
+        if {[string equal -nocase $arg "help"] || [string equal -nocase $arg "run"] || [string equal -nocase $arg "build"] || [string equal -nocase $arg "compile"] || [string equal -nocase $arg "simulate"] || [string equal -nocase $arg "logunits"] || [string equal -nocase $arg "loguuts"] || [string equal -nocase $arg "logrecursive"] || [string equal -nocase $arg "loglist"] || [string equal -nocase $arg "testbench"] || [string equal -nocase $arg "testno"] || [string equal -nocase $arg "verify"] || [string equal -nocase $arg "report_coverage"] || [string equal -nocase $arg "clean_private"] || [string equal -nocase $arg "clean"] || [string equal -nocase $arg "cached"] || [string equal -nocase $arg "force"] || [string equal -nocase $arg "timing"] || [string equal -nocase $arg "shard"] || [string equal -nocase $arg "cover_jobs"] || [string equal -nocase $arg "cover_incr"] || [string equal -nocase $arg "watch"] || [string equal -nocase $arg "adaptive"]} {
           error "RTLSIMLIB: Command 'runfor' needs input parameters."
         } else {
           set gotrunfor_param_index1 1
@@ -289,7 +389,7 @@ proc ::RTL_sim_lib::parse_command_line {} {
 
       if {$argind == $runfor_param_index2 && $gotrunfor_param_index1} {
         # error if this arg is a known command to RTL_make
-        if {![string equal -nocase $arg "help"] && ![string equal -nocase $arg "run"] && ![string equal -nocase $arg "build"] && ![string equal -nocase $arg "compile"] && ![string equal -nocase $arg "simulate"] && ![string equal -nocase $arg "logunits"] && ![string equal -nocase $arg "loguuts"] && ![string equal -nocase $arg "logrecursive"] && ![string equal -nocase $arg "loglist"] && ![string equal -nocase $arg "testbench"] && ![string equal -nocase $arg "testno"] && ![string equal -nocase $arg "verify"] && ![string equal -nocase $arg "report_coverage"] && ![string equal -nocase $arg "clean_private"] && ![string equal -nocase $arg "clean"]} {
+        if {![string equal -nocase $arg "help"] && ![string equal -nocase $arg "run"] && ![string equal -nocase $arg "build"] && ![string equal -nocase $arg "compile"] && ![string equal -nocase $arg "simulate"] && ![string equal -nocase $arg "logunits"] && ![string equal -nocase $arg "loguuts"] && ![string equal -nocase $arg "logrecursive"] && ![string equal -nocase $arg "loglist"] && ![string equal -nocase $arg "testbench"] && ![string equal -nocase $arg "testno"] && ![string equal -nocase $arg "verify"] && ![string equal -nocase $arg "report_coverage"] && ![string equal -nocase $arg "clean_private"] && ![string equal -nocase $arg "clean"] && ![string equal -nocase $arg "cached"] && ![string equal -nocase $arg "force"] && ![string equal -nocase $arg "timing"] && ![string equal -nocase $arg "shard"] && ![string equal -nocase $arg "cover_jobs"] && ![string equal -nocase $arg "cover_incr"] && ![string equal -nocase $arg "watch"] && ![string equal -nocase $arg "adaptive"]} {
           set gotrunfor_param_index2 1
           set input2 $arg
           break
@@ -318,7 +418,7 @@ proc ::RTL_sim_lib::parse_command_line {} {
 
       # Ignore indices that correspond to various argument parameters
       # Those indices are as follows:
-      #  a) Ignore the indice immediately following 'run', 'build', 'loglist', 'testbench', and 'testno' (Indicated
+      #  a) Ignore the indice immediately following 'run', 'build', 'loglist', 'testbench', 'testno', 'shard', 'cover_jobs' and 'watch' (Indicated
       #     by $ignore_next != 0)
       #  b) Ignore the list specified following 'logunits' (Indicated by $ignore_list != 0)
       #  c) Ignore the indice immediately following 'runfor' and optionally the one after that (indicated by
@@ -446,6 +546,55 @@ proc ::RTL_sim_lib::parse_command_line {} {
             set ignore_next 1
           }
 
+        } elseif {[string equal -nocase $arg "cached"]} {
+          dict set sim_options cached 1
+          puts "RTLSIMLIB: Found 'cached' as an option for 'simulate'."
+
+        } elseif {[string equal -nocase $arg "force"]} {
+          dict set sim_options force 1
+          puts "RTLSIMLIB: Found 'force' as an option for 'simulate'."
+
+        } elseif {[string equal -nocase $arg "shard"]} {
+          if {[regexp -nocase -- {shard (\d+)/(\d+)(?:@(\d+))?} $argv option shard_index shard_count shard_epoch] &&
+              $shard_index >= 1 && $shard_index <= $shard_count} {
+            dict set sim_options shard [list $shard_index $shard_count $shard_epoch]
+            puts "RTLSIMLIB: Found 'shard $shard_index/$shard_count[expr {$shard_epoch != "" ? "@$shard_epoch" : ""}]' as a command line argument."
+            set ignore_next 1
+          } else {
+            error "RTLSIMLIB: 'shard' needs a parameter K/N or K/N@EPOCH with 1 <= K <= N."
+          }
+
+        } elseif {[string equal -nocase $arg "cover_jobs"]} {
+          if {[regexp -nocase -- {cover_jobs (\d+)} $argv option cover_jobs] && $cover_jobs > 0} {
+            dict set sim_options cover_jobs $cover_jobs
+            puts "RTLSIMLIB: Found 'cover_jobs $cover_jobs' as an option for 'report_coverage'."
+            set ignore_next 1
+          } else {
+            error "RTLSIMLIB: 'cover_jobs' needs a number of worker processes as a parameter."
+          }
+
+        } elseif {[string equal -nocase $arg "cover_incr"]} {
+          dict set sim_options cover_incr 1
+          puts "RTLSIMLIB: Found 'cover_incr' as an option for 'report_coverage'."
+
+        } elseif {[string equal -nocase $arg "watch"]} {
+          if {[regexp -nocase -- {watch (\d+(?:\.\d+)?[a-z]+)} $argv option watch_slice]} {
+            dict set sim_options watch $watch_slice
+            puts "RTLSIMLIB: Found 'watch $watch_slice' as an option for 'simulate'."
+            set ignore_next 1
+          } else {
+            error "RTLSIMLIB: 'watch' needs a simulation time slice, e.g. 100us, as a parameter."
+          }
+
+        } elseif {[string equal -nocase $arg "adaptive"]} {
+          dict set sim_options adaptive 1
+          dict set sim_options timing 1
+          puts "RTLSIMLIB: Found 'adaptive' as an option for 'simulate'."
+
+        } elseif {[string equal -nocase $arg "timing"]} {
+          dict set sim_options timing 1
+          puts "RTLSIMLIB: Found 'timing' as a command line argument."
+
         } elseif {[string equal -nocase $arg "before_all"]} {
           dict set sim_options before_all 1
           puts "RTLSIMLIB: Found 'before_all' as a command line argument."
@@ -1190,6 +1339,255 @@ proc ::RTL_sim_lib::run_timed_simulation {testno limit} {
 }
 
 
+#
+# Brief:
+#   Converts a simulation time to femtoseconds.
+#
+# Parameter [Input]: sim_time
+#   Time with unit, e.g. "100us" or "100 us", or a plain number of unit.
+#
+# Parameter [Input]: unit (optional)
+#   Unit of a plain number, e.g. the simulation resolution "10ps".
+#
+# Returns:
+#   Integer number of femtoseconds.
+#
+proc ::RTL_sim_lib::sim_time_fs {sim_time {unit fs}} {
+  set scale {fs 1 ps 1000 ns 1000000 us 1000000000 ms 1000000000000 sec 1000000000000000 s 1000000000000000}
+  if {![regexp -nocase -- {^\s*\{?\s*([0-9.]+)\s*([a-z]*)} $sim_time match value time_unit]} {
+    error "RTLSIMLIB: Can't read simulation time '$sim_time'."
+  }
+  if {$time_unit == ""} {
+    set time_unit $unit
+  }
+  if {![regexp -nocase -- {^([0-9]*)([a-z]+)$} $time_unit match multiplier time_unit] ||
+      ![dict exists $scale [string tolower $time_unit]]} {
+    error "RTLSIMLIB: Unknown time unit in '$sim_time'."
+  }
+  if {$multiplier == ""} {
+    set multiplier 1
+  }
+  return [expr {wide(round($value * $multiplier * [dict get $scale [string tolower $time_unit]]))}]
+}
+
+
+#
+# Brief:
+#   Runs a simulation in slices and stops it early on a fatal transcript line.
+#
+# Parameter [Input]: testno
+#   Test for which to run the simulation.
+#
+# Parameter [Input]: slice
+#   Simulation time of one slice, e.g. 100us.
+#
+# Parameter [Input]: sim_resolution
+#   Simulation time resolution, the unit of [now].
+#
+# Returns:
+#   The abort reason, empty if the simulation ran to its end.
+#
+# Details:
+#   rtl_transcript_watch.py follows simulation_<testno>.log in the
+#   background and writes simulation_<testno>.abort on the first line that
+#   matches a cant_have rule. The abort file is checked after every slice.
+#   The simulation ended by itself once a slice returns before its full
+#   length. Coverage is saved in both cases.
+#
+# Remarks:
+#   The simulator flushes its transcript in blocks, so a test may run a few
+#   slices past its first error. ModelSim only, Aldec runs the simulation
+#   without watcher.
+#
+proc ::RTL_sim_lib::run_watched_simulation {testno slice sim_resolution} {
+  variable is_aldec
+  variable python_cmd
+  variable watch_script
+
+  if {$is_aldec} {
+    puts "RTLSIMLIB: WARNING: 'watch' is not supported on Aldec, running test $testno to its end."
+    RTL_sim_lib::run_simulation $testno
+    return {}
+  }
+
+  set abort_file simulation_$testno.abort
+  set done_file simulation_$testno.watched
+  file delete -force $abort_file $done_file
+  exec {*}$python_cmd $watch_script simulation_$testno.log \
+    --abort-file $abort_file --done-file $done_file &
+
+  set reason {}
+  set slice_fs [RTL_sim_lib::sim_time_fs $slice]
+  set run_error [catch {
+    while {1} {
+      set before [RTL_sim_lib::sim_time_fs [now] $sim_resolution]
+      run $slice
+      if {[file exists $abort_file]} {
+        set fh [open $abort_file r]
+        set reason [string trim [read $fh]]
+        close $fh
+        break
+      }
+      if {[RTL_sim_lib::sim_time_fs [now] $sim_resolution] - $before < $slice_fs} {
+        break
+      }
+    }
+  } err_msg]
+  # Tells the watcher to read the rest of the transcript and exit.
+  close [open $done_file w]
+  if {$run_error} {
+    error $err_msg
+  }
+
+  if {$reason != ""} {
+    puts "RTLSIMLIB: Test $testno stopped early: $reason"
+  }
+  if {![file exists ./coverage]} {
+    file mkdir ./coverage
+  }
+  coverage save coverage/test_$testno.ucdb
+  file delete -force $abort_file
+  return $reason
+}
+
+
+#
+# Brief:
+#   Wall time and simulated time limits of tests from the timing database.
+#
+# Parameter [Input]: tests
+#   Tests to look up.
+#
+# Returns:
+#   Dictionary of test -> dict of wall_s and sim_ns (none if unknown). Tests
+#   without history are missing.
+#
+proc ::RTL_sim_lib::adaptive_limits {tests} {
+  variable python_cmd
+  variable timing_db_script
+
+  set limits [dict create]
+  if {![llength $tests]} {
+    return $limits
+  }
+  if {[catch {exec {*}$python_cmd $timing_db_script limits {*}$tests} output]} {
+    puts "RTLSIMLIB: WARNING: Could not read the timing history, running without limits: $output"
+    return $limits
+  }
+  foreach line [split $output "\n"] {
+    if {[llength $line] == 3} {
+      lassign $line test wall_s sim_ns
+      dict set limits $test [dict create wall_s $wall_s sim_ns $sim_ns]
+    }
+  }
+  return $limits
+}
+
+
+#
+# Brief:
+#   Runs a simulation within wall time and simulated time limits.
+#
+# Parameter [Input]: testno
+#   Test for which to run the simulation.
+#
+# Parameter [Input]: limit
+#   Dict of wall_s and sim_ns, see ::RTL_sim_lib::adaptive_limits.
+#
+# Parameter [Input]: sim_resolution
+#   Simulation time resolution, the unit of [now].
+#
+# Returns:
+#   The reason the test was stopped ("hung: ..."), empty if it ended by
+#   itself.
+#
+# Details:
+#   The simulation runs in 16 slices of the simulated time limit, the limits
+#   are checked after every slice. Without simulated time limit it runs in
+#   one piece. If the test is not done after twice the wall time limit (e.g.
+#   a TCON script spinning within one slice), a timer stops the run through
+#   the simulator; the test is reported as hung and the remaining tests of
+#   this run continue.
+#
+proc ::RTL_sim_lib::run_limited_simulation {testno limit sim_resolution} {
+  variable is_aldec
+  variable limit_expired
+
+  if {$is_aldec} {
+    puts "RTLSIMLIB: WARNING: 'adaptive' is not supported on Aldec, running test $testno without limits."
+    RTL_sim_lib::run_simulation $testno
+    return {}
+  }
+
+  set wall_s [dict get $limit wall_s]
+  set sim_ns [dict get $limit sim_ns]
+  puts "RTLSIMLIB: Limits of test $testno: $wall_s s wall time, [expr {$sim_ns == "none" ? "no" : "$sim_ns ns"}] simulated time."
+  set limit_expired 0
+  set timer [after [expr {int(2000 * $wall_s)}] RTL_sim_lib::stop_limited_simulation]
+
+  set reason {}
+  set start_ms [clock milliseconds]
+  set run_error [catch {
+    if {$sim_ns == "none"} {
+      run -all
+    } else {
+      set slice_ns [expr {max(1, wide($sim_ns) / 16)}]
+      set start_fs [RTL_sim_lib::sim_time_fs [now] $sim_resolution]
+      while {1} {
+        set before [RTL_sim_lib::sim_time_fs [now] $sim_resolution]
+        run $slice_ns ns
+        set after [RTL_sim_lib::sim_time_fs [now] $sim_resolution]
+        if {$after - $before < $slice_ns * 1000000} {
+          break
+        }
+        if {[clock milliseconds] - $start_ms > $wall_s * 1000} {
+          set reason "hung: exceeded the wall time limit of $wall_s s"
+          break
+        }
+        if {$after - $start_fs >= wide($sim_ns) * 1000000} {
+          set reason "hung: exceeded the simulated time limit of $sim_ns ns"
+          break
+        }
+      }
+    }
+  } err_msg]
+  after cancel $timer
+  if {$limit_expired} {
+    set reason "hung: did not return within [expr {2 * $wall_s}] s, stopped"
+  } elseif {$run_error} {
+    error $err_msg
+  }
+
+  if {$reason != ""} {
+    puts "RTLSIMLIB: Test $testno stopped, $reason"
+  }
+  if {![file exists ./coverage]} {
+    file mkdir ./coverage
+  }
+  coverage save coverage/test_$testno.ucdb
+  return $reason
+}
+
+
+#
+# Brief:
+#   Timer callback of ::RTL_sim_lib::run_limited_simulation, stops the
+#   current run.
+#
+# Details:
+#   ModelSim services Tcl events while it simulates. The stop command ends
+#   the run like the Break button, so the simulator, its coverage and the
+#   remaining tests are kept.
+#
+proc ::RTL_sim_lib::stop_limited_simulation {} {
+  variable limit_expired
+
+  set limit_expired 1
+  puts "RTLSIMLIB: Wall time limit exceeded, stopping the simulation."
+  stop
+}
+
+
 #
 # Brief:
 #   Sets up and runs one or multiple tests.  All parameters are passed in using
@@ -1205,6 +1603,17 @@ proc ::RTL_sim_lib::run_timed_simulation {testno limit} {
 # Parameter [Input]: wave_list (optional)
 #   List of signals to log.
 #
+# Parameter [Input]: wave_lists (optional)
+#   Dictionary of named signal lists (list name -> list of signals).
+#
+# Parameter [Input]: test_wave_lists (optional)
+#   Dictionary mapping a test to the name of the wave_lists entry to log.
+#
+# Parameter [Input]: default_wave_list (optional)
+#   Name of the wave_lists entry to log for tests not in test_wave_lists.
+#   The 'loglist' and 'logunits/loguuts/logrecursive' command line options
+#   take precedence over the per test and default lists.
+#
 # Parameter [Input]: simulation_map (optional)
 #   Dictionary that maps each test bench with a set of tests.
 #
@@ -1214,6 +1623,10 @@ proc ::RTL_sim_lib::run_timed_simulation {testno limit} {
 # Parameter [Input]: simulate_options (optional)
 #   Dictionary on additional vsim commands per testbench entity.
 #
+# Parameter [Input]: cache_inputs (optional)
+#   List of glob patterns, relative to the sim folder, of additional files
+#   (e.g. shared stimulus) that are inputs of every test. See 'cached'.
+#
 # Details:
 #   This procedure determines which tests to run for the current built and
 #   compiled sources. Then for each test (unless a single one specified via
@@ -1221,12 +1634,18 @@ proc ::RTL_sim_lib::run_timed_simulation {testno limit} {
 #   default options, passes the appropriate generics to the test bench, and
 #   finally it runs the simulation.
 #
+#   With the 'cached' command line option, tests whose fingerprint (see
+#   ::RTL_sim_lib::test_fingerprint) matches their last passing run are not
+#   simulated; their transcript and coverage database are restored from the
+#   cache instead.
+#
 # Usage:
 #   RTL_sim_lib::run_tests $test_params $component1tb_map
 #
 proc ::RTL_sim_lib::run_tests {params} {
   variable sim_options
   variable tb_src_list
+  variable test_results
   
   set supported_resolution  {
                               fs 1fs 10fs 100fs
@@ -1302,9 +1721,16 @@ proc ::RTL_sim_lib::run_tests {params} {
     set tb_options {}
   }
 
+  # History based limits of the 'adaptive' option.
+  set limits [dict create]
+  if {[info exists sim_options] && [dict exists $sim_options adaptive]} {
+    set limits [RTL_sim_lib::adaptive_limits $tb_entity_tests_list]
+  }
+
   # Run the tests for the chosen test bench.
   foreach testno $tb_entity_tests_list {
     set timestart [clock seconds]
+    set timestart_ms [clock milliseconds]
     # Skip the tests we don't want to run.
     if {[info exists sim_options] && [dict exists $sim_options testno]} {
       if {[dict get $sim_options testno] != $testno} {
@@ -1330,6 +1756,18 @@ proc ::RTL_sim_lib::run_tests {params} {
 
     puts "------------------------------"
     set parameters [dict get $test_params $testno]
+
+    # Skip the simulation if the test passed before with the same inputs.
+    set use_cache [expr {[info exists sim_options] && [dict exists $sim_options cached]}]
+    if {$use_cache} {
+      set fingerprint [RTL_sim_lib::test_fingerprint $testno $tb_entity $parameters $sim_resolution $tb_options $params]
+      if {![dict exists $sim_options force] && [RTL_sim_lib::cache_lookup $testno $fingerprint]} {
+        puts "RTLSIMLIB: Test $testno for $tb_entity passed (cached), inputs unchanged since the last passing run."
+        dict set test_results $testno [dict create tb_entity $tb_entity status pass reason {} seconds 0 cached 1]
+        continue
+      }
+    }
+
     RTL_sim_lib::set_log "simulation_$testno"
     puts "RTLSIMLIB: Running test: $testno for $tb_entity."
     puts "RTLSIMLIB: Simulation resolution: $sim_resolution."
@@ -1342,14 +1780,22 @@ proc ::RTL_sim_lib::run_tests {params} {
 
     RTL_sim_lib::initialize_simulation $testno $tb_entity $parameters $sim_resolution $tb_options
 
+    set test_wave_list [RTL_sim_lib::test_wave_list $testno $params]
     if {[info exists sim_options] && [dict exists $sim_options loglist] && [dict exists $params wave_list]} {
       RTL_sim_lib::log_signal_wave [dict get $params wave_list]
+    } elseif {[llength $test_wave_list]} {
+      RTL_sim_lib::log_signal_wave [lindex $test_wave_list 1] 1
     } else {
       RTL_sim_lib::log_signal_wave
     }
+    set abort_reason {}
     if {[info exists sim_options] && [dict exists $sim_options runfor]} {
       set limit [dict get $sim_options runfor]
       RTL_sim_lib::run_timed_simulation $testno $limit
+    } elseif {[dict exists $limits $testno]} {
+      set abort_reason [RTL_sim_lib::run_limited_simulation $testno [dict get $limits $testno] $sim_resolution]
+    } elseif {[info exists sim_options] && [dict exists $sim_options watch]} {
+      set abort_reason [RTL_sim_lib::run_watched_simulation $testno [dict get $sim_options watch] $sim_resolution]
     } else {
       RTL_sim_lib::run_simulation $testno
     }
@@ -1357,6 +1803,23 @@ proc ::RTL_sim_lib::run_tests {params} {
     #Run post-sim hooks if present, again, in the space of the timer
     RTL_sim_lib::per_sim_cmd $testno $params 0
 
+    set seconds [expr {([clock milliseconds] - $timestart_ms) / 1000.0}]
+    set hung [string match "hung:*" $abort_reason]
+    RTL_sim_lib::record_timing $testno sim $seconds [expr {$hung ? "hung" : "pass"}] simulation_$testno.log
+    set verdict [RTL_sim_lib::transcript_verdict simulation_$testno.log]
+    if {$hung} {
+      set verdict $abort_reason
+    } elseif {$abort_reason != ""} {
+      set verdict "fail: stopped early, $abort_reason"
+    }
+    dict set test_results $testno [dict create tb_entity $tb_entity \
+      status [expr {$verdict == "pass" ? "pass" : $hung ? "hung" : "fail"}] \
+      reason [regsub {^(fail|hung): } $verdict {}] seconds $seconds cached 0]
+    # A stopped test never enters the cache, even if its transcript passes.
+    if {$use_cache} {
+      RTL_sim_lib::cache_store $testno $fingerprint $verdict
+    }
+
     puts "RTLSIMLIB: Test $testno Complete - Elapsed Time [clock format \
       [expr {[clock seconds] - $timestart}] -format {%H:%M:%S} -timezone :UTC]\n\n"
   }
@@ -1368,6 +1831,541 @@ proc ::RTL_sim_lib::run_tests {params} {
 }
 
 
+#
+# Brief:
+#   Discovers the tests of a sim folder.
+#
+# Details:
+#   Every folder of the current directory named like <number>_<name> is a
+#   test. Its sim_params.txt holds one "GENERIC_NAME value" pair per line,
+#   TEST_PREFIX is set to the folder name. A gen_data.py in the folder
+#   becomes the test's before_sim_commands entry.
+#
+#   Sets test_parameters and before_sim_commands in the caller's scope, which
+#   is meant to be test_parameters.tcl.
+#
+# Usage:
+#   RTL_sim_lib::auto_discover_tests
+#
+proc ::RTL_sim_lib::auto_discover_tests {} {
+  variable python_cmd
+  upvar 1 test_parameters test_parameters
+  upvar 1 before_sim_commands before_sim_commands
+
+  if {![info exists test_parameters]} {
+    set test_parameters [dict create]
+  }
+  if {![info exists before_sim_commands]} {
+    set before_sim_commands [dict create]
+  }
+
+  foreach testdir [lsort [glob -nocomplain -type d {[0-9]*_*}]] {
+    puts "RTLSIMLIB: Discovered test $testdir"
+    if {[file exists $testdir/gen_data.py]} {
+      dict set before_sim_commands $testdir [list {*}$python_cmd $testdir/gen_data.py $testdir]
+    }
+    if {![file exists $testdir/sim_params.txt]} {
+      error "RTLSIMLIB: Test $testdir has no sim_params.txt."
+    }
+    set fh [open $testdir/sim_params.txt r]
+    set param_lines [split [read $fh] "\n"]
+    close $fh
+    dict set test_parameters $testdir [dict create TEST_PREFIX $testdir]
+    foreach line $param_lines {
+      if {[llength [set pair [regexp -inline -all -- {\S+} $line]]] >= 2} {
+        dict set test_parameters $testdir [lindex $pair 0] [lindex $pair 1]
+      }
+    }
+  }
+}
+
+
+#
+# Brief:
+#   Selects the tests of one shard.
+#
+# Parameter [Input]: tests
+#   All tests.
+#
+# Parameter [Input]: shard
+#   List {K N EPOCH}: the K-th (1 based) of N shards, EPOCH may be empty.
+#
+# Returns:
+#   The tests of shard K, in their original order.
+#
+# Details:
+#   With an EPOCH and a timing database, rtl_timing_db.py balances the
+#   shards by the simulation times recorded before EPOCH (longest
+#   processing time first). Otherwise a test goes to shard
+#   (md5(name) mod N) + 1. Both only depend on inputs that do not change
+#   while the hosts run, so hosts given the same tests pick disjoint shards
+#   that cover all tests.
+#
+proc ::RTL_sim_lib::shard_tests {tests shard} {
+  variable python_cmd
+  variable timing_db_script
+
+  lassign $shard shard_index shard_count shard_epoch
+  set timing_db .rtl_timing.db
+  if {[info exists ::env(RTL_TIMING_DB)]} {
+    set timing_db $::env(RTL_TIMING_DB)
+  }
+
+  if {$shard_epoch != "" && [file exists $timing_db]} {
+    set selected [exec {*}$python_cmd $timing_db_script shard --before $shard_epoch $shard_index $shard_count {*}$tests]
+  } else {
+    set selected {}
+    foreach testno $tests {
+      if {[RTL_sim_lib::shard_of $testno $shard_count] == $shard_index} {
+        lappend selected $testno
+      }
+    }
+  }
+  set shard_list {}
+  foreach testno $tests {
+    if {[lsearch -exact $selected $testno] >= 0} {
+      lappend shard_list $testno
+    }
+  }
+  puts "RTLSIMLIB: Shard $shard_index/$shard_count runs [llength $shard_list] of [llength $tests] tests: $shard_list"
+  return $shard_list
+}
+
+
+#
+# Brief:
+#   Hash based shard (1 based) of a test. Matches shard_of in
+#   rtl_timing_db.py.
+#
+proc ::RTL_sim_lib::shard_of {testno shard_count} {
+  return [expr {(("0x[string range [RTL_sim_lib::md5_hex $testno] 0 7]" + 0) % $shard_count) + 1}]
+}
+
+
+#
+# Brief:
+#   Writes the outcome of the tests run so far to a shard result file.
+#
+# Parameter [Input]: file_name
+#   JSON file to write, e.g. shard_1_of_4.json.
+#
+# Parameter [Input]: shard
+#   List {K N EPOCH}, see ::RTL_sim_lib::shard_tests.
+#
+# Parameter [Input]: tests
+#   Tests assigned to the shard. Tests without a result are reported as not
+#   run.
+#
+# Parameter [Input]: all_tests
+#   All tests discovered before sharding, lets rtl_shard_merge.py report
+#   tests that no shard ran.
+#
+proc ::RTL_sim_lib::write_shard_results {file_name shard tests all_tests} {
+  variable test_results
+
+  lassign $shard shard_index shard_count shard_epoch
+  set entries {}
+  foreach testno $tests {
+    if {[dict exists $test_results $testno]} {
+      set result [dict get $test_results $testno]
+    } else {
+      set result [dict create tb_entity {} status notrun reason {} seconds 0 cached 0]
+    }
+    lappend entries [format {    {"test": %s, "tb_entity": %s, "status": %s, "reason": %s, "seconds": %s, "cached": %s}} \
+      [RTL_sim_lib::json_string $testno] \
+      [RTL_sim_lib::json_string [dict get $result tb_entity]] \
+      [RTL_sim_lib::json_string [dict get $result status]] \
+      [RTL_sim_lib::json_string [dict get $result reason]] \
+      [dict get $result seconds] \
+      [expr {[dict get $result cached] ? "true" : "false"}]]
+  }
+  set test_names {}
+  foreach testno [lsort $all_tests] {
+    lappend test_names [RTL_sim_lib::json_string $testno]
+  }
+  set fh [open $file_name w]
+  puts $fh "{"
+  puts $fh "  \"shard\": $shard_index,"
+  puts $fh "  \"shards\": $shard_count,"
+  puts $fh "  \"epoch\": [expr {$shard_epoch != "" ? $shard_epoch : "null"}],"
+  puts $fh "  \"host\": [RTL_sim_lib::json_string [info hostname]],"
+  puts $fh "  \"sim_dir\": [RTL_sim_lib::json_string [pwd]],"
+  puts $fh "  \"finished\": [clock seconds],"
+  puts $fh "  \"tests\": \[[join $test_names {, }]\],"
+  puts $fh "  \"results\": \["
+  puts $fh [join $entries ",\n"]
+  puts $fh "  \]"
+  puts $fh "}"
+  close $fh
+  puts "RTLSIMLIB: Shard results written to $file_name"
+}
+
+
+#
+# Brief:
+#   Quotes a string as a JSON string literal.
+#
+proc ::RTL_sim_lib::json_string {text} {
+  set text [string map [list \\ \\\\ \" \\\" \n \\n \r \\r \t \\t] $text]
+  return "\"[regsub -all {[\x00-\x1f]} $text {}]\""
+}
+
+
+#
+# Brief:
+#   Records the duration of a phase in the regression timing database.
+#
+# Parameter [Input]: test
+#   Test identifier, or test bench name for the build and compile phases.
+#
+# Parameter [Input]: phase
+#   Phase name, e.g. build, compile, sim, verify, after_all.
+#
+# Parameter [Input]: seconds
+#   Wall time of the phase.
+#
+# Parameter [Input]: status (optional)
+#   Outcome of the phase, pass, fail or hung. Regression reports and the
+#   'adaptive' limits only use passing runs.
+#
+# Parameter [Input]: transcript (optional)
+#   Transcript of a simulation. The figures of its RTLTIMING line, if any,
+#   are recorded with the phase, and its verdict (see
+#   ::RTL_sim_lib::transcript_verdict) overrides a pass status.
+#
+# Remarks:
+#   Only records with the 'timing' command line option. A failure to record
+#   is reported but never fails the run.
+#
+# Usage:
+#   RTL_sim_lib::record_timing 100_8k sim 12.5 pass simulation_100_8k.log
+#
+proc ::RTL_sim_lib::record_timing {test phase seconds {status pass} {transcript {}}} {
+  variable sim_options
+  variable python_cmd
+  variable timing_db_script
+
+  if {![info exists sim_options] || ![dict exists $sim_options timing]} {
+    return
+  }
+  if {$status == "pass" && $transcript != "" && [file exists $transcript]} {
+    set status [expr {[RTL_sim_lib::transcript_verdict $transcript] == "pass" ? "pass" : "fail"}]
+  }
+  set record_cmd [list {*}$python_cmd $timing_db_script record --test $test --phase $phase --wall $seconds --status $status]
+  if {$transcript != "" && [file exists $transcript]} {
+    lappend record_cmd --transcript $transcript
+  }
+  if {[catch {exec {*}$record_cmd} err_msg]} {
+    puts "RTLSIMLIB: WARNING: Could not record the timing of $phase $test: $err_msg"
+  }
+}
+
+
+#
+# Brief:
+#   Computes the input fingerprint of a test for the result cache.
+#
+# Parameter [Input]: testno
+#   Test identifier.
+#
+# Parameter [Input]: tb_entity
+#   Test bench entity the test runs on.
+#
+# Parameter [Input]: parameters
+#   Generic value pairs of the test.
+#
+# Parameter [Input]: sim_resolution
+#   Simulation time resolution of the test.
+#
+# Parameter [Input]: tb_options
+#   Additional options of the simulation command.
+#
+# Parameter [Input]: params
+#   run_tests parameter dictionary (before_sim_commands, after_sim_commands,
+#   cache_inputs).
+#
+# Returns:
+#   MD5 hex digest of all inputs of the test.
+#
+# Remarks:
+#   The compiled working library is fingerprinted by path, size and
+#   modification time of its files, since it is too large to hash on every
+#   run. Only declared inputs are hashed by content: cache_test_inputs of the
+#   test folder, cache_common_inputs of the common folder, pysim_rules.xml
+#   and the files matching cache_inputs. Everything else in those folders may
+#   be written by the run itself (generated stimulus, bench_result.json,
+#   logs) and would change the fingerprint on every run.
+#
+proc ::RTL_sim_lib::test_fingerprint {testno tb_entity parameters sim_resolution tb_options params} {
+  global working_library_folder
+  variable sim_options
+  variable cache_test_inputs
+  variable cache_common_inputs
+
+  set inputs [list tb_entity $tb_entity parameters $parameters \
+                   resolution $sim_resolution options $tb_options]
+  if {[dict exists $sim_options runfor]} {
+    lappend inputs runfor [dict get $sim_options runfor]
+  }
+  foreach hooks {before_sim_commands after_sim_commands} {
+    if {[dict exists $params $hooks $testno]} {
+      lappend inputs $hooks [dict get $params $hooks $testno]
+    }
+  }
+
+  if {[file isdirectory $working_library_folder]} {
+    foreach item [lsort -unique [RTL_sim_lib::ls_recurse $working_library_folder]] {
+      if {[file isfile $item]} {
+        lappend inputs $item [file size $item] [file mtime $item]
+      }
+    }
+  }
+
+  set patterns pysim_rules.xml
+  foreach pattern $cache_test_inputs {
+    lappend patterns [file join $testno $pattern]
+  }
+  foreach pattern $cache_common_inputs {
+    lappend patterns [file join common $pattern]
+  }
+  if {[dict exists $params cache_inputs]} {
+    lappend patterns {*}[dict get $params cache_inputs]
+  }
+  set files {}
+  foreach pattern $patterns {
+    lappend files {*}[glob -nocomplain -type f -- $pattern]
+  }
+  foreach item [lsort -unique $files] {
+    set fh [open $item r]
+    fconfigure $fh -translation binary
+    lappend inputs $item [RTL_sim_lib::md5_hex [read $fh]]
+    close $fh
+  }
+  return [RTL_sim_lib::md5_hex $inputs]
+}
+
+
+#
+# Brief:
+#   MD5 hex digest of a string.
+#
+# Remarks:
+#   tcllib md5 2.x returns a binary digest unless -hex is given; the bundled
+#   md5 1.x only takes the message and returns hex.
+#
+proc ::RTL_sim_lib::md5_hex {data} {
+  if {[catch {md5::md5 -hex -- $data} digest]} {
+    set digest [md5::md5 $data]
+  }
+  return [string tolower $digest]
+}
+
+
+#
+# Brief:
+#   Derives the verdict of a test from its transcript.
+#
+# Parameter [Input]: log_file
+#   Transcript of the test.
+#
+# Parameter [Input]: rules_file (optional)
+#   pysim rules file. Its must_have and cant_have rules are applied to the
+#   transcript. Without rules file, 'failure:' and 'error:' fail the test.
+#
+# Returns:
+#   "pass", or "fail: <reason>".
+#
+# Remarks:
+#   This is a conservative stand-in for pysim: cant_have rules match case
+#   insensitive and every must_have rule has to match a line of the
+#   transcript. It is used to decide whether a result may be cached, a test
+#   failing here is simply simulated again next time.
+#
+proc ::RTL_sim_lib::transcript_verdict {log_file {rules_file pysim_rules.xml}} {
+  set must_have {}
+  set cant_have [list r {failure\s*:} r {error\s*:}]
+  if {[file exists $rules_file]} {
+    set cant_have {}
+    set fh [open $rules_file r]
+    while {[gets $fh line] >= 0} {
+      if {[regexp -- {<(must_have|cant_have)[^>]*>\s*([rg])'(.*)'\s*</} $line match kind type rule]} {
+        lappend $kind $type $rule
+      }
+    }
+    close $fh
+  }
+
+  if {![file exists $log_file]} {
+    return "fail: $log_file does not exist"
+  }
+  set pending $must_have
+  set fh [open $log_file r]
+  while {[gets $fh line] >= 0} {
+    foreach {type rule} $cant_have {
+      if {($type == "r" && [regexp -nocase -- $rule $line]) ||
+          ($type == "g" && [string match -nocase $rule $line])} {
+        close $fh
+        return "fail: $line"
+      }
+    }
+    set still_pending {}
+    foreach {type rule} $pending {
+      if {!(($type == "r" && [regexp -- $rule $line]) ||
+            ($type == "g" && [string match $rule $line]))} {
+        lappend still_pending $type $rule
+      }
+    }
+    set pending $still_pending
+  }
+  close $fh
+  if {[llength $pending]} {
+    return "fail: missing [lindex $pending 1]"
+  }
+  return pass
+}
+
+
+#
+# Brief:
+#   Files of a test restored on a cache hit, relative to the sim folder.
+#
+proc ::RTL_sim_lib::cache_artifacts {testno} {
+  variable is_aldec
+
+  if {$is_aldec} {
+    return [list simulation_$testno.log coverage/test_$testno.acdb]
+  }
+  return [list simulation_$testno.log coverage/test_$testno.ucdb]
+}
+
+
+#
+# Brief:
+#   Looks up a test in the result cache.
+#
+# Parameter [Input]: testno
+#   Test identifier.
+#
+# Parameter [Input]: fingerprint
+#   Current input fingerprint of the test.
+#
+# Returns:
+#   1 if the test passed before with the same fingerprint. Its transcript and
+#   coverage database are restored then. 0 otherwise.
+#
+proc ::RTL_sim_lib::cache_lookup {testno fingerprint} {
+  variable cache_folder
+
+  set entry [file join $cache_folder $testno]
+  if {![file exists $entry/fingerprint] || ![file exists $entry/verdict]} {
+    return 0
+  }
+  set fh [open $entry/fingerprint r]
+  set cached_fingerprint [string trim [read $fh]]
+  close $fh
+  set fh [open $entry/verdict r]
+  set verdict [string trim [read $fh]]
+  close $fh
+  if {$cached_fingerprint != $fingerprint || $verdict != "pass"} {
+    return 0
+  }
+  foreach item [RTL_sim_lib::cache_artifacts $testno] {
+    if {[file exists $entry/$item]} {
+      file mkdir [file dirname $item]
+      file copy -force $entry/$item $item
+    }
+  }
+  return 1
+}
+
+
+#
+# Brief:
+#   Stores the result of a test in the result cache.
+#
+# Parameter [Input]: testno
+#   Test identifier.
+#
+# Parameter [Input]: fingerprint
+#   Input fingerprint of the test, as computed before its simulation.
+#
+# Parameter [Input]: verdict
+#   Final verdict of the test, "pass" or the reason it failed, was stopped
+#   early or hung.
+#
+# Remarks:
+#   Only passing results are stored. A failing or stopped test removes its
+#   entry so that it is always simulated again.
+#
+proc ::RTL_sim_lib::cache_store {testno fingerprint verdict} {
+  variable cache_folder
+
+  set entry [file join $cache_folder $testno]
+  file delete -force $entry
+  if {$verdict != "pass"} {
+    puts "RTLSIMLIB: Test $testno not cached ($verdict)."
+    return
+  }
+  foreach item [RTL_sim_lib::cache_artifacts $testno] {
+    if {[file exists $item]} {
+      file mkdir [file dirname $entry/$item]
+      file copy -force $item $entry/$item
+    }
+  }
+  set fh [open $entry/verdict w]
+  puts $fh $verdict
+  close $fh
+  # The fingerprint goes last, an interrupted store is a cache miss.
+  set fh [open $entry/fingerprint w]
+  puts $fh $fingerprint
+  close $fh
+}
+
+
+#
+# Brief:
+#   Resolves the named wave list to log for a test.
+#
+# Parameter [Input]: testno
+#   Test identifier.
+#
+# Parameter [Input]: params
+#   run_tests parameter dictionary (wave_lists, test_wave_lists,
+#   default_wave_list).
+#
+# Return:
+#   Two element list {name signals}, or an empty list if no named list
+#   applies because the command line selects what to log or no lists exist.
+#
+proc ::RTL_sim_lib::test_wave_list {testno params} {
+  variable sim_options
+
+  if {![dict exists $params wave_lists]} {
+    return {}
+  }
+  if {[info exists sim_options]} {
+    foreach option {loglist logunits loguuts logrecursive} {
+      if {[dict exists $sim_options $option]} {
+        return {}
+      }
+    }
+  }
+  set wave_lists [dict get $params wave_lists]
+  if {[dict exists $params test_wave_lists] && [dict exists [dict get $params test_wave_lists] $testno]} {
+    set list_name [dict get [dict get $params test_wave_lists] $testno]
+  } elseif {[dict exists $params default_wave_list]} {
+    set list_name [dict get $params default_wave_list]
+  } else {
+    return {}
+  }
+  if {![dict exists $wave_lists $list_name]} {
+    puts "RTLSIMLIB: WARNING: No wave list named '$list_name' for test $testno, using defaults."
+    return {}
+  }
+  puts "RTLSIMLIB: Using wave list '$list_name' for test $testno."
+  return [list $list_name [dict get $wave_lists $list_name]]
+}
+
 #
 # Brief:
 #   Sets up the list of signals to log.
@@ -1376,6 +2374,10 @@ proc ::RTL_sim_lib::run_tests {params} {
 #   TCL list containing all the signals to add to the waveform viewer or log
 #   to the waveform database. The default setting is to log "-port uut/*"
 #
+# Parameter [Input]: named_list (optional)
+#   Set when wave_list is a named list selected for the test. Only its signals
+#   are logged then, without the default UUT ports.
+#
 # Usage:
 #   RTL_sim_lib::log_signal_wave $component_signals_list
 #
@@ -1385,7 +2387,7 @@ proc ::RTL_sim_lib::run_tests {params} {
 #   specified via ::RTL_sim_lib::sim_options. If no options are specified, the
 #   default is to only log the entity ports.
 #
-proc ::RTL_sim_lib::log_signal_wave {{wave_list {}}} {
+proc ::RTL_sim_lib::log_signal_wave {{wave_list {}} {named_list 0}} {
   variable is_aldec
   variable is_aldec_vsimsa
   variable is_aldec_gui
@@ -1411,7 +2413,7 @@ proc ::RTL_sim_lib::log_signal_wave {{wave_list {}}} {
   }
 
 
-  if {[info exists sim_options]} {
+  if {[info exists sim_options] && !$named_list} {
     # By default assume the UUT is named "uut", modify it if necessary.
     set instance_list uut
     if {[dict exists $sim_options logunits]} {
@@ -1521,9 +2523,14 @@ proc ::RTL_sim_lib::exec_cmd_dictionary {command_dictionary msg_string log_strin
 #   be successful. Coverage statistics are printed to stdout and recorded in
 #   coverage.result to make statistics available to additional functions.
 #
+#   With the 'cover_jobs' or 'cover_incr' options, ModelSim databases are
+#   merged by rtl_cover_merge.py instead of a single vcover merge.
+#
 proc ::RTL_sim_lib::report_coverage {test_params {simulation_map {}}} {
   variable is_modelsim
   variable sim_options
+  variable python_cmd
+  variable cover_merge_script
 
   # If multiple test benches exists, then the acdb merge command requires some
   # replacements. Create a reverse lookup of the simulation map.
@@ -1554,13 +2561,29 @@ proc ::RTL_sim_lib::report_coverage {test_params {simulation_map {}}} {
   }
 
   if ($is_modelsim) {
-    # Set the vcover merge command.
-    set vcover_merge_cmd "vcover merge coverage/final.ucdb"
-    dict for {testkey testValue} $test_params {
-      append vcover_merge_cmd " coverage/test_${testkey}.ucdb"
-    }
+    if {[dict exists $sim_options cover_jobs] || [dict exists $sim_options cover_incr]} {
+      # Tree merge with parallel vcover processes, see rtl_cover_merge.py.
+      set vcover_merge_cmd [list {*}$python_cmd $cover_merge_script \
+        --output coverage/final.ucdb --summary coverage/summary.json]
+      if {[dict exists $sim_options cover_jobs]} {
+        lappend vcover_merge_cmd --jobs [dict get $sim_options cover_jobs]
+      }
+      if {[dict exists $sim_options cover_incr]} {
+        lappend vcover_merge_cmd --incremental
+      }
+      dict for {testkey testValue} $test_params {
+        lappend vcover_merge_cmd coverage/test_${testkey}.ucdb
+      }
+      puts [exec {*}$vcover_merge_cmd]
+    } else {
+      # Set the vcover merge command.
+      set vcover_merge_cmd "vcover merge coverage/final.ucdb"
+      dict for {testkey testValue} $test_params {
+        append vcover_merge_cmd " coverage/test_${testkey}.ucdb"
+      }
 
-    eval $vcover_merge_cmd
+      eval $vcover_merge_cmd
+    }
     vcover report -details -html -htmldir coverage_files -code bces -verbose -source coverage/final.ucdb
     vcover report -details -code bces -file coverage.txt coverage/final.ucdb
     vcover report -details -zeros -code bces -file coverage_misses.txt coverage/final.ucdb
@@ -1724,8 +2747,26 @@ proc ::RTL_sim_lib::report_coverage {test_params {simulation_map {}}} {
 proc ::RTL_sim_lib::clean {trash_list} {
   variable is_aldec
   variable is_clearcase
-
-  catch {eval file delete -force -- $trash_list}
+  variable python_cmd
+  variable clean_script
+  variable parallel_clean_min
+
+  # Items inside directories that are removed anyway need no work.
+  set trash_list [RTL_sim_lib::prune_nested $trash_list]
+
+  # Large lists are removed by parallel workers, see rtl_clean.py.
+  set cleaned 0
+  if {[llength $trash_list] >= $parallel_clean_min} {
+    set list_file [file join [pwd] .clean_list]
+    set fh [open $list_file w]
+    puts $fh [join $trash_list "\n"]
+    close $fh
+    set cleaned [expr {![catch {exec {*}$python_cmd $clean_script $list_file}]}]
+    file delete $list_file
+  }
+  if {!$cleaned} {
+    catch {file delete -force -- {*}$trash_list}
+  }
   puts "RTLSIMLIB: files removed:"
   foreach item $trash_list {
     puts "  $item"
@@ -1751,6 +2792,40 @@ proc ::RTL_sim_lib::clean {trash_list} {
 }
 
 
+#
+# Brief:
+#   Removes the items of a list that are inside a directory of the list.
+#
+# Parameter [Input]: trash_list
+#   List of files and directories.
+#
+# Returns:
+#   The remaining items, in their original order.
+#
+proc ::RTL_sim_lib::prune_nested {trash_list} {
+  set listed [dict create]
+  foreach item $trash_list {
+    dict set listed $item 1
+  }
+  set pruned {}
+  foreach item $trash_list {
+    set parent [file dirname $item]
+    set nested 0
+    while {$parent != [file dirname $parent]} {
+      if {[dict exists $listed $parent]} {
+        set nested 1
+        break
+      }
+      set parent [file dirname $parent]
+    }
+    if {!$nested} {
+      lappend pruned $item
+    }
+  }
+  return $pruned
+}
+
+
 #
 # Brief:
 #   List the directory's files recursively.
@@ -1807,15 +2882,80 @@ proc ::RTL_sim_lib::ls_recurse {start_dir {ls_mode depth}} {
 #   RTL_sim_lib::ls_recurse $new_list $original_list
 #
 proc ::RTL_sim_lib::lsubtract {new_list original_list} {
+  # Hash lookups instead of lsearch, linear in the lengths of both lists.
+  set original [dict create]
+  foreach item $original_list {
+    dict set original $item 1
+  }
   set ldiff {}
   foreach item $new_list {
-    if {[lsearch $original_list $item] < 0} {
+    if {![dict exists $original $item]} {
       lappend ldiff $item
     }
   }
   return $ldiff
 }
 
+
+#
+# Brief:
+#   Snapshot of a directory tree in a single pass.
+#
+# Parameter [Input]: start_dir
+#   Root of the tree.
+#
+# Parameter [Input]: skip (optional)
+#   List of glob patterns, relative to start_dir, of subtrees that are not
+#   listed at all (e.g. static sources).
+#
+# Parameter [Input]: known (optional)
+#   Previous manifest. Directories it does not contain are new: they are
+#   listed but not descended into, their contents are new as a whole.
+#
+# Parameter [Input]: prune (optional)
+#   Dictionary of directories that are listed but not descended into.
+#
+# Returns:
+#   Manifest dictionary: path -> {size mtime} for files, path -> dir for
+#   directories.
+#
+# Usage:
+#   RTL_sim_lib::manifest_snapshot .. $RTL_sim_lib::static_subtrees
+#
+proc ::RTL_sim_lib::manifest_snapshot {start_dir {skip {}} {known {}} {prune {}}} {
+  set skip_paths {}
+  foreach pattern $skip {
+    lappend skip_paths [file join $start_dir $pattern]
+  }
+  set manifest [dict create]
+  set pending [list $start_dir]
+  while {[llength $pending]} {
+    set pending [lassign $pending dir]
+    foreach item [glob -nocomplain -directory $dir *] {
+      set skipped 0
+      foreach pattern $skip_paths {
+        if {[string match $pattern $item]} {
+          set skipped 1
+          break
+        }
+      }
+      if {$skipped} {
+        continue
+      }
+      if {[file isdirectory $item]} {
+        dict set manifest $item dir
+        if {![dict exists $prune $item] &&
+            ([dict size $known] == 0 || [dict exists $known $item])} {
+          lappend pending $item
+        }
+      } elseif {![catch {file stat $item info}]} {
+        dict set manifest $item [list $info(size) $info(mtime)]
+      }
+    }
+  }
+  return $manifest
+}
+
 #
 # Brief:
 #   Update the garbage tracking dictionary.
@@ -1823,7 +2963,9 @@ proc ::RTL_sim_lib::lsubtract {new_list original_list} {
 # Parameter [Input]: tracker
 #   Dictionary to track the contents of a directory. The dictionary must have
 #   two entries:
-#     contents  - Lists the contents of the directory being tracked.
+#     manifest  - Manifest of the directory being tracked, see
+#                 ::RTL_sim_lib::manifest_snapshot. Alternatively 'contents',
+#                 a plain listing as returned by ::RTL_sim_lib::ls_recurse.
 #     garbage   - Lists the files and directories that are considered garbage.
 #
 # Returns:
@@ -1838,15 +2980,39 @@ proc ::RTL_sim_lib::lsubtract {new_list original_list} {
 #   how this proc is called. Also, I couldn't make upvar work!
 #
 proc ::RTL_sim_lib::update_garbage {tracker} {
-  set old_contents [dict get $tracker contents]
-  # Update the contents in the tracker.
-  set new_contents [RTL_sim_lib::ls_recurse ..]
-  dict set tracker contents $new_contents
-  foreach item [RTL_sim_lib::lsubtract $new_contents $old_contents] {
-    if {[lsearch [dict get $tracker garbage] $item] < 0} {
+  variable static_subtrees
+
+  set garbage [dict create]
+  foreach item [dict get $tracker garbage] {
+    dict set garbage $item 1
+  }
+
+  if {![dict exists $tracker manifest]} {
+    # Plain listing in 'contents'.
+    set old_contents [dict get $tracker contents]
+    set new_contents [RTL_sim_lib::ls_recurse ..]
+    dict set tracker contents $new_contents
+    foreach item [RTL_sim_lib::lsubtract $new_contents $old_contents] {
+      if {![dict exists $garbage $item]} {
+        dict set garbage $item 1
+        dict lappend tracker garbage $item
+      }
+    }
+    return $tracker
+  }
+
+  # Anything not in the previous manifest is garbage. New directories and
+  # directories already known as garbage are not descended into, they are
+  # cleaned as a whole.
+  set old_manifest [dict get $tracker manifest]
+  set new_manifest [RTL_sim_lib::manifest_snapshot .. $static_subtrees $old_manifest $garbage]
+  dict for {item info} $new_manifest {
+    if {![dict exists $old_manifest $item] && ![dict exists $garbage $item]} {
+      dict set garbage $item 1
       dict lappend tracker garbage $item
     }
   }
+  dict set tracker manifest $new_manifest
   return $tracker
 }
 
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+"""Parallel removal of the files and directories listed in a file.
+
+Used by RTL_sim_lib::clean for large garbage lists. Deleting tens of
+thousands of WLF, log and stimulus files is dominated by file system round
+trips, especially on network shares, so several workers remove items
+concurrently.
+
+Usage:
+    py -3 rtl_clean.py [--jobs N] <list file, one path per line>
+"""
+import os
+import sys
+import shutil
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+DEFAULT_JOBS = 16
+
+
+def remove(path: str) -> Optional[str]:
+    """Remove a file or directory tree
+
+    Returns:
+        Error message, None on success or if the path does not exist
+    """
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.remove(path)
+    except OSError as err:
+        return f"{path}: {err}"
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Parallel clean")
+    parser.add_argument('list_file')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS)
+    args = parser.parse_args(argv)
+
+    with open(args.list_file) as list_file:
+        paths = [line.rstrip("\n") for line in list_file if line.strip()]
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        errors = [err for err in pool.map(remove, paths) if err]
+    for err in errors:
+        print(f"RTLCLEAN: Could not remove {err}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+"""Parallel coverage merge for ModelSim UCDBs.
+
+The per-test databases are merged as a tree. Each level merges groups of
+FANIN databases with one 'vcover merge' process per group, and up to JOBS
+processes run at a time. This replaces the single serial merge of all tests.
+
+With --incremental, the merged result is kept as a base, together with a
+manifest of the test databases it contains. The next run only merges the
+new tests into the base. If a test that was already merged changed or
+disappeared, the base is rebuilt.
+
+With --summary, per-test statement/branch/condition/expression coverage is
+written as JSON. Summaries of unchanged databases come from the manifest.
+
+Usage (see RTL_sim_lib::report_coverage, options 'cover_jobs' and
+'cover_incr'):
+    py -3 rtl_cover_merge.py --output coverage/final.ucdb --jobs 8 \\
+        [--incremental] [--summary coverage/summary.json] coverage/test_*.ucdb
+"""
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Optional
+
+FANIN = 8
+# Coverage report lines, as parsed by RTL_sim_lib::report_coverage. Values are
+# the columns holding the total and covered counts.
+SUMMARY_RE = {
+    "stmts": (re.compile(r"Stmts\s+\d+\s+\d+\s+\d+", re.I), 1, 2),
+    "branches": (re.compile(r"Branches\s+\d+\s+\d+\s+\d+", re.I), 1, 2),
+    "conditions": (re.compile(r"FEC Condition Terms\s+\d+\s+\d+\s+\d+", re.I),
+                   3, 4),
+    "expressions": (re.compile(r"FEC Expression Terms\s+\d+\s+\d+\s+\d+",
+                               re.I), 3, 4),
+}
+
+
+def stamp(path: str) -> List[int]:
+    info = os.stat(path)
+    return [info.st_size, info.st_mtime_ns]
+
+
+def vcover_merge(vcover: str, output: str, inputs: List[str]) -> str:
+    subprocess.run([vcover, "merge", output] + inputs, check=True,
+                   stdout=subprocess.DEVNULL)
+    return output
+
+
+def tree_merge(vcover: str, inputs: List[str], output: str, work_dir: str,
+               jobs: int, fanin: int = FANIN) -> None:
+    """Merge inputs into output, fanin databases per vcover process and up
+    to jobs processes in parallel per tree level"""
+    if len(inputs) == 1:
+        shutil.copyfile(inputs[0], output)
+        return
+    os.makedirs(work_dir, exist_ok=True)
+    level = 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while len(inputs) > fanin:
+            groups = [inputs[i:i + fanin]
+                      for i in range(0, len(inputs), fanin)]
+            futures = [pool.submit(vcover_merge, vcover, os.path.join(
+                work_dir, f"level{level}_{n}.ucdb"), group)
+                for n, group in enumerate(groups) if len(group) > 1]
+            merged = iter(future.result() for future in futures)
+            inputs = [group[0] if len(group) == 1 else next(merged)
+                      for group in groups]
+            level += 1
+    vcover_merge(vcover, output, inputs)
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_summary(vcover: str, ucdb: str) -> Dict[str, Dict[str, float]]:
+    """Coverage totals of one database"""
+    report = subprocess.run([vcover, "report", "-details", "-code", "bces",
+                             ucdb], check=True, capture_output=True,
+                            text=True).stdout
+    summary = {name: {"total": 0, "covered": 0} for name in SUMMARY_RE}
+    for line in report.splitlines():
+        for name, (pattern, total_col, covered_col) in SUMMARY_RE.items():
+            if pattern.search(line):
+                columns = line.split()
+                summary[name]["total"] += int(columns[total_col])
+                summary[name]["covered"] += int(columns[covered_col])
+    for entry in summary.values():
+        entry["percent"] = 100.0 * entry["covered"] / entry["total"] \
+            if entry["total"] else 100.0
+    return summary
+
+
+def load_manifest(path: str) -> Dict:
+    if os.path.exists(path):
+        with open(path) as manifest:
+            return json.load(manifest)
+    return {"merged": {}, "summaries": {}}
+
+
+def merge(inputs: List[str], output: str, jobs: int, vcover: str = "vcover",
+          incremental: bool = False, base: str = None,
+          summary: str = None) -> Tuple[str, int]:
+    """Merge the test databases into output
+
+    Returns:
+        Merge mode ("full", "incremental" or "unchanged") and the number of
+        databases merged
+    """
+    out_dir = os.path.dirname(output) or "."
+    base = base or os.path.join(out_dir, "merged_base.ucdb")
+    manifest_path = base + ".json"
+    manifest = load_manifest(manifest_path)
+    stamps = {path: stamp(path) for path in inputs}
+    work_dir = os.path.join(out_dir, ".merge")
+
+    merged = manifest["merged"]
+    reusable = incremental and os.path.exists(base) and merged and \
+        all(stamps.get(path) == value for path, value in merged.items())
+    if reusable:
+        new = [path for path in inputs if path not in merged]
+        if new:
+            mode = "incremental"
+            tree_merge(vcover, new + [base], output, work_dir, jobs)
+        else:
+            mode = "unchanged"
+            shutil.copyfile(base, output)
+    else:
+        mode, new = "full", list(inputs)
+        tree_merge(vcover, new, output, work_dir, jobs)
+
+    if incremental:
+        shutil.copyfile(output, base)
+        manifest["merged"] = stamps
+
+    if summary:
+        cached = manifest.get("summaries", {})
+        todo = [path for path in inputs
+                if cached.get(path, {}).get("stamp") != stamps[path]]
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            for path, result in zip(todo, pool.map(
+                    lambda x: test_summary(vcover, x), todo)):
+                cached[path] = {"stamp": stamps[path], "coverage": result}
+        manifest["summaries"] = {path: cached[path] for path in inputs}
+        tests = {re.sub(r"^test_", "", os.path.splitext(
+            os.path.basename(path))[0]): cached[path]["coverage"]
+            for path in inputs}
+        with open(summary, "w") as summary_file:
+            json.dump(tests, summary_file, indent=2, sort_keys=True)
+
+    if incremental or summary:
+        with open(manifest_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+    return mode, len(new)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Parallel UCDB merge")
+    parser.add_argument('inputs', nargs='+', help="Per-test UCDB files")
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--incremental', action='store_true',
+                        help="Merge new tests into the saved base")
+    parser.add_argument('--base', help="Base database (default: "
+                        "merged_base.ucdb next to the output)")
+    parser.add_argument('--summary', help="Write per-test coverage JSON")
+    parser.add_argument('--vcover', default="vcover")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.inputs if not os.path.exists(path)]
+    if missing:
+        print(f"RTLCOVER: Missing coverage databases: {' '.join(missing)}",
+              file=sys.stderr)
+        return 1
+    mode, count = merge(args.inputs, args.output, max(1, args.jobs),
+                        args.vcover, args.incremental, args.base,
+                        args.summary)
+    print(f"RTLCOVER: {mode} merge of {count} of {len(args.inputs)} "
+          f"databases into {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+"""Merge the shard result files of a sharded regression.
+
+Each host running RTL_make with 'shard K/N' writes shard_K_of_N.json to its
+sim folder. This script combines those files into one report. It checks
+that all N shards are present, that no test ran in two shards and, from the
+list of all tests each file carries, that every test ran in some shard. It
+can also write a combined JSON file and a JUnit XML file for CI.
+
+Usage:
+    py -3 rtl_shard_merge.py shard_*_of_4.json [--junit results.xml]
+        [--json results.json]
+
+Exit status is 0 if every shard is present and every test passed, 1
+otherwise.
+"""
+import os
+import sys
+import json
+import argparse
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Any, Optional
+
+
+def load_shards(paths: List[str]) -> List[Dict[str, Any]]:
+    shards = []
+    for path in paths:
+        with open(path) as shard_file:
+            shard = json.load(shard_file)
+        shard["file"] = path
+        shards.append(shard)
+    return sorted(shards, key=lambda x: x["shard"])
+
+
+def merge(shards: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine shard results
+
+    Returns:
+        dict with the merged results (test name order), the problems found
+        (missing shards, tests run by more than one shard or by none) and
+        counts. Tests no shard ran are listed with status notrun.
+    """
+    problems = []
+    counts = {shard["shards"] for shard in shards}
+    if len(counts) > 1:
+        problems.append(f"Shard files disagree on the shard count: "
+                        f"{sorted(counts)}")
+    count = max(counts) if counts else 0
+    present = {shard["shard"] for shard in shards}
+    missing = sorted(set(range(1, count + 1)) - present)
+    if missing:
+        problems.append(f"Missing shards: {missing}")
+    epochs = {shard.get("epoch") for shard in shards}
+    if len(epochs) > 1:
+        problems.append(f"Shard files disagree on the epoch: "
+                        f"{sorted(epochs, key=str)}")
+    test_lists = {tuple(sorted(shard["tests"])) for shard in shards
+                  if "tests" in shard}
+    if len(test_lists) > 1:
+        problems.append("Shard files disagree on the list of tests")
+
+    results = {}
+    for shard in shards:
+        for result in shard["results"]:
+            result = dict(result, shard=shard["shard"], host=shard["host"])
+            if result["test"] in results:
+                problems.append(f"Test {result['test']} ran in shards "
+                                f"{results[result['test']]['shard']} and "
+                                f"{shard['shard']}")
+            results[result["test"]] = result
+
+    lost = sorted(set().union(*test_lists) - set(results))
+    if lost:
+        problems.append(f"Tests run by no shard: {lost}")
+    for test in lost:
+        results[test] = {"test": test, "tb_entity": "", "status": "notrun",
+                         "reason": "Not run by any shard", "seconds": 0,
+                         "cached": False, "shard": "-", "host": ""}
+
+    totals = {"pass": 0, "fail": 0, "hung": 0, "notrun": 0}
+    for result in results.values():
+        totals[result["status"]] = totals.get(result["status"], 0) + 1
+    return {"shards": count, "problems": problems, "totals": totals,
+            "results": [results[x] for x in sorted(results)]}
+
+
+def junit(merged: Dict[str, Any], suite_name: str) -> ET.ElementTree:
+    results = merged["results"]
+    suite = ET.Element("testsuite", {
+        "name": suite_name,
+        "tests": str(len(results)),
+        "failures": str(merged["totals"].get("fail", 0) +
+                        merged["totals"].get("hung", 0)),
+        "skipped": str(merged["totals"].get("notrun", 0)),
+        "time": f"{sum(x['seconds'] for x in results):.3f}"})
+    for result in results:
+        case = ET.SubElement(suite, "testcase", {
+            "classname": result["tb_entity"] or suite_name,
+            "name": result["test"],
+            "time": f"{result['seconds']:.3f}"})
+        properties = ET.SubElement(case, "properties")
+        for name in ("shard", "host", "cached"):
+            ET.SubElement(properties, "property",
+                          {"name": name, "value": str(result[name])})
+        if result["status"] in ("fail", "hung"):
+            ET.SubElement(case, "failure",
+                          {"message": result["reason"],
+                           "type": result["status"]}).text = result["reason"]
+        elif result["status"] == "notrun":
+            ET.SubElement(case, "skipped",
+                          {"message": "Not run by its shard"})
+    for problem in merged["problems"]:
+        case = ET.SubElement(suite, "testcase", {"classname": suite_name,
+                                                 "name": "shard_merge"})
+        ET.SubElement(case, "error", {"message": problem})
+    root = ET.Element("testsuites")
+    root.append(suite)
+    return ET.ElementTree(root)
+
+
+def format_summary(merged: Dict[str, Any]) -> str:
+    lines = [f"{'test':<20}{'status':<8}{'shard':>6}  {'host':<16}"
+             f"{'seconds':>10}"]
+    for result in merged["results"]:
+        status = result["status"] + ("*" if result["cached"] else "")
+        lines.append(f"{result['test']:<20}{status:<8}{result['shard']:>6}  "
+                     f"{result['host']:<16}{result['seconds']:>10.1f}")
+        if result["status"] in ("fail", "hung"):
+            lines.append(f"    {result['reason']}")
+    totals = merged["totals"]
+    lines.append(f"{len(merged['results'])} tests in {merged['shards']} "
+                 f"shards: {totals.get('pass', 0)} passed, "
+                 f"{totals.get('fail', 0)} failed, "
+                 f"{totals.get('hung', 0)} hung, "
+                 f"{totals.get('notrun', 0)} not run (* cached)")
+    lines += [f"ERROR: {problem}" for problem in merged["problems"]]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Merge shard result files")
+    parser.add_argument('files', nargs='+', help="shard_K_of_N.json files")
+    parser.add_argument('--junit', help="Write a JUnit XML report")
+    parser.add_argument('--json', help="Write the merged results as JSON")
+    parser.add_argument('--name', default=None,
+                        help="Test suite name (default: sim folder name)")
+    args = parser.parse_args(argv)
+
+    shards = load_shards(args.files)
+    merged = merge(shards)
+    print(format_summary(merged))
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(merged, json_file, indent=2)
+    if args.junit:
+        name = args.name or (os.path.basename(os.path.dirname(
+            shards[0]["sim_dir"].rstrip("/"))) if shards else "rtl_make")
+        junit(merged, name).write(args.junit, encoding="utf-8",
+                                  xml_declaration=True)
+    failed = merged["problems"] or merged["totals"].get("fail") or \
+        merged["totals"].get("hung") or merged["totals"].get("notrun")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
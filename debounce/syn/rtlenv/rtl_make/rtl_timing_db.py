@@ -0,0 +1,408 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+"""Regression timing database.
+
+Keeps the wall time of every RTL_make phase (build, compile, sim, verify,
+after_all) per test and per commit in a local SQLite file. For simulations,
+the figures the TCON script printed to the transcript are stored too:
+simulated time, words transferred, driver wall time and throughput. See
+print_timing() in common.py.
+
+RTL_sim_lib records into the database when RTL_make runs with the 'timing'
+option. The report command compares a commit against a baseline and exits
+with 1 on regressions. The order command lists tests longest first for
+scheduling, and the shard command splits tests into balanced shards for
+RTL_make's 'shard K/N@EPOCH' option. It only uses runs recorded before
+EPOCH, so hosts that record while others start still agree on the shards. The limits command derives per test wall
+time and simulated time limits from the passing runs for RTL_make's
+'adaptive' option.
+
+Usage:
+    py -3 rtl_timing_db.py record --test 100_8k --phase sim --wall 12.5 \\
+        --transcript simulation_100_8k.log
+    py -3 rtl_timing_db.py report [--baseline <commit>] [--threshold 0.2]
+    py -3 rtl_timing_db.py order [--phase sim] 100_8k 104_128k ...
+    py -3 rtl_timing_db.py shard --before 1760000000 2 4 100_8k 104_128k ...
+    py -3 rtl_timing_db.py history 100_8k
+    py -3 rtl_timing_db.py limits [--factor 3] 100_8k 104_128k ...
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import socket
+import hashlib
+import sqlite3
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Any, Iterable, Optional
+
+# The database lives in the sim folder unless RTL_TIMING_DB points to a shared
+# location (e.g. on the farm)
+DEFAULT_DB = os.environ.get("RTL_TIMING_DB", ".rtl_timing.db")
+# Line printed by the TCON script, see print_timing() in common.py
+TIMING_LINE_RE = re.compile(r"RTLTIMING:\s*(\{.*\})")
+# Simulated time is stored in ns
+TIME_UNITS_NS = {"fs": 1e-6, "ps": 1e-3, "ns": 1.0, "us": 1e3, "ms": 1e6,
+                 "sec": 1e9, "s": 1e9}
+# Number of most recent runs a duration estimate is based on
+HISTORY_DEPTH = 10
+# Number of most recent passing runs the limits of a test are based on
+LIMIT_DEPTH = 50
+# Limits: quantile of the history times factor, at least the floors
+LIMIT_QUANTILE = 0.99
+LIMIT_FACTOR = 3.0
+LIMIT_MIN_WALL_S = 60.0
+LIMIT_MIN_SIM_NS = 1e6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS timings (
+    id          INTEGER PRIMARY KEY,
+    recorded    REAL NOT NULL,
+    commit_id   TEXT NOT NULL,
+    host        TEXT NOT NULL,
+    test        TEXT NOT NULL,
+    phase       TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    wall_s      REAL NOT NULL,
+    driver_s    REAL,
+    sim_time_ns REAL,
+    words       INTEGER,
+    words_per_s REAL
+);
+CREATE INDEX IF NOT EXISTS timings_test ON timings (test, phase, recorded);
+CREATE INDEX IF NOT EXISTS timings_commit ON timings (commit_id, recorded);
+"""
+
+
+def connect(db: str = DEFAULT_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(db, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def current_commit() -> str:
+    """Commit of the working copy: RTL_COMMIT if set, else git HEAD"""
+    if os.environ.get("RTL_COMMIT"):
+        return os.environ["RTL_COMMIT"]
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True,
+                              timeout=10).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def parse_transcript(path: str) -> Dict[str, Any]:
+    """Figures of the last RTLTIMING line of a transcript
+
+    Returns:
+        dict with driver_s, sim_time_ns, words and words_per_s, empty if the
+        TCON script printed no timing line
+    """
+    line = None
+    with open(path, errors="replace") as transcript:
+        for text in transcript:
+            match = TIMING_LINE_RE.search(text)
+            if match:
+                line = match.group(1)
+    if line is None:
+        return {}
+    figures = json.loads(line)
+    result = {"driver_s": figures.get("wall_s"), "words": figures.get("words")}
+    if figures.get("sim_time") is not None:
+        unit = figures.get("sim_unit", "ns")
+        result["sim_time_ns"] = figures["sim_time"] * TIME_UNITS_NS[unit]
+    if result["words"] and result["driver_s"]:
+        result["words_per_s"] = result["words"] / result["driver_s"]
+    return result
+
+
+def record(conn: sqlite3.Connection, test: str, phase: str, wall_s: float,
+           status: str = "pass", transcript: str = None,
+           commit: str = None) -> None:
+    """Store one phase duration"""
+    figures = parse_transcript(transcript) if transcript and \
+        os.path.exists(transcript) else {}
+    with conn:
+        conn.execute(
+            "INSERT INTO timings (recorded, commit_id, host, test, phase, "
+            "status, wall_s, driver_s, sim_time_ns, words, words_per_s) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), commit or current_commit(), socket.gethostname(),
+             test, phase, status, wall_s, figures.get("driver_s"),
+             figures.get("sim_time_ns"), figures.get("words"),
+             figures.get("words_per_s")))
+
+
+def commits(conn: sqlite3.Connection) -> List[str]:
+    """Recorded commits, most recent first"""
+    rows = conn.execute("SELECT commit_id, MAX(recorded) AS last FROM timings "
+                        "GROUP BY commit_id ORDER BY last DESC")
+    return [row["commit_id"] for row in rows]
+
+
+def medians(conn: sqlite3.Connection, commit: str) -> Dict[tuple, Dict]:
+    """Median wall time and throughput per (test, phase) of a commit"""
+    samples = {}
+    for row in conn.execute("SELECT test, phase, wall_s, words_per_s FROM "
+                            "timings WHERE commit_id = ? AND status = 'pass'",
+                            (commit,)):
+        entry = samples.setdefault((row["test"], row["phase"]),
+                                   {"wall_s": [], "words_per_s": []})
+        entry["wall_s"].append(row["wall_s"])
+        if row["words_per_s"]:
+            entry["words_per_s"].append(row["words_per_s"])
+    return {key: {name: statistics.median(values) if values else None
+                  for name, values in entry.items()}
+            for key, entry in samples.items()}
+
+
+def compare(conn: sqlite3.Connection, commit: str = None,
+            baseline: str = None, threshold: float = 0.2) -> List[Dict]:
+    """Compare a commit (default: most recent) against a baseline (default:
+    the commit recorded before it)
+
+    A (test, phase) regresses when its median wall time grew, or its median
+    throughput dropped, by more than threshold.
+    """
+    known = commits(conn)
+    commit = commit or (known[0] if known else None)
+    if baseline is None:
+        older = [x for x in known if x != commit]
+        baseline = older[0] if older else None
+    if commit is None or baseline is None:
+        return []
+    new, old = medians(conn, commit), medians(conn, baseline)
+    rows = []
+    for key in sorted(set(new) & set(old)):
+        wall_ratio = new[key]["wall_s"] / old[key]["wall_s"] \
+            if old[key]["wall_s"] else None
+        tput_ratio = new[key]["words_per_s"] / old[key]["words_per_s"] \
+            if new[key]["words_per_s"] and old[key]["words_per_s"] else None
+        regressed = (wall_ratio is not None and
+                     wall_ratio > 1 + threshold) or \
+                    (tput_ratio is not None and
+                     tput_ratio < 1 / (1 + threshold))
+        rows.append({"test": key[0], "phase": key[1], "commit": commit,
+                     "baseline": baseline, "wall_s": new[key]["wall_s"],
+                     "baseline_wall_s": old[key]["wall_s"],
+                     "wall_ratio": wall_ratio, "throughput_ratio": tput_ratio,
+                     "regressed": regressed})
+    return rows
+
+
+def expected_durations(conn: sqlite3.Connection, tests: Iterable[str],
+                       phase: str = "sim", depth: int = HISTORY_DEPTH,
+                       before: Optional[float] = None) -> Dict[str, float]:
+    """Median wall time of the last depth passing runs of each test, only
+    runs recorded before the epoch before if given. Tests without history
+    are left out."""
+    durations = {}
+    for test in tests:
+        rows = conn.execute("SELECT wall_s FROM timings WHERE test = ? AND "
+                            "phase = ? AND status = 'pass' AND recorded < ? "
+                            "ORDER BY recorded DESC LIMIT ?",
+                            (test, phase, math.inf if before is None
+                             else before, depth)).fetchall()
+        if rows:
+            durations[test] = statistics.median(row["wall_s"] for row in rows)
+    return durations
+
+
+def quantile(values: List[float], fraction: float) -> float:
+    """Nearest rank quantile, the largest value for short histories"""
+    values = sorted(values)
+    rank = min(len(values), max(1, math.ceil(fraction * len(values))))
+    return values[rank - 1]
+
+
+def limits(conn: sqlite3.Connection, tests: Iterable[str],
+           factor: float = LIMIT_FACTOR, fraction: float = LIMIT_QUANTILE,
+           min_wall_s: float = LIMIT_MIN_WALL_S,
+           min_sim_ns: float = LIMIT_MIN_SIM_NS,
+           depth: int = LIMIT_DEPTH) -> Dict[str, Dict[str, float]]:
+    """Wall time and simulated time limits of tests from their last depth
+    passing simulations: the fraction quantile times factor, at least the
+    floors. Tests without history are left out, tests whose TCON script
+    printed no timing line get no sim_ns limit.
+
+    Returns:
+        dict of test to dict with wall_s and sim_ns (None if unknown)
+    """
+    result = {}
+    for test in tests:
+        rows = conn.execute("SELECT wall_s, sim_time_ns FROM timings WHERE "
+                            "test = ? AND phase = 'sim' AND status = 'pass' "
+                            "ORDER BY recorded DESC LIMIT ?",
+                            (test, depth)).fetchall()
+        if not rows:
+            continue
+        sim_ns = [row["sim_time_ns"] for row in rows if row["sim_time_ns"]]
+        result[test] = {
+            "wall_s": max(min_wall_s, factor * quantile(
+                [row["wall_s"] for row in rows], fraction)),
+            "sim_ns": max(min_sim_ns, factor * quantile(sim_ns, fraction))
+                      if sim_ns else None}
+    return result
+
+
+def longest_first(conn: sqlite3.Connection, tests: Iterable[str],
+                  phase: str = "sim") -> List[str]:
+    """Tests ordered by expected duration, longest first. Tests without
+    history go first, in name order, since they may be the longest."""
+    tests = list(tests)
+    durations = expected_durations(conn, tests, phase)
+    unknown = sorted(x for x in tests if x not in durations)
+    return unknown + sorted(durations, key=lambda x: (-durations[x], x))
+
+
+def shard_of(test: str, count: int) -> int:
+    """Hash based shard (1 based) of a test. Matches RTL_sim_lib::shard_of"""
+    return int(hashlib.md5(test.encode()).hexdigest()[:8], 16) % count + 1
+
+
+def partition(conn: sqlite3.Connection, tests: Iterable[str], count: int,
+              phase: str = "sim",
+              before: Optional[float] = None) -> List[List[str]]:
+    """Split tests into count shards of about equal expected duration
+
+    Longest processing time first: tests are taken longest first and each
+    goes to the shard with the least load so far (lowest shard on ties).
+    Tests without history are assumed to take the median of the known tests.
+    Without any history, tests are distributed by shard_of(). The result only
+    depends on the tests and the runs recorded before the epoch before; pass
+    the same past epoch on every host, since runs recorded meanwhile would
+    change the partition.
+    """
+    tests = sorted(set(tests))
+    durations = expected_durations(conn, tests, phase, before=before)
+    shards = [[] for _ in range(count)]
+    if not durations:
+        for test in tests:
+            shards[shard_of(test, count) - 1].append(test)
+        return shards
+    default = statistics.median(durations.values())
+    loads = [0.0] * count
+    for test in sorted(tests, key=lambda x: (-durations.get(x, default), x)):
+        index = min(range(count), key=lambda i: (loads[i], i))
+        shards[index].append(test)
+        loads[index] += durations.get(test, default)
+    return shards
+
+
+def format_report(rows: List[Dict]) -> str:
+    if not rows:
+        return "No common tests between commit and baseline."
+    lines = [f"Commit {rows[0]['commit']} vs baseline {rows[0]['baseline']}",
+             f"  {'test':<16}{'phase':<10}{'wall s':>10}{'base s':>10}"
+             f"{'ratio':>8}{'tput':>8}"]
+    for row in rows:
+        ratio = f"{row['wall_ratio']:.2f}" if row["wall_ratio"] else "-"
+        tput = f"{row['throughput_ratio']:.2f}" \
+            if row["throughput_ratio"] else "-"
+        flag = "  REGRESSION" if row["regressed"] else ""
+        lines.append(f"  {row['test']:<16}{row['phase']:<10}"
+                     f"{row['wall_s']:>10.2f}{row['baseline_wall_s']:>10.2f}"
+                     f"{ratio:>8}{tput:>8}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Regression timing database")
+    parser.add_argument('--db', type=str, default=DEFAULT_DB,
+                        help="SQLite file (default: $RTL_TIMING_DB or "
+                        ".rtl_timing.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="Store one phase duration")
+    rec.add_argument('--test', required=True)
+    rec.add_argument('--phase', required=True)
+    rec.add_argument('--wall', type=float, required=True,
+                     help="Wall time in seconds")
+    rec.add_argument('--status', default="pass")
+    rec.add_argument('--transcript', help="Transcript to take the TCON "
+                     "script's RTLTIMING figures from")
+    rec.add_argument('--commit', help="Default: $RTL_COMMIT or git HEAD")
+
+    rep = commands.add_parser("report", help="Compare a commit against a "
+                              "baseline, exit 1 on regressions")
+    rep.add_argument('--commit')
+    rep.add_argument('--baseline')
+    rep.add_argument('--threshold', type=float, default=0.2,
+                     help="Tolerated relative change (default: 0.2)")
+    rep.add_argument('--json', action='store_true')
+
+    order = commands.add_parser("order", help="Print tests longest first")
+    order.add_argument('--phase', default="sim")
+    order.add_argument('tests', nargs='+')
+
+    shard = commands.add_parser("shard", help="Print the tests of shard K "
+                                "of N")
+    shard.add_argument('index', type=int, help="K, 1 based")
+    shard.add_argument('count', type=int, help="N")
+    shard.add_argument('--phase', default="sim")
+    shard.add_argument('--before', type=float, required=True,
+                       help="Only use runs recorded before this epoch (s), "
+                       "the same on every host")
+    shard.add_argument('tests', nargs='+')
+
+    hist = commands.add_parser("history", help="Recorded runs of a test")
+    hist.add_argument('test')
+    hist.add_argument('--phase', default="sim")
+
+    lim = commands.add_parser("limits", help="Print the wall time and "
+                              "simulated time limit of tests, one "
+                              "'test wall_s sim_ns' line each")
+    lim.add_argument('--factor', type=float, default=LIMIT_FACTOR)
+    lim.add_argument('--quantile', type=float, default=LIMIT_QUANTILE)
+    lim.add_argument('--min-wall', type=float, default=LIMIT_MIN_WALL_S,
+                     help="Floor of the wall time limit in seconds")
+    lim.add_argument('--min-sim-ns', type=float, default=LIMIT_MIN_SIM_NS,
+                     help="Floor of the simulated time limit in ns")
+    lim.add_argument('tests', nargs='+')
+
+    args = parser.parse_args(argv)
+    conn = connect(args.db)
+    if args.command == "record":
+        record(conn, args.test, args.phase, args.wall, args.status,
+               args.transcript, args.commit)
+    elif args.command == "report":
+        rows = compare(conn, args.commit, args.baseline, args.threshold)
+        print(json.dumps(rows, indent=2) if args.json else
+              format_report(rows))
+        return 1 if any(row["regressed"] for row in rows) else 0
+    elif args.command == "order":
+        print(" ".join(longest_first(conn, args.tests, args.phase)))
+    elif args.command == "shard":
+        if not 1 <= args.index <= args.count:
+            parser.error("shard index must be within 1..count")
+        print(" ".join(partition(conn, args.tests, args.count, args.phase,
+                                 args.before)[args.index - 1]))
+    elif args.command == "limits":
+        for test, limit in limits(conn, args.tests, args.factor,
+                                  args.quantile, args.min_wall,
+                                  args.min_sim_ns).items():
+            sim_ns = f"{limit['sim_ns']:.0f}" if limit["sim_ns"] else "none"
+            print(f"{test} {limit['wall_s']:.0f} {sim_ns}")
+    elif args.command == "history":
+        for row in conn.execute("SELECT * FROM timings WHERE test = ? AND "
+                                "phase = ? ORDER BY recorded",
+                                (args.test, args.phase)):
+            print(time.strftime("%Y-%m-%d %H:%M", time.localtime(
+                row["recorded"])), row["commit_id"], row["host"],
+                row["status"], f"{row['wall_s']:.2f}s",
+                f"{row['words_per_s']:.0f} words/s"
+                if row["words_per_s"] else "")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
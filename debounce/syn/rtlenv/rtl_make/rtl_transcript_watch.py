@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+"""Follow a simulation transcript and flag the first cant_have match.
+
+Started by RTL_sim_lib::run_watched_simulation (the 'watch' option) next to
+the simulator. The cant_have rules of pysim_rules.xml are applied to every
+line as the transcript grows, with the same semantics as
+RTL_sim_lib::transcript_verdict: regular expressions (r'...') and glob
+patterns (g'...'), both case insensitive. Without rules file, 'failure:'
+and 'error:' are fatal.
+
+On the first match the reason is written to the abort file, which the
+simulation loop checks between run slices to stop the test early. The
+watcher exits after a match, once the done file appears, or when the
+transcript did not grow for --max-idle seconds.
+
+Usage:
+    py -3 rtl_transcript_watch.py <transcript> --abort-file <file>
+        --done-file <file> [--rules pysim_rules.xml] [--poll 0.2]
+"""
+import os
+import re
+import sys
+import time
+import fnmatch
+import argparse
+import xml.etree.ElementTree as ET
+from typing import Callable, List, Optional, Tuple
+
+DEFAULT_RULES = [("r", r"failure\s*:"), ("r", r"error\s*:")]
+RULE_RE = re.compile(r"^\s*([rg])'(.*)'\s*$", re.DOTALL)
+
+Rule = Tuple[str, Callable[[str], bool]]
+
+
+def load_rules(rules_file: str) -> List[Tuple[str, str]]:
+    """cant_have rules of a pysim rules file as (type, pattern) pairs"""
+    if not os.path.exists(rules_file):
+        return list(DEFAULT_RULES)
+    rules = []
+    for node in ET.parse(rules_file).iter("cant_have"):
+        match = RULE_RE.match(node.text or "")
+        if match:
+            rules.append((match.group(1), match.group(2)))
+    return rules
+
+
+def compile_rules(rules: List[Tuple[str, str]]) -> List[Rule]:
+    compiled = []
+    for kind, pattern in rules:
+        if kind == "r":
+            regex = re.compile(pattern, re.IGNORECASE)
+            compiled.append((f"r'{pattern}'", lambda line, x=regex:
+                             x.search(line) is not None))
+        else:
+            glob = pattern.lower()
+            compiled.append((f"g'{pattern}'", lambda line, x=glob:
+                             fnmatch.fnmatchcase(line.lower(), x)))
+    return compiled
+
+
+def first_match(line: str, rules: List[Rule]) -> Optional[str]:
+    for name, matches in rules:
+        if matches(line):
+            return name
+    return None
+
+
+def write_abort(abort_file: str, reason: str) -> None:
+    """Write the abort file in one step so that it is never read half done"""
+    tmp_file = abort_file + ".tmp"
+    with open(tmp_file, "w") as abort:
+        abort.write(reason + "\n")
+    os.replace(tmp_file, abort_file)
+
+
+def watch(transcript: str, rules: List[Rule], abort_file: str,
+          done_file: str, poll: float, max_idle: float) -> Optional[str]:
+    """Follow the transcript until a rule matches or the run is done
+
+    Returns:
+        Abort reason, None if no rule matched
+    """
+    log = None
+    partial = ""
+    line_no = 0
+    last_growth = time.time()
+    try:
+        while True:
+            # Checked before reading, so the final read sees the whole file
+            done = os.path.exists(done_file)
+            if log is None and os.path.exists(transcript):
+                log = open(transcript, "r", errors="replace")
+            data = log.read() if log else ""
+            if data:
+                last_growth = time.time()
+            lines = (partial + data).split("\n")
+            # The last element is a line the simulator has not finished yet
+            partial = lines.pop()
+            if done and partial:
+                lines.append(partial)
+            for line in lines:
+                line_no += 1
+                rule = first_match(line, rules)
+                if rule:
+                    reason = f"{rule} at line {line_no}: {line.strip()}"
+                    write_abort(abort_file, reason)
+                    return reason
+            if done or (max_idle and time.time() - last_growth > max_idle):
+                return None
+            if not data:
+                time.sleep(poll)
+    finally:
+        if log:
+            log.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Transcript watcher")
+    parser.add_argument('transcript')
+    parser.add_argument('--abort-file', required=True)
+    parser.add_argument('--done-file', required=True)
+    parser.add_argument('--rules', default="pysim_rules.xml")
+    parser.add_argument('--poll', type=float, default=0.2,
+                        help="Seconds between reads of an idle transcript")
+    parser.add_argument('--max-idle', type=float, default=4 * 3600,
+                        help="Exit after this many seconds without output "
+                        "(0 waits for the done file forever)")
+    args = parser.parse_args(argv)
+
+    rules = compile_rules(load_rules(args.rules))
+    reason = watch(args.transcript, rules, args.abort_file, args.done_file,
+                   args.poll, args.max_idle)
+    if reason:
+        print(f"RTLWATCH: {reason}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -34,6 +34,6 @@ if __name__ == "__main__":
   print("{} words, took {} ms to completed ".format(HIGH_ADDR - BASE_ADDR + 1, math.ceil((after_time-before_time)*1000)))
 
   tcon.sync(50)
-  tb.print_complete()
+  tb.print_complete(2 * (HIGH_ADDR - BASE_ADDR + 1))
   tcon.halt()
 
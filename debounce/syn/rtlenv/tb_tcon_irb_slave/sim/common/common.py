@@ -5,9 +5,19 @@
 ################################################################################
 import sys
 import os
+import json
 import math
+import time
+import random
+import numpy as np
 import pytcon
 from pytcon_objects import *
+try:
+  # TCON_TRACE=1 records the TCON transactions of tcon.py for offline replay
+  import tcon_trace
+  tcon_trace.install_from_env()
+except ImportError:
+  pass
 
 ################################################################################
 # Requests for tcon components
@@ -58,17 +68,313 @@ def read_spec(file_name):
   
   return HIGH_ADDR, DATA_WIDTH, ADDR_WIDTH, BASE_ADDR
 
+################################################################################
+# Memory image helpers
+# Words are held as the smallest unsigned NumPy dtype that fits DATA_WIDTH so
+# that images can be formatted, written and compared without per-word Python
+# loops.
+################################################################################
+MEM_PATTERN_ZERO    = "zero"    # All words are zero
+MEM_PATTERN_INCR    = "incr"    # Word value equals its address
+MEM_PATTERN_RANDOM  = "random"  # Uniformly random words, reproducible by seed
+MEM_PATTERN_ARRAY   = "array"   # Words taken from an array-like
+MEM_PATTERN_FILE    = "file"    # Words taken from a binary image file
+
+HEX_DIGITS          = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+# Words formatted per pass, bounds the size of the temporary nibble matrix
+HEX_CHUNK_WORDS     = 1 << 20
+
+def mem_dtype(width):
+  """Return the smallest unsigned NumPy dtype holding a width-bit word, object
+  (Python ints) for words wider than 64 bits"""
+  for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+    if width <= np.iinfo(dtype).bits:
+      return np.dtype(dtype)
+  return np.dtype(object)
+
+################################################################################
+# Generate memory words for an init file
+# num_words   : Number of words to generate
+# DATA_WIDTH  : Data width in bits
+# pattern     : One of the MEM_PATTERN_* names
+# seed        : Seed for MEM_PATTERN_RANDOM
+# data        : Array-like for MEM_PATTERN_ARRAY or binary image file name
+#               for MEM_PATTERN_FILE
+# BASE_ADDR   : First address, used by MEM_PATTERN_INCR
+################################################################################
+def gen_mem_words(num_words, DATA_WIDTH, pattern=MEM_PATTERN_ZERO, seed=None,
+                  data=None, BASE_ADDR=0):
+  dtype = mem_dtype(DATA_WIDTH)
+  high = (1 << DATA_WIDTH) - 1
+  wide = dtype == object
+  if pattern == MEM_PATTERN_ZERO:
+    words = np.zeros(num_words, dtype=dtype)
+  elif pattern == MEM_PATTERN_INCR and wide:
+    words = np.array([x & high for x in range(BASE_ADDR, BASE_ADDR + num_words)],
+                     dtype=object)
+  elif pattern == MEM_PATTERN_INCR:
+    words = np.arange(BASE_ADDR, BASE_ADDR + num_words, dtype=np.uint64)
+    words = (words & np.uint64(high)).astype(dtype)
+  elif pattern == MEM_PATTERN_RANDOM and wide:
+    rnd = random.Random(seed)
+    words = np.array([rnd.getrandbits(DATA_WIDTH) for _ in range(num_words)],
+                     dtype=object)
+  elif pattern == MEM_PATTERN_RANDOM:
+    rng = np.random.default_rng(seed)
+    words = rng.integers(0, high, size=num_words, dtype=np.uint64,
+                         endpoint=True).astype(dtype)
+  elif pattern == MEM_PATTERN_ARRAY:
+    words = np.asarray(data)
+    if len(words) and words.dtype.kind not in "iu":
+      # Python ints, e.g. words wider than 64 bits
+      words = np.array([int(x) for x in words], dtype=object)
+    if len(words) and (words.min() < 0 or words.max() > high):
+      raise ValueError("Memory words must be within 0..0x{:x} for {}-bit "
+                       "data".format(high, DATA_WIDTH))
+    words = words.astype(dtype)
+  elif pattern == MEM_PATTERN_FILE:
+    if wide:
+      raise ValueError("Binary images of words wider than 64 bits are not "
+                       "supported: {}".format(DATA_WIDTH))
+    words = np.fromfile(data, dtype=dtype)
+  else:
+    raise ValueError("Unknown memory pattern: {}".format(pattern))
+
+  if len(words) != num_words:
+    raise ValueError("Memory image has {} words, expected {}".format(
+      len(words), num_words))
+  return words
+
+################################################################################
+# Format words as fixed width, zero padded, lower case hex characters
+# words   : NumPy array of words
+# digits  : Number of hex digits per word
+# Returns a (len(words), digits) uint8 array of ASCII characters
+################################################################################
+def hex_columns(words, digits):
+  shifts = np.arange(digits - 1, -1, -1, dtype=np.uint64) * np.uint64(4)
+  columns = np.empty((len(words), digits), dtype=np.uint8)
+  for start in range(0, len(words), HEX_CHUNK_WORDS):
+    chunk = words[start:start + HEX_CHUNK_WORDS].astype(np.uint64)
+    nibbles = (chunk[:, None] >> shifts) & np.uint64(0xF)
+    columns[start:start + HEX_CHUNK_WORDS] = HEX_DIGITS[nibbles.astype(np.intp)]
+  return columns
+
 ################################################################################
 # Generate init memory file
+# One "<addr> <data>" line per word, addresses from BASE_ADDR to HIGH_ADDR.
+# The whole file is formatted in memory and written with a single call. Words
+# wider than 64 bits are formatted one by one. The file is written in text
+# mode, so lines end like they did with the per-word writes (CRLF on Windows).
+# file_name   : Init file name
+# pattern     : One of the MEM_PATTERN_* names (default: all zero)
+# seed        : Seed for MEM_PATTERN_RANDOM
+# data        : Array-like for MEM_PATTERN_ARRAY or binary image file name
+#               for MEM_PATTERN_FILE
+# bin_file    : If given, also write the words as a raw little-endian binary
+#               image that can be fed back with MEM_PATTERN_FILE
+# Returns the NumPy array of words written
 ################################################################################
-def gen_mem_init_file(file_name, ADDR_WIDTH, DATA_WIDTH, BASE_ADDR, HIGH_ADDR):
+def gen_mem_init_file(file_name, ADDR_WIDTH, DATA_WIDTH, BASE_ADDR, HIGH_ADDR,
+                      pattern=MEM_PATTERN_ZERO, seed=None, data=None,
+                      bin_file=None):
   ADDR_BYTE_CNT = math.ceil(ADDR_WIDTH/4)
   DATA_BYTE_CNT = math.ceil(DATA_WIDTH/4)
+  num_words = HIGH_ADDR - BASE_ADDR + 1
+  if HIGH_ADDR.bit_length() > 4 * ADDR_BYTE_CNT:
+    raise ValueError("HIGH_ADDR 0x{:x} does not fit in {} address bits".format(
+      HIGH_ADDR, ADDR_WIDTH))
+  words = gen_mem_words(num_words, DATA_WIDTH, pattern, seed, data, BASE_ADDR)
+  addrs = np.arange(BASE_ADDR, HIGH_ADDR + 1, dtype=np.uint64)
+
+  lines = np.empty((num_words, ADDR_BYTE_CNT + DATA_BYTE_CNT + 2),
+                   dtype=np.uint8)
+  lines[:, :ADDR_BYTE_CNT] = hex_columns(addrs, ADDR_BYTE_CNT)
+  lines[:, ADDR_BYTE_CNT] = ord(' ')
+  if words.dtype == object:
+    lines[:, ADDR_BYTE_CNT + 1:-1] = np.frombuffer("".join(
+      '{0:0{1}x}'.format(x, DATA_BYTE_CNT) for x in words).encode(),
+      dtype=np.uint8).reshape(num_words, DATA_BYTE_CNT)
+  else:
+    lines[:, ADDR_BYTE_CNT + 1:-1] = hex_columns(words, DATA_BYTE_CNT)
+  lines[:, -1] = ord('\n')
+
   with open(file_name, 'w') as init_file:
-    for i in range (BASE_ADDR, HIGH_ADDR + 1):
-      init_file.write('{0:0{1}x}'.format(i,ADDR_BYTE_CNT))
-      init_file.write(' ')
-      init_file.write('{0:0{1}x}\n'.format(0,DATA_BYTE_CNT))
+    init_file.write(lines.tobytes().decode('ascii'))
+
+  if bin_file:
+    if words.dtype == object:
+      raise ValueError("Binary images of words wider than 64 bits are not "
+                       "supported: {}".format(DATA_WIDTH))
+    words.astype(words.dtype.newbyteorder('<')).tofile(bin_file)
+
+  return words
+
+################################################################################
+# Memory dump helpers
+# A dump (CONTROL_REG_DUMP_OP) or init file holds one "<addr> <data>" hex line
+# per word. Files whose lines all have the same length are parsed as a byte
+# matrix straight from a memory map; other files fall back to a line parser.
+# Data columns that are not hex (e.g. 'X' of uninitialized words) load as
+# invalid words and never match.
+################################################################################
+HEX_VALUES          = np.full(256, 0xFF, dtype=np.uint8)
+HEX_VALUES[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(10)
+HEX_VALUES[np.frombuffer(b"abcdef", dtype=np.uint8)] = np.arange(10, 16)
+HEX_VALUES[np.frombuffer(b"ABCDEF", dtype=np.uint8)] = np.arange(10, 16)
+# Mismatching ranges printed by check_mem_dump()
+MEM_DIFF_REPORT     = 8
+
+################################################################################
+# Parse fixed width hex columns
+# columns : (words, digits) uint8 array of ASCII characters, digits <= 16
+# Returns the uint64 words and a boolean array, False where a column is not hex
+################################################################################
+def hex_decode(columns):
+  nibbles = HEX_VALUES[columns]
+  words = np.zeros(len(columns), dtype=np.uint64)
+  for digit in range(columns.shape[1]):
+    words = (words << np.uint64(4)) | (nibbles[:, digit] & 0xF)
+  return words, (nibbles != 0xFF).all(axis=1)
+
+################################################################################
+# Load a memory dump or init file
+# file_name : Dump file name
+# Returns uint64 arrays of addresses and words (object for words wider than 64
+# bits) and the boolean valid array of hex_decode(), in file order
+################################################################################
+def load_mem_dump(file_name):
+  empty = np.zeros(0, dtype=np.uint64)
+  if os.path.getsize(file_name) == 0:
+    return empty, empty, np.zeros(0, dtype=bool)
+  raw = np.memmap(file_name, dtype=np.uint8, mode='r')
+  newlines = np.flatnonzero(raw[:min(len(raw), 256)] == ord('\n'))
+  line_len = newlines[0] + 1 if len(newlines) else 0
+  if line_len and len(raw) % line_len == 0:
+    lines = raw.reshape(-1, line_len)
+    text = lines[:, :-1]
+    if text.shape[1] and text[0, -1] == ord('\r'):
+      text = text[:, :-1]
+    spaces = np.flatnonzero(text[0] == ord(' '))
+    if (len(spaces) == 1 and (lines[:, -1] == ord('\n')).all() and
+        (text[:, spaces[0]] == ord(' ')).all() and
+        0 < spaces[0] <= 16 and text.shape[1] - spaces[0] - 1 <= 16):
+      addrs, addr_ok = hex_decode(text[:, :spaces[0]])
+      if not addr_ok.all():
+        raise ValueError("{}: bad address on line {}".format(
+          file_name, np.flatnonzero(~addr_ok)[0] + 1))
+      words, valid = hex_decode(text[:, spaces[0] + 1:])
+      return addrs, words, valid
+
+  # Lines of different lengths
+  addrs, words, valid = [], [], []
+  with open(file_name, 'r') as dump:
+    for line_no, line in enumerate(dump, 1):
+      fields = line.split()
+      if not fields or fields[0].startswith('#'):
+        continue
+      try:
+        addrs.append(int(fields[0], 16))
+      except ValueError:
+        raise ValueError("{}: bad address on line {}".format(file_name, line_no))
+      try:
+        words.append(int(fields[1], 16))
+        valid.append(True)
+      except (IndexError, ValueError):
+        words.append(0)
+        valid.append(False)
+  wide = any(word >> 64 for word in words)
+  return (np.array(addrs, dtype=np.uint64),
+          np.array(words, dtype=object if wide else np.uint64),
+          np.array(valid, dtype=bool))
+
+################################################################################
+# Ranges of consecutive addresses
+# addrs : Sorted uint64 array of addresses
+# Returns a list of (first address, last address) tuples
+################################################################################
+def addr_ranges(addrs):
+  if not len(addrs):
+    return []
+  breaks = np.flatnonzero(np.diff(addrs) != 1)
+  firsts = np.concatenate(([0], breaks + 1))
+  lasts = np.concatenate((breaks, [len(addrs) - 1]))
+  return [(int(addrs[f]), int(addrs[l])) for f, l in zip(firsts, lasts)]
+
+################################################################################
+# Compare a memory dump against an expected image
+# dump_file  : Dump file name
+# expected   : Init file name, one of the MEM_PATTERN_* names (except file) or
+#              an array-like of words from BASE_ADDR
+# DATA_WIDTH : Data width in bits
+# BASE_ADDR  : Address of the first expected word
+# HIGH_ADDR  : Address of the last expected word. Default: the highest address
+#              of an init file, the length of an array, or the highest dumped
+#              address for a pattern
+# seed       : Seed for MEM_PATTERN_RANDOM
+# Returns the list of (first address, last address) ranges that differ from
+# or are missing in the dump, and the number of words in them
+################################################################################
+def diff_mem_dump(dump_file, expected, DATA_WIDTH, BASE_ADDR=0, HIGH_ADDR=None,
+                  seed=None):
+  addrs, words, valid = load_mem_dump(dump_file)
+  if isinstance(expected, str) and expected not in (
+      MEM_PATTERN_ZERO, MEM_PATTERN_INCR, MEM_PATTERN_RANDOM):
+    exp_addrs, exp_words, exp_valid = load_mem_dump(expected)
+    if not exp_valid.all():
+      raise ValueError("{}: init file has words that are not hex".format(expected))
+    if HIGH_ADDR is None:
+      HIGH_ADDR = int(exp_addrs.max()) if len(exp_addrs) else BASE_ADDR - 1
+    image = np.zeros(HIGH_ADDR - BASE_ADDR + 1, dtype=exp_words.dtype)
+    in_image = (exp_addrs >= BASE_ADDR) & (exp_addrs <= HIGH_ADDR)
+    image[(exp_addrs[in_image] - np.uint64(BASE_ADDR)).astype(np.intp)] = \
+      exp_words[in_image]
+  else:
+    if HIGH_ADDR is None:
+      if isinstance(expected, str):
+        HIGH_ADDR = int(addrs.max()) if len(addrs) else BASE_ADDR - 1
+      else:
+        HIGH_ADDR = BASE_ADDR + len(expected) - 1
+    num_words = HIGH_ADDR - BASE_ADDR + 1
+    if isinstance(expected, str):
+      image = gen_mem_words(num_words, DATA_WIDTH, expected, seed,
+                            BASE_ADDR=BASE_ADDR)
+    else:
+      image = gen_mem_words(num_words, DATA_WIDTH, MEM_PATTERN_ARRAY,
+                            data=expected)
+    if image.dtype != object:
+      image = image.astype(np.uint64)
+
+  # Last dumped value of every expected address
+  seen = np.zeros(len(image), dtype=bool)
+  good = np.zeros(len(image), dtype=bool)
+  in_range = (addrs >= BASE_ADDR) & (addrs <= HIGH_ADDR)
+  idx = (addrs[in_range] - np.uint64(BASE_ADDR)).astype(np.intp)
+  seen[idx] = True
+  good[idx] = valid[in_range] & (words[in_range] == image[idx])
+  bad = np.flatnonzero(~(seen & good)).astype(np.uint64) + np.uint64(BASE_ADDR)
+  return addr_ranges(bad), len(bad)
+
+################################################################################
+# Check a memory dump against an expected image and print the differences
+# Arguments as diff_mem_dump(); at most MEM_DIFF_REPORT ranges are printed
+# Returns the number of words that differ or are missing
+################################################################################
+def check_mem_dump(dump_file, expected, DATA_WIDTH, BASE_ADDR=0,
+                   HIGH_ADDR=None, seed=None):
+  ranges, count = diff_mem_dump(dump_file, expected, DATA_WIDTH, BASE_ADDR,
+                                HIGH_ADDR, seed)
+  if not count:
+    return 0
+  digits = max(1, math.ceil(max(last for _, last in ranges).bit_length() / 4))
+  print("Error : {} words in {} ranges differ from the expected memory".format(
+    count, len(ranges)))
+  for first, last in ranges[:MEM_DIFF_REPORT]:
+    print("Error :   0x{:0{d}x}-0x{:0{d}x} ({} words)".format(
+      first, last, last - first + 1, d=digits))
+  if len(ranges) > MEM_DIFF_REPORT:
+    print("Error :   ... {} more ranges".format(len(ranges) - MEM_DIFF_REPORT))
+  return count
 
 ################################################################################
 # Test method #1
@@ -154,10 +460,21 @@ GPIO_RESET            = (1 << 0)
 
 
 class TconIRBSlave(object):
-  """Custom Tcon Slave under test"""
-  def __init__(self, tcon_inst: pytcon.Tcon, req_no: int):
+  """Custom Tcon Slave under test
+
+  Args:
+      tcon_inst: TCON object
+      req_no: TCON request line of the IRB slave
+      base_addr: TCON address of the IRB Address Register
+      direct: True when the request line maps straight onto the slave memory
+              (as in tb_tcon_irb_slave_tb), False for the register interface
+  """
+  def __init__(self, tcon_inst: pytcon.Tcon, req_no: int,
+               base_addr: int = IRB_SLAVE_BASE_ADDRESS, direct: bool = False):
     self.req = req_no
     self.tcon = tcon_inst
+    self.direct = direct
+    self.update_addr(base_addr)
 
   def read(self, irb_addr: int) -> int:
     """Perform an IRB read.
@@ -168,9 +485,11 @@ class TconIRBSlave(object):
     Returns:
         Read value as integer
     """
-    self.tcon.write(self.req, IRB_SLAVE_ADDRESS_REG, irb_addr)
-    self.tcon.write(self.req, IRB_SLAVE_CONTROL_REG, CONTROL_REG_READ_OP)
-    return self.tcon.read(self.req, IRB_SLAVE_DATA_REG)
+    if self.direct:
+      return self.tcon.read(self.req, irb_addr)
+    self.tcon.write(self.req, self.address_reg, irb_addr)
+    self.tcon.write(self.req, self.control_reg, CONTROL_REG_READ_OP)
+    return self.tcon.read(self.req, self.data_reg)
 
   def write(self, irb_addr: int, irb_data: int) -> None:
     """Perform an IRB write.
@@ -182,27 +501,82 @@ class TconIRBSlave(object):
     Returns:
         None
     """
-    self.tcon.write(self.req, IRB_SLAVE_ADDRESS_REG, irb_addr)
-    self.tcon.write(self.req, IRB_SLAVE_DATA_REG, irb_data)
-    self.tcon.write(self.req, IRB_SLAVE_CONTROL_REG, CONTROL_REG_WRITE_OP)
-
-  def update_addr(self,NEW_BASE_ADDR : int):
+    if self.direct:
+      self.tcon.write(self.req, irb_addr, irb_data)
+      return
+    self.tcon.write(self.req, self.address_reg, irb_addr)
+    self.tcon.write(self.req, self.data_reg, irb_data)
+    self.tcon.write(self.req, self.control_reg, CONTROL_REG_WRITE_OP)
+
+  def update_addr(self, NEW_BASE_ADDR : int):
     """Update with new base address"""
-    global IRB_SLAVE_BASE_ADDRESS
-    global IRB_SLAVE_ADDRESS_REG
-    global IRB_SLAVE_DATA_REG
-    global IRB_SLAVE_CONTROL_REG
-    global IRB_SLAVE_STATUS_REG
-
-    IRB_SLAVE_BASE_ADDRESS  = NEW_BASE_ADDR
-    IRB_SLAVE_ADDRESS_REG   = IRB_SLAVE_BASE_ADDRESS + 0
-    IRB_SLAVE_DATA_REG      = IRB_SLAVE_BASE_ADDRESS + 1
-    IRB_SLAVE_CONTROL_REG   = IRB_SLAVE_BASE_ADDRESS + 2
-    IRB_SLAVE_STATUS_REG    = IRB_SLAVE_BASE_ADDRESS + 3
+    self.base_addr    = NEW_BASE_ADDR
+    self.address_reg  = NEW_BASE_ADDR + 0
+    self.data_reg     = NEW_BASE_ADDR + 1
+    self.control_reg  = NEW_BASE_ADDR + 2
+    self.status_reg   = NEW_BASE_ADDR + 3
 
   def dump_mem(self):
     """Dump memory to file"""
-    self.tcon.write(self.req, IRB_SLAVE_CONTROL_REG, CONTROL_REG_DUMP_OP)
+    if self.direct:
+      # control_reg is a memory word on the direct request line
+      raise RuntimeError("dump_mem() needs the register interface, the "
+                         "direct request line has no dump op")
+    self.tcon.write(self.req, self.control_reg, CONTROL_REG_DUMP_OP)
+
+  def read_back_mem(self, dump_file: str, BASE_ADDR: int,
+                    HIGH_ADDR: int) -> None:
+    """Read words through TCON and write them in the dump file format.
+
+    Args:
+        dump_file: File to write
+        BASE_ADDR: First address to read
+        HIGH_ADDR: Last address to read
+    """
+    with open(dump_file, 'w') as dump:
+      for addr in range(BASE_ADDR, HIGH_ADDR + 1):
+        dump.write("{:x} {:x}\n".format(addr, self.read(addr)))
+
+  def check_mem(self, dump_file: str, expected, DATA_WIDTH: int,
+                BASE_ADDR: int = 0, HIGH_ADDR: int = None,
+                seed: int = None) -> int:
+    """Dump the memory and compare the dump against an expected image.
+
+    One dump instead of a TCON read per word, see check_mem_dump(). The
+    direct request line has no dump op, there the words are read back through
+    TCON into dump_file instead.
+
+    Args:
+        dump_file: File the slave dumps its memory to
+        expected: Init file name, MEM_PATTERN_* name or array-like of words
+        DATA_WIDTH: Data width in bits
+        BASE_ADDR: Address of the first expected word
+        HIGH_ADDR: Address of the last expected word
+        seed: Seed for MEM_PATTERN_RANDOM
+
+    Returns:
+        Number of words that differ or are missing
+
+    Raises:
+        ValueError: If HIGH_ADDR is needed to read back a pattern
+    """
+    if self.direct:
+      if HIGH_ADDR is None and not isinstance(expected, str):
+        HIGH_ADDR = BASE_ADDR + len(expected) - 1
+      elif HIGH_ADDR is None and expected not in (
+          MEM_PATTERN_ZERO, MEM_PATTERN_INCR, MEM_PATTERN_RANDOM):
+        exp_addrs = load_mem_dump(expected)[0]
+        HIGH_ADDR = int(exp_addrs.max()) if len(exp_addrs) else BASE_ADDR - 1
+      elif HIGH_ADDR is None:
+        raise ValueError("HIGH_ADDR is needed to read back {}".format(
+          expected))
+      self.read_back_mem(dump_file, BASE_ADDR, HIGH_ADDR)
+    else:
+      self.dump_mem()
+      # Let the simulator write the dump before it is read
+      self.tcon.sync(1)
+    return check_mem_dump(dump_file, expected, DATA_WIDTH, BASE_ADDR,
+                          HIGH_ADDR, seed)
 
 class TopLevelTB(object):
   """This is a representation of my big top-level TB"""
@@ -215,7 +589,8 @@ class TopLevelTB(object):
 
     self.irb_master = TconIRBMaster(tcon_inst, req_no=REQ_IRB_MASTER)
 
-    self.irb_slave = TconIRBSlave(tcon_inst, req_no=REQ_IRB_SLAVE)
+    # The tb maps this request line straight onto the slave memory
+    self.irb_slave = TconIRBSlave(tcon_inst, req_no=REQ_IRB_SLAVE, direct=True)
 
   def setup_environment(self):
     # Get the simulation going
@@ -233,12 +608,19 @@ class TopLevelTB(object):
     self.tcon.gpio_clr(GPIO_RESET)
 
   def print_banner(self, test_dir: str, test_name: str, sections: str) -> None:
+    self.start_time = time.time()
     print('*' * 40)
     print('* {} - {}'.format(test_dir, test_name))
     print('* Section(s) {} of testplan'.format(sections))
     print('*' * 40)
 
-  def print_complete(self):
+  def print_complete(self, words: int = None):
+    """Print the completion banner and the test's timing line
+
+    Args:
+        words: Number of words the test transferred, for the throughput
+               recorded in the regression timing database
+    """
     x = self.tcon.now()
     if x == 0:
         print('*' * 40)
@@ -247,4 +629,14 @@ class TopLevelTB(object):
     else:
         print('*' * 40)
         print('* Testbench Completed Successfully at t={}us'.format(x / 1000.0))
-        print('*' * 40)
\ No newline at end of file
+        print('*' * 40)
+    self.print_timing(words)
+
+  def print_timing(self, words: int = None):
+    """Print the RTLTIMING line that RTL_sim_lib records in the regression
+    timing database (rtl_make/rtl_timing_db.py): script wall time since
+    print_banner, simulated time and words transferred"""
+    start = getattr(self, 'start_time', None)
+    print('RTLTIMING: ' + json.dumps({
+      'wall_s': time.time() - start if start else None,
+      'sim_time': self.tcon.now(), 'sim_unit': 'ns', 'words': words}))
\ No newline at end of file
@@ -0,0 +1,31 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+import sys
+import os
+testdir = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(testdir + '/../common')
+import pytcon
+from common import *
+from zeromq_manager import ZeromqManager
+
+if __name__ == "__main__":
+  print('TCON instance "{}" connecting to FA at tcp://127.0.0.1:{}'.format(sys.argv[1], sys.argv[2]))
+  tcon = pytcon.Tcon(ZeromqManager('tcp://127.0.0.1:' + sys.argv[2]))
+
+  tb = TopLevelTB(tcon)
+  tb.print_banner('200_w32_rand_none_1m', '1m words, 32 bit, rand bursts, none back-pressure, 0 stages', '2.0')
+  tb.setup_environment()
+  tb.do_reset(10)
+  tcon.sync(10)
+
+  spec = read_spec(testdir + '/sim_params.txt')
+
+  # Run test
+  run_benchmark(tb, spec, testdir)
+
+  tcon.sync(50)
+  tb.print_complete(spec['NUM_WORDS'])
+  tcon.halt()
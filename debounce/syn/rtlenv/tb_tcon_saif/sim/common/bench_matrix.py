@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+"""Write the test folders of the SAIF throughput benchmark.
+
+Every MATRIX entry becomes a test folder in the sim folder, containing
+sim_params.txt (the generics of tb_tcon_saif_tb), gen_data.py and tcon.py.
+RTL_sim_lib::auto_discover_tests picks these folders up. gen_data.py writes
+the command files before each simulation, so multi-million word streams are
+never checked in.
+
+Edit MATRIX and run this script again to change the benchmark. Folders of
+removed entries are not deleted.
+
+Usage:
+    py -3 common/bench_matrix.py [sim folder]
+"""
+import os
+import sys
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+# Master burst distribution: (burst min, burst max, delay min, delay max)
+BURSTS = {
+    "cont":   (1, 1, 0, 0),    # A word every clock cycle
+    "rand":   (1, 16, 0, 4),   # Random bursts with short gaps
+    "sparse": (1, 4, 4, 16),   # Short bursts, long gaps
+}
+# Slave back-pressure pattern, same fields as BURSTS
+BACKPRESSURE = {
+    "none":  (1, 1, 0, 0),     # Always ready
+    "light": (8, 32, 0, 2),    # Long ready bursts, rare stalls
+    "heavy": (1, 2, 1, 8),     # Stalls after almost every word
+}
+LENGTHS = {"64k": 1 << 16, "256k": 1 << 18, "1m": 1 << 20, "4m": 1 << 22}
+
+# (test number, data width, burst, back-pressure, length, pipeline stages).
+# Each hundred sweeps one axis around 32 bit, cont, none, 1m, no stages.
+MATRIX: List[Tuple[int, int, str, str, str, int]] = [
+    (100, 8,   "cont",   "none",  "1m",   0),
+    (101, 32,  "cont",   "none",  "1m",   0),
+    (102, 64,  "cont",   "none",  "1m",   0),
+    (103, 256, "cont",   "none",  "1m",   0),
+    (200, 32,  "rand",   "none",  "1m",   0),
+    (201, 32,  "sparse", "none",  "1m",   0),
+    (300, 32,  "cont",   "light", "1m",   0),
+    (301, 32,  "cont",   "heavy", "1m",   0),
+    (302, 32,  "rand",   "heavy", "1m",   0),
+    (400, 32,  "cont",   "none",  "64k",  0),
+    (401, 32,  "cont",   "none",  "256k", 0),
+    (402, 32,  "cont",   "none",  "4m",   0),
+    (500, 32,  "cont",   "none",  "1m",   1),
+    (501, 32,  "cont",   "none",  "1m",   4),
+    (502, 32,  "rand",   "light", "1m",   4),
+]
+
+HEADER = """#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+import sys
+import os
+testdir = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(testdir + '/../common')
+"""
+
+GEN_DATA_PY = HEADER + """from common import *
+
+if __name__ == "__main__":
+  gen_stimulus(testdir, read_spec(testdir + '/sim_params.txt'))
+"""
+
+TCON_PY = HEADER + """import pytcon
+from common import *
+from zeromq_manager import ZeromqManager
+
+if __name__ == "__main__":
+  print('TCON instance "{{}}" connecting to FA at tcp://127.0.0.1:{{}}'.format(sys.argv[1], sys.argv[2]))
+  tcon = pytcon.Tcon(ZeromqManager('tcp://127.0.0.1:' + sys.argv[2]))
+
+  tb = TopLevelTB(tcon)
+  tb.print_banner('{name}', '{title}', '{section}')
+  tb.setup_environment()
+  tb.do_reset(10)
+  tcon.sync(10)
+
+  spec = read_spec(testdir + '/sim_params.txt')
+
+  # Run test
+  run_benchmark(tb, spec, testdir)
+
+  tcon.sync(50)
+  tb.print_complete(spec['NUM_WORDS'])
+  tcon.halt()
+"""
+
+
+def test_name(entry: Tuple[int, int, str, str, str, int]) -> str:
+    number, width, burst, backpressure, length, stages = entry
+    name = f"{number}_w{width}_{burst}_{backpressure}_{length}"
+    return name + (f"_s{stages}" if stages else "")
+
+
+def sim_params(entry: Tuple[int, int, str, str, str, int]) -> Dict[str, int]:
+    number, width, burst, backpressure, length, stages = entry
+    params = {"DATA_WIDTH": width, "PIPE_STAGES": stages,
+              "NUM_WORDS": LENGTHS[length], "SEED": number}
+    for prefix, profile in (("MASTER", BURSTS[burst]),
+                            ("SLAVE", BACKPRESSURE[backpressure])):
+        for field, value in zip(("BURST_MIN", "BURST_MAX", "DELAY_MIN",
+                                 "DELAY_MAX"), profile):
+            params[f"{prefix}_{field}"] = value
+    return params
+
+
+def write_test(sim_dir: str, entry: Tuple[int, int, str, str, str, int]
+               ) -> str:
+    name = test_name(entry)
+    number, width, burst, backpressure, length, stages = entry
+    test_dir = os.path.join(sim_dir, name)
+    os.makedirs(test_dir, exist_ok=True)
+    params = sim_params(entry)
+    max_len = max(len(x) for x in params)
+    with open(os.path.join(test_dir, "sim_params.txt"), "w") as param_file:
+        param_file.write("\n".join(f"{key:<{max_len}}  {value}"
+                                   for key, value in params.items()))
+    with open(os.path.join(test_dir, "gen_data.py"), "w") as script:
+        script.write(GEN_DATA_PY)
+    title = (f"{length} words, {width} bit, {burst} bursts, {backpressure} "
+             f"back-pressure, {stages} stages")
+    with open(os.path.join(test_dir, "tcon.py"), "w") as script:
+        script.write(TCON_PY.format(name=name, title=title,
+                                    section=f"{number // 100}.{number % 100}"))
+    return name
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write the SAIF benchmark "
+                                     "test folders")
+    parser.add_argument('sim_dir', nargs='?', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), ".."))
+    args = parser.parse_args(argv)
+    for entry in MATRIX:
+        print(f"Wrote {write_test(args.sim_dir, entry)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
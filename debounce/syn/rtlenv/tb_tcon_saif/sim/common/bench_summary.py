@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+"""Collect the bench_result.json files of the SAIF benchmark tests.
+
+Adds the log volume of each test and checks that the slave logged every
+word. Writes one summary, sorted by test, for sizing pipeline stages and
+spotting throughput regressions of tb_tcon_saif.
+
+Usage (after_all command of test_parameters.tcl, run from the sim folder):
+    py -3 common/bench_summary.py [--output bench_summary.json] [sim folder]
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+from typing import Any, Dict, List, Optional
+
+RESULT_FILE = "bench_result.json"
+SLAVE_LOG = "saif_slave.log"
+LOG_FILES = ["saif_master.log", SLAVE_LOG]
+
+
+def count_lines(path: str) -> int:
+    lines = 0
+    with open(path, "rb") as log_file:
+        for block in iter(lambda: log_file.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return lines
+
+
+def collect(sim_dir: str) -> List[Dict[str, Any]]:
+    results = []
+    for path in sorted(glob.glob(os.path.join(sim_dir, "*", RESULT_FILE))):
+        test_dir = os.path.dirname(path)
+        with open(path) as result_file:
+            result = json.load(result_file)
+        logs = [os.path.join(test_dir, name) for name in LOG_FILES]
+        result["log_bytes"] = sum(os.path.getsize(x) for x in logs
+                                  if os.path.exists(x))
+        slave_log = os.path.join(test_dir, SLAVE_LOG)
+        if os.path.exists(slave_log):
+            logged = count_lines(slave_log)
+            if logged != result["num_words"]:
+                result["errors"].append(f"Slave logged {logged} of "
+                                        f"{result['num_words']} words")
+        results.append(result)
+    return results
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'test':<30}{'words':>10}{'words/s':>10}{'words/cyc':>10}"
+             f"{'stall':>7}{'sim/wall':>12}{'log MiB':>9}"]
+    for result in results:
+        lines.append(
+            f"{result['test']:<30}{result['num_words']:>10}"
+            f"{result['words_per_s'] or 0:>10.0f}"
+            f"{result['words_per_cycle'] or 0:>10.3f}"
+            f"{result['stall_ratio'] or 0:>7.3f}"
+            f"{result['sim_ns_per_wall_s'] or 0:>12.0f}"
+            f"{result['log_bytes'] / (1 << 20):>9.1f}")
+        lines += [f"    ERROR: {err}" for err in result["errors"]]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="SAIF benchmark summary")
+    parser.add_argument('sim_dir', nargs='?', default=".")
+    parser.add_argument('--output', default="bench_summary.json")
+    args = parser.parse_args(argv)
+
+    results = collect(args.sim_dir)
+    if not results:
+        print(f"No {RESULT_FILE} found under {args.sim_dir}", file=sys.stderr)
+        return 1
+    print(format_table(results))
+    with open(args.output, "w") as summary_file:
+        json.dump({"results": results}, summary_file, indent=2)
+    return 1 if any(result["errors"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
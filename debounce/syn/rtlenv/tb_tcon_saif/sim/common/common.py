@@ -0,0 +1,226 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+import sys
+import os
+import json
+import math
+import time
+import random
+import pytcon
+from pytcon_objects import *
+try:
+  # TCON_TRACE=1 records the TCON transactions of tcon.py for offline replay
+  import tcon_trace
+  tcon_trace.install_from_env()
+except ImportError:
+  pass
+
+################################################################################
+# Requests for tcon components
+################################################################################
+REQ_CLOCKER     = 0
+REQ_SAIF_MASTER = 1
+REQ_SAIF_SLAVE  = 2
+
+################################################################################
+# tb_tcon_saif registers
+################################################################################
+SAIF_CONTROL_REG      = 0  # Write 1 to unpause
+SAIF_READ_COUNT_REG   = 6  # Transfers into the component (slave)
+SAIF_WRITE_COUNT_REG  = 7  # Transfers out of the component (master)
+
+################################################################################
+# Benchmark constants
+################################################################################
+CLK_PERIOD_NS       = 8       # 125 MHz clock set up by setup_environment()
+MASTER_STIM_FILE    = "saif_master.stim"
+SLAVE_STIM_FILE     = "saif_slave.stim"
+RESULT_FILE         = "bench_result.json"
+# Read count polls per test. Polling costs a TCON round trip; fewer polls
+# overshoot the end of the stream by more simulated time
+POLLS_PER_TEST      = 64
+# Data lines formatted per write while generating stimulus
+STIM_CHUNK_WORDS    = 1 << 16
+
+################################################################################
+# Read specs from sim_params.txt
+# file_name : path to sim_params.txt
+# Returns a dict of the integer generics of tb_tcon_saif_tb
+################################################################################
+def read_spec(file_name):
+  spec = {"DATA_WIDTH": 32, "PIPE_STAGES": 0, "STAGE_TYPE": 1,
+          "NUM_WORDS": 0, "SEED": 1,
+          "MASTER_BURST_MIN": 1, "MASTER_BURST_MAX": 1,
+          "MASTER_DELAY_MIN": 0, "MASTER_DELAY_MAX": 0,
+          "SLAVE_BURST_MIN": 1, "SLAVE_BURST_MAX": 1,
+          "SLAVE_DELAY_MIN": 0, "SLAVE_DELAY_MAX": 0}
+  with open(file_name, 'r') as params:
+    for line in params:
+      param_list = line.split()
+      if len(param_list) >= 2 and param_list[0] in spec:
+        spec[param_list[0]] = int(param_list[1])
+  return spec
+
+################################################################################
+# Generate the master and slave command files of a test
+# Both components start paused so that the stream begins when the test
+# unpauses them, and pause again at the end instead of restarting the file.
+# The master's data lines are written in chunks, so memory use does not grow
+# with the stream length.
+# test_dir : Test directory, the command files are written there
+# spec     : Test spec from read_spec()
+################################################################################
+def gen_stimulus(test_dir, spec):
+  width = spec["DATA_WIDTH"]
+  digits = (width + 3) // 4
+  rnd = random.Random(spec["SEED"])
+  with open(os.path.join(test_dir, MASTER_STIM_FILE), 'w') as stim:
+    stim.write("# Generated by gen_data.py: {} words of {} bits\n"
+               "pause\nseed {}\nburst {} {}\ndelay {} {}\n".format(
+                 spec["NUM_WORDS"], width, spec["SEED"],
+                 spec["MASTER_BURST_MIN"], spec["MASTER_BURST_MAX"],
+                 spec["MASTER_DELAY_MIN"], spec["MASTER_DELAY_MAX"]))
+    for start in range(0, spec["NUM_WORDS"], STIM_CHUNK_WORDS):
+      count = min(STIM_CHUNK_WORDS, spec["NUM_WORDS"] - start)
+      stim.write("".join("0x{:0{}x}\n".format(rnd.getrandbits(width), digits)
+                         for _ in range(count)))
+    stim.write("pause\n")
+
+  with open(os.path.join(test_dir, SLAVE_STIM_FILE), 'w') as stim:
+    stim.write("# Generated by gen_data.py\n"
+               "pause\nseed {}\nburst {} {}\ndelay {} {}\nread {}\npause\n"
+               .format(spec["SEED"] + 1,
+                       spec["SLAVE_BURST_MIN"], spec["SLAVE_BURST_MAX"],
+                       spec["SLAVE_DELAY_MIN"], spec["SLAVE_DELAY_MAX"],
+                       spec["NUM_WORDS"]))
+
+################################################################################
+# Run a benchmark: unpause slave and master and wait until the slave received
+# the whole stream. The time between polls follows the measured rate.
+# tb       : top level testbench object
+# spec     : Test spec from read_spec()
+# test_dir : Test directory, RESULT_FILE is written there
+# Returns the result dict
+################################################################################
+def run_benchmark(tb, spec, test_dir):
+  num_words = spec["NUM_WORDS"]
+  chunk = max(256, num_words // POLLS_PER_TEST)
+  # Worst case: every word waits for the longest master and slave delay
+  budget = num_words * (2 + spec["MASTER_DELAY_MAX"] + spec["SLAVE_DELAY_MAX"]
+                        ) + 1000 * (1 + spec["PIPE_STAGES"])
+  errors = []
+
+  sim_start = tb.tcon.now()
+  wall_start = time.time()
+  tb.tcon.write(REQ_SAIF_SLAVE, SAIF_CONTROL_REG, 1)
+  tb.tcon.write(REQ_SAIF_MASTER, SAIF_CONTROL_REG, 1)
+
+  received = polls = cycles = 0
+  while received < num_words and cycles < budget:
+    step = chunk
+    if received:
+      step = min(chunk, math.ceil((num_words - received) * cycles / received))
+    step = max(1, step)
+    tb.tcon.sync(step)
+    cycles += step
+    received = tb.tcon.read(REQ_SAIF_SLAVE, SAIF_READ_COUNT_REG)
+    polls += 1
+
+  wall_s = time.time() - wall_start
+  sim_ns = tb.tcon.now() - sim_start
+  sim_cycles = sim_ns / CLK_PERIOD_NS
+
+  sent = tb.tcon.read(REQ_SAIF_MASTER, SAIF_WRITE_COUNT_REG)
+  if sent != num_words:
+    errors.append("Master sent {} of {} words".format(sent, num_words))
+  if received != num_words:
+    errors.append("Slave received {} of {} words".format(received, num_words))
+  for err in errors:
+    print("Error : " + err)
+
+  words_per_cycle = received / sim_cycles if sim_cycles else None
+  result = {
+    "test": os.path.basename(test_dir),
+    "num_words": num_words,
+    "data_width": spec["DATA_WIDTH"],
+    "pipe_stages": spec["PIPE_STAGES"],
+    "master_burst": [spec["MASTER_BURST_MIN"], spec["MASTER_BURST_MAX"]],
+    "master_delay": [spec["MASTER_DELAY_MIN"], spec["MASTER_DELAY_MAX"]],
+    "slave_burst": [spec["SLAVE_BURST_MIN"], spec["SLAVE_BURST_MAX"]],
+    "slave_delay": [spec["SLAVE_DELAY_MIN"], spec["SLAVE_DELAY_MAX"]],
+    "polls": polls,
+    "sim_ns": sim_ns,
+    "wall_s": wall_s,
+    # Sustained wall clock throughput of the simulation
+    "words_per_s": received / wall_s if wall_s else None,
+    # Simulated link utilization and the share of cycles without a transfer
+    "words_per_cycle": words_per_cycle,
+    "stall_ratio": 1 - words_per_cycle if words_per_cycle is not None else None,
+    # Simulated ns per wall clock second
+    "sim_ns_per_wall_s": sim_ns / wall_s if wall_s else None,
+    "errors": errors,
+  }
+  with open(os.path.join(test_dir, RESULT_FILE), 'w') as result_file:
+    json.dump(result, result_file, indent=2)
+  print("{} words, {:.3f} s wall, {} ns simulated, {:.0f} words/s, "
+        "stall ratio {:.3f}".format(received, wall_s, sim_ns,
+                                    result["words_per_s"] or 0,
+                                    result["stall_ratio"] or 0))
+  return result
+
+################################################################################
+# TCON GPIO mapping
+################################################################################
+GPIO_RESET            = (1 << 0)
+
+
+class TopLevelTB(object):
+  """SAIF benchmark TB: tb_tcon_saif master to tb_tcon_saif slave through
+  PIPE_STAGES saif_pipeline_stage instances"""
+  def __init__(self, tcon_inst: pytcon.Tcon):
+    self.tcon = tcon_inst
+    self.clocker = TconClocker(tcon_inst, req_no=REQ_CLOCKER)
+
+  def setup_environment(self):
+    #125Mhz clock
+    self.clocker.add_clock(0, 'clk', CLK_PERIOD_NS * 1000)
+    self.clocker.enable(0)
+
+    #GPIO outputs
+    self.tcon.gpio_set_as_outputs(GPIO_RESET)
+
+  def do_reset(self, duration: int):
+    self.tcon.gpio_set(GPIO_RESET)
+    self.tcon.sync(duration)
+    self.tcon.gpio_clr(GPIO_RESET)
+
+  def print_banner(self, test_dir: str, test_name: str, sections: str) -> None:
+    self.start_time = time.time()
+    print('*' * 40)
+    print('* {} - {}'.format(test_dir, test_name))
+    print('* Section(s) {} of testplan'.format(sections))
+    print('*' * 40)
+
+  def print_complete(self, words: int = None):
+    """Print the completion banner and the test's timing line
+
+    Args:
+        words: Number of words the test streamed, for the throughput
+               recorded in the regression timing database
+    """
+    x = self.tcon.now()
+    if x == 0:
+      print('*' * 40)
+      print('* ERROR - The simulation exited abnormally at t=0 !')
+      print('*' * 40)
+    else:
+      print('*' * 40)
+      print('* Testbench Completed Successfully at t={}us'.format(x / 1000.0))
+      print('*' * 40)
+    start = getattr(self, 'start_time', None)
+    print('RTLTIMING: ' + json.dumps({
+      'wall_s': time.time() - start if start else None,
+      'sim_time': x, 'sim_unit': 'ns', 'words': words}))
@@ -0,0 +1,16 @@
+#-------------------------------------------------------------------------------
+# Copyright (c) 2019 Schweitzer Engineering Laboratories, Inc.
+# SEL Confidential
+#
+# SAIF throughput benchmark. The test folders are written by
+# common/bench_matrix.py (see MATRIX there for the data width, burst,
+# back-pressure, stream length and pipeline stage sweeps). Every test writes
+# bench_result.json; bench_summary.py collects them into bench_summary.json.
+# pysim gives the pass/fail verdict from the transcripts (e.g. the 'Error : ...'
+# lines of a failed benchmark run).
+#-------------------------------------------------------------------------------
+
+dict set after_all_commands pass_fail {py -3 -m pysim -v -s -j . }
+dict set after_all_commands bench_summary {py -3 common/bench_summary.py . }
+
+RTL_sim_lib::auto_discover_tests
@@ -0,0 +1,183 @@
+--------------------------------------------------------------------------------
+-- Copyright (c) 2019 Schweitzer Engineering Laboratories, Inc.
+-- SEL Confidential
+-- SAIF throughput benchmark testbench. A tb_tcon_saif master streams into a
+-- tb_tcon_saif slave through a chain of PIPE_STAGES saif_pipeline_stage
+-- instances (none: master and slave connected directly).
+--------------------------------------------------------------------------------
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+entity tb_tcon_saif_tb is
+  generic
+  (
+    TEST_PREFIX      : string;
+    DATA_WIDTH       : positive := 32;
+    PIPE_STAGES      : natural  := 0;
+    STAGE_TYPE       : natural  := 1;  -- saif_pipeline_stage STAGE_TYPE
+    -- Stimulus of the test, written to the command files by gen_data.py:
+    -- stream length, master burst distribution and slave back-pressure
+    NUM_WORDS        : natural  := 1048576;
+    MASTER_BURST_MIN : positive := 1;
+    MASTER_BURST_MAX : positive := 1;
+    MASTER_DELAY_MIN : natural  := 0;
+    MASTER_DELAY_MAX : natural  := 0;
+    SLAVE_BURST_MIN  : positive := 1;
+    SLAVE_BURST_MAX  : positive := 1;
+    SLAVE_DELAY_MIN  : natural  := 0;
+    SLAVE_DELAY_MAX  : natural  := 0;
+    SEED             : natural  := 1
+  );
+end entity tb_tcon_saif_tb;
+
+architecture behav of tb_tcon_saif_tb is
+  -- TCON REQ
+  constant REQ_CLOCKER    : natural := 0;
+  constant REQ_SAIF_MASTER: natural := 1;
+  constant REQ_SAIF_SLAVE : natural := 2;
+
+  -- TCON GPIOs
+  constant GPIO_RESET     : natural := 0;
+
+  -- Tcon signals
+  signal tcon_req         : std_logic_vector(31 downto 0);
+  signal tcon_ack         : std_logic;
+  signal tcon_err         : std_logic;
+  signal tcon_addr        : std_logic_vector(31 downto 0);
+  signal tcon_data        : std_logic_vector(31 downto 0);
+  signal tcon_rwn         : std_logic;
+  signal tcon_gpio        : std_logic_vector(15 downto 0);
+  alias reset             is tcon_gpio(GPIO_RESET);
+
+  -- CLK
+  signal clks             : std_logic_vector (0 downto 0);
+  alias clk               is clks(0);
+
+  -- SAIF chain, index 0 is the master side, PIPE_STAGES the slave side
+  type data_array is array (0 to PIPE_STAGES) of
+    std_logic_vector(DATA_WIDTH-1 downto 0);
+  signal saif_rts         : std_logic_vector(0 to PIPE_STAGES);
+  signal saif_rtr         : std_logic_vector(0 to PIPE_STAGES);
+  signal saif_data        : data_array;
+
+begin
+  -----------------------------------------------------------------------------
+  -- TCON
+  -----------------------------------------------------------------------------
+  tcon_inst : entity work.tb_tcon
+  generic map
+  (
+    INST_NAME    => "tcon",
+    COMMAND_LINE => "py -3 -u " & TEST_PREFIX & "/tcon.py"
+  )
+  port map
+  (
+    tcon_clk  => clk,
+    tcon_req  => tcon_req,
+    tcon_ack  => tcon_ack,
+    tcon_err  => tcon_err,
+    tcon_addr => tcon_addr,
+    tcon_data => tcon_data,
+    tcon_rwn  => tcon_rwn,
+    tcon_gpio => tcon_gpio
+  );
+
+  -----------------------------------------------------------------------------
+  -- CLOCKER
+  -----------------------------------------------------------------------------
+  clocker : entity work.tb_tcon_clocker
+    generic map
+    (
+      NUM_CLOCKS => 1
+    )
+    port map
+    (
+      tcon_req  => tcon_req(REQ_CLOCKER),
+      tcon_ack  => tcon_ack,
+      tcon_err  => tcon_err,
+      tcon_addr => tcon_addr,
+      tcon_data => tcon_data,
+      tcon_rwn  => tcon_rwn,
+
+      clks    => clks
+    );
+
+  ------------------------------------------------------------------------------
+  -- SAIF master (UUT)
+  ------------------------------------------------------------------------------
+  saif_master : entity work.tb_tcon_saif
+  generic map
+  (
+    DATA_WIDTH   => DATA_WIDTH,
+    FLAG_WIDTH   => 0,
+    COMMAND_FILE => TEST_PREFIX & "/saif_master.stim",
+    LOG_FILE     => TEST_PREFIX & "/saif_master.log"
+  )
+  port map
+  (
+    tcon_req  => tcon_req(REQ_SAIF_MASTER),
+    tcon_ack  => tcon_ack,
+    tcon_err  => tcon_err,
+    tcon_addr => tcon_addr,
+    tcon_data => tcon_data,
+    tcon_rwn  => tcon_rwn,
+
+    clk       => clk,
+    rts_rtr   => saif_rts(0),
+    cts_ctr   => saif_rtr(0),
+    data      => saif_data(0),
+    is_paused => open
+  );
+
+  ------------------------------------------------------------------------------
+  -- Pipeline stages
+  ------------------------------------------------------------------------------
+  stages : for i in 0 to PIPE_STAGES-1 generate
+    stage : entity work.saif_pipeline_stage
+    generic map
+    (
+      DATA_WIDTH => DATA_WIDTH,
+      STAGE_TYPE => STAGE_TYPE
+    )
+    port map
+    (
+      clk      => clk,
+      reset    => reset,
+      data_in  => saif_data(i),
+      ctr_in   => saif_rts(i),
+      rtr_out  => saif_rtr(i),
+      data_out => saif_data(i+1),
+      rts_out  => saif_rts(i+1),
+      cts_in   => saif_rtr(i+1)
+    );
+  end generate;
+
+  ------------------------------------------------------------------------------
+  -- SAIF slave (UUT)
+  ------------------------------------------------------------------------------
+  saif_slave : entity work.tb_tcon_saif
+  generic map
+  (
+    DATA_WIDTH   => DATA_WIDTH,
+    FLAG_WIDTH   => 0,
+    COMMAND_FILE => TEST_PREFIX & "/saif_slave.stim",
+    LOG_FILE     => TEST_PREFIX & "/saif_slave.log"
+  )
+  port map
+  (
+    tcon_req  => tcon_req(REQ_SAIF_SLAVE),
+    tcon_ack  => tcon_ack,
+    tcon_err  => tcon_err,
+    tcon_addr => tcon_addr,
+    tcon_data => tcon_data,
+    tcon_rwn  => tcon_rwn,
+
+    clk       => clk,
+    rts_rtr   => saif_rtr(PIPE_STAGES),
+    cts_ctr   => saif_rts(PIPE_STAGES),
+    data      => saif_data(PIPE_STAGES),
+    is_paused => open
+  );
+
+end architecture behav;
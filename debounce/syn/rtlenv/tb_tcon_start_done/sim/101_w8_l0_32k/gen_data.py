@@ -0,0 +1,13 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+import sys
+import os
+testdir = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(testdir + '/../common')
+from common import *
+
+if __name__ == "__main__":
+  gen_stimulus(testdir, read_spec(testdir + '/sim_params.txt'), seed=101)
@@ -0,0 +1,2 @@
+@echo off
+vsim -c -do "do ../syn/rtlenv/rtl_make/RTL_make.tcl build tb_tcon_start_done_tb compile"
\ No newline at end of file
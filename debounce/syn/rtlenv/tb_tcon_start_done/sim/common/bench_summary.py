@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+"""Collect the bench_result.json files of the start-done benchmark tests.
+
+Adds the size of each test's log files and writes one summary, sorted by
+test, for comparing runs and spotting throughput regressions.
+
+Usage (after_all command of test_parameters.tcl, run from the sim folder):
+    py -3 common/bench_summary.py [--output bench_summary.json] [sim folder]
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+from typing import Any, Dict, List, Optional
+
+RESULT_FILE = "bench_result.json"
+LOG_FILES = ["sd_master.log", "sd_slave.log"]
+
+
+def collect(sim_dir: str) -> List[Dict[str, Any]]:
+    results = []
+    for path in sorted(glob.glob(os.path.join(sim_dir, "*", RESULT_FILE))):
+        test_dir = os.path.dirname(path)
+        with open(path) as result_file:
+            result = json.load(result_file)
+        result["log_bytes"] = sum(
+            os.path.getsize(os.path.join(test_dir, name))
+            for name in LOG_FILES if os.path.exists(os.path.join(test_dir,
+                                                                 name)))
+        results.append(result)
+    return results
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'test':<22}{'trans':>8}{'width':>6}{'lat':>5}"
+             f"{'trans/s':>10}{'cyc/trans':>10}{'sim/wall':>12}"
+             f"{'log KiB':>9}"]
+    for result in results:
+        lines.append(
+            f"{result['test']:<22}{result['num_trans']:>8}"
+            f"{result['data_width']:>6}{result['done_latency']:>5}"
+            f"{result['trans_per_s'] or 0:>10.0f}"
+            f"{result['cycles_per_trans'] or 0:>10.2f}"
+            f"{result['sim_ns_per_wall_s'] or 0:>12.0f}"
+            f"{result['log_bytes'] / 1024:>9.0f}")
+        lines += [f"    ERROR: {err}" for err in result["errors"]]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Start-done benchmark "
+                                     "summary")
+    parser.add_argument('sim_dir', nargs='?', default=".")
+    parser.add_argument('--output', default="bench_summary.json")
+    args = parser.parse_args(argv)
+
+    results = collect(args.sim_dir)
+    if not results:
+        print(f"No {RESULT_FILE} found under {args.sim_dir}", file=sys.stderr)
+        return 1
+    print(format_table(results))
+    with open(args.output, "w") as summary_file:
+        json.dump({"results": results}, summary_file, indent=2)
+    return 1 if any(result["errors"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) 2019 Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+import sys
+import os
+import json
+import time
+import random
+import pytcon
+from pytcon_objects import *
+try:
+  # TCON_TRACE=1 records the TCON transactions of tcon.py for offline replay
+  import tcon_trace
+  tcon_trace.install_from_env()
+except ImportError:
+  pass
+
+################################################################################
+# Requests for tcon components
+################################################################################
+REQ_CLOCKER     = 0
+REQ_SD_MASTER   = 1
+REQ_SD_SLAVE    = 2
+
+################################################################################
+# Start-done master (tb_tcon_start_done) registers
+################################################################################
+SD_MASTER_CONTROL_REG     = 0  # Write 1 to unpause
+SD_MASTER_START_COUNT_REG = 6
+SD_MASTER_DONE_COUNT_REG  = 7
+
+################################################################################
+# Start-done slave (tb_tcon_start_done_slave) registers
+################################################################################
+SD_SLAVE_START_COUNT_REG  = 0
+SD_SLAVE_DONE_COUNT_REG   = 1
+
+################################################################################
+# Benchmark constants
+################################################################################
+CLK_PERIOD_NS       = 8       # 125 MHz clock set up by setup_environment()
+STIM_FILE           = "sd_master.stim"
+RESULT_FILE         = "bench_result.json"
+# Done count polls per test. Polling costs a TCON round trip; fewer polls
+# overshoot the end of the stream by more simulated time
+POLLS_PER_TEST      = 32
+# Clock cycles per transaction on top of the slave latency: start pulse and
+# the master's wait for the next rising edge after done
+CYCLES_OVERHEAD     = 2
+
+################################################################################
+# Read specs from sim_params.txt
+# file_name : path to sim_params.txt
+# Returns a dict of the integer generics (DATA_WIDTH, DONE_LATENCY, NUM_TRANS)
+################################################################################
+def read_spec(file_name):
+  spec = {"DATA_WIDTH": 32, "DONE_LATENCY": 0, "NUM_TRANS": 0}
+  with open(file_name, 'r') as params:
+    for line in params:
+      param_list = line.split()
+      if len(param_list) >= 2 and param_list[0] in spec:
+        spec[param_list[0]] = int(param_list[1])
+  return spec
+
+################################################################################
+# Generate the start-done master command file
+# The master starts paused so that the stream begins when the test unpauses
+# it, and pauses again after the last word instead of restarting the file.
+# test_dir : Test directory, the command file is written there
+# spec     : Test spec from read_spec()
+# seed     : Seed of the data words
+################################################################################
+def gen_stimulus(test_dir, spec, seed=0):
+  width = spec["DATA_WIDTH"]
+  digits = (width + 3) // 4
+  rnd = random.Random(seed)
+  lines = ["# Generated by gen_data.py: {} words of {} bits".format(
+             spec["NUM_TRANS"], width),
+           "pause",
+           "timeout {} 0".format(spec["DONE_LATENCY"] + 16)]
+  lines += ["0x{:0{}x}".format(rnd.getrandbits(width), digits)
+            for _ in range(spec["NUM_TRANS"])]
+  lines.append("pause")
+  with open(os.path.join(test_dir, STIM_FILE), 'w') as stim:
+    stim.write("\n".join(lines) + "\n")
+
+################################################################################
+# Run a benchmark: unpause the master and wait until the slave answered every
+# transaction of the command file
+# tb       : top level testbench object
+# spec     : Test spec from read_spec()
+# test_dir : Test directory, RESULT_FILE is written there
+# Returns the result dict
+################################################################################
+def run_benchmark(tb, spec, test_dir):
+  num_trans = spec["NUM_TRANS"]
+  cycles_per_trans = spec["DONE_LATENCY"] + CYCLES_OVERHEAD
+  chunk = max(64, num_trans * cycles_per_trans // POLLS_PER_TEST)
+  budget = 2 * num_trans * cycles_per_trans + 1000
+  errors = []
+
+  sim_start = tb.tcon.now()
+  wall_start = time.time()
+  tb.tcon.write(REQ_SD_MASTER, SD_MASTER_CONTROL_REG, 1)
+
+  done = polls = cycles = 0
+  while done < num_trans and cycles < budget:
+    # Step by the estimated remaining time, at most one chunk
+    step = max(1, min(chunk, (num_trans - done) * cycles_per_trans))
+    tb.tcon.sync(step)
+    cycles += step
+    done = tb.tcon.read(REQ_SD_MASTER, SD_MASTER_DONE_COUNT_REG)
+    polls += 1
+
+  wall_s = time.time() - wall_start
+  sim_ns = tb.tcon.now() - sim_start
+
+  if done != num_trans:
+    errors.append("Master received {} of {} done pulses".format(done, num_trans))
+  slave_starts = tb.tcon.read(REQ_SD_SLAVE, SD_SLAVE_START_COUNT_REG)
+  if slave_starts != num_trans:
+    errors.append("Slave received {} of {} start pulses".format(slave_starts,
+                                                                num_trans))
+  for err in errors:
+    print("Error : " + err)
+
+  result = {
+    "test": os.path.basename(test_dir),
+    "num_trans": num_trans,
+    "data_width": spec["DATA_WIDTH"],
+    "done_latency": spec["DONE_LATENCY"],
+    "polls": polls,
+    "sim_ns": sim_ns,
+    "wall_s": wall_s,
+    # Wall clock throughput of the simulation
+    "trans_per_s": num_trans / wall_s if wall_s else None,
+    # Simulated interface throughput
+    "cycles_per_trans": sim_ns / CLK_PERIOD_NS / num_trans if num_trans else None,
+    # Simulated ns per wall clock second
+    "sim_ns_per_wall_s": sim_ns / wall_s if wall_s else None,
+    "errors": errors,
+  }
+  with open(os.path.join(test_dir, RESULT_FILE), 'w') as result_file:
+    json.dump(result, result_file, indent=2)
+  print("{} transactions, {:.3f} s wall, {} ns simulated, {:.0f} transactions/s"
+        .format(num_trans, wall_s, sim_ns, result["trans_per_s"] or 0))
+  return result
+
+################################################################################
+# TCON GPIO mapping
+################################################################################
+GPIO_RESET            = (1 << 0)
+
+
+class TopLevelTB(object):
+  """Start-done benchmark TB: tb_tcon_start_done and tb_tcon_start_done_slave
+  back to back"""
+  def __init__(self, tcon_inst: pytcon.Tcon):
+    self.tcon = tcon_inst
+    self.clocker = TconClocker(tcon_inst, req_no=REQ_CLOCKER)
+
+  def setup_environment(self):
+    #125Mhz clock
+    self.clocker.add_clock(0, 'clk', CLK_PERIOD_NS * 1000)
+    self.clocker.enable(0)
+
+    #GPIO outputs
+    self.tcon.gpio_set_as_outputs(GPIO_RESET)
+
+  def do_reset(self, duration: int):
+    self.tcon.gpio_set(GPIO_RESET)
+    self.tcon.sync(duration)
+    self.tcon.gpio_clr(GPIO_RESET)
+
+  def print_banner(self, test_dir: str, test_name: str, sections: str) -> None:
+    self.start_time = time.time()
+    print('*' * 40)
+    print('* {} - {}'.format(test_dir, test_name))
+    print('* Section(s) {} of testplan'.format(sections))
+    print('*' * 40)
+
+  def print_complete(self, words: int = None):
+    """Print the completion banner and the test's timing line
+
+    Args:
+        words: Number of transactions of the test, for the throughput
+               recorded in the regression timing database
+    """
+    x = self.tcon.now()
+    if x == 0:
+      print('*' * 40)
+      print('* ERROR - The simulation exited abnormally at t=0 !')
+      print('*' * 40)
+    else:
+      print('*' * 40)
+      print('* Testbench Completed Successfully at t={}us'.format(x / 1000.0))
+      print('*' * 40)
+    start = getattr(self, 'start_time', None)
+    print('RTLTIMING: ' + json.dumps({
+      'wall_s': time.time() - start if start else None,
+      'sim_time': x, 'sim_unit': 'ns', 'words': words}))
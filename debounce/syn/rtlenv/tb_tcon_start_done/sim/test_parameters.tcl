@@ -0,0 +1,18 @@
+#-------------------------------------------------------------------------------
+# Copyright (c) 2019 Schweitzer Engineering Laboratories, Inc.
+# SEL Confidential
+#
+# Start-done throughput benchmark. Test <L><W><N>_w<bits>_l<latency>_<count>:
+#   L (done latency): 1 = 0, 2 = 4, 3 = 16 clock cycles
+#   W (data width)  : 0 = 8, 1 = 32, 2 = 64 bits
+#   N (transactions): 0 = 8k, 1 = 32k, 2 = 128k
+# Every test writes bench_result.json; bench_summary.py collects them into
+# bench_summary.json.
+# pysim gives the pass/fail verdict from the transcripts (e.g. the 'Error : ...'
+# lines of a failed benchmark run).
+#-------------------------------------------------------------------------------
+
+dict set after_all_commands pass_fail {py -3 -m pysim -v -s -j . }
+dict set after_all_commands bench_summary {py -3 common/bench_summary.py . }
+
+RTL_sim_lib::auto_discover_tests
@@ -0,0 +1,154 @@
+--------------------------------------------------------------------------------
+-- Copyright (c) 2019 Schweitzer Engineering Laboratories, Inc.
+-- SEL Confidential
+-- Start-done throughput benchmark testbench. The start-done master and the
+-- start-done slave tb components are connected back to back; the slave
+-- answers every start pulse after DONE_LATENCY clock cycles and the master's
+-- dout is looped back into its din.
+--------------------------------------------------------------------------------
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+entity tb_tcon_start_done_tb is
+  generic
+  (
+    TEST_PREFIX  : string;
+    DATA_WIDTH   : positive := 32;
+    DONE_LATENCY : natural  := 0;
+    NUM_TRANS    : natural  := 8192  -- Length of the test's command file
+  );
+end entity tb_tcon_start_done_tb;
+
+architecture behav of tb_tcon_start_done_tb is
+  -- TCON REQ
+  constant REQ_CLOCKER    : natural := 0;
+  constant REQ_SD_MASTER  : natural := 1;
+  constant REQ_SD_SLAVE   : natural := 2;
+
+  -- TCON GPIOs
+  constant GPIO_RESET     : natural := 0;
+
+  -- Tcon signals
+  signal tcon_req         : std_logic_vector(31 downto 0);
+  signal tcon_ack         : std_logic;
+  signal tcon_err         : std_logic;
+  signal tcon_addr        : std_logic_vector(31 downto 0);
+  signal tcon_data        : std_logic_vector(31 downto 0);
+  signal tcon_rwn         : std_logic;
+  signal tcon_gpio        : std_logic_vector(15 downto 0);
+  alias reset             is tcon_gpio(GPIO_RESET);
+
+  -- CLK
+  signal clks             : std_logic_vector (0 downto 0);
+  alias clk               is clks(0);
+
+  -- Start-done interface
+  signal sd_start         : std_logic;
+  signal sd_done          : std_logic;
+  signal sd_data          : std_logic_vector(DATA_WIDTH-1 downto 0);
+
+begin
+  -----------------------------------------------------------------------------
+  -- TCON
+  -----------------------------------------------------------------------------
+  tcon_inst : entity work.tb_tcon
+  generic map
+  (
+    INST_NAME    => "tcon",
+    COMMAND_LINE => "py -3 -u " & TEST_PREFIX & "/tcon.py"
+  )
+  port map
+  (
+    tcon_clk  => clk,
+    tcon_req  => tcon_req,
+    tcon_ack  => tcon_ack,
+    tcon_err  => tcon_err,
+    tcon_addr => tcon_addr,
+    tcon_data => tcon_data,
+    tcon_rwn  => tcon_rwn,
+    tcon_gpio => tcon_gpio
+  );
+
+  -----------------------------------------------------------------------------
+  -- CLOCKER
+  -----------------------------------------------------------------------------
+  clocker : entity work.tb_tcon_clocker
+    generic map
+    (
+      NUM_CLOCKS => 1
+    )
+    port map
+    (
+      tcon_req  => tcon_req(REQ_CLOCKER),
+      tcon_ack  => tcon_ack,
+      tcon_err  => tcon_err,
+      tcon_addr => tcon_addr,
+      tcon_data => tcon_data,
+      tcon_rwn  => tcon_rwn,
+
+      clks    => clks
+    );
+
+  ------------------------------------------------------------------------------
+  -- Start-done master (UUT)
+  ------------------------------------------------------------------------------
+  sd_master : entity work.tb_tcon_start_done
+  generic map
+  (
+    DIN_WIDTH       => DATA_WIDTH,
+    DIN_FLAG_WIDTH  => 0,
+    DOUT_WIDTH      => DATA_WIDTH,
+    DOUT_FLAG_WIDTH => 0,
+    COMMAND_FILE    => TEST_PREFIX & "/sd_master.stim",
+    LOG_FILE        => TEST_PREFIX & "/sd_master.log"
+  )
+  port map
+  (
+    tcon_req  => tcon_req(REQ_SD_MASTER),
+    tcon_ack  => tcon_ack,
+    tcon_err  => tcon_err,
+    tcon_addr => tcon_addr,
+    tcon_data => tcon_data,
+    tcon_rwn  => tcon_rwn,
+
+    clk       => clk,
+    reset     => reset,
+    start     => sd_start,
+    done      => sd_done,
+    din       => sd_data,
+    dout      => sd_data,
+    unpause   => '0',
+    is_paused => open
+  );
+
+  ------------------------------------------------------------------------------
+  -- Start-done slave (UUT)
+  ------------------------------------------------------------------------------
+  sd_slave : entity work.tb_tcon_start_done_slave
+  generic map
+  (
+    DATA_WIDTH => DATA_WIDTH,
+    FLAG_WIDTH => 0,
+    LOG_FILE   => TEST_PREFIX & "/sd_slave.log"
+  )
+  port map
+  (
+    tcon_req  => tcon_req(REQ_SD_SLAVE),
+    tcon_ack  => tcon_ack,
+    tcon_err  => tcon_err,
+    tcon_addr => tcon_addr,
+    tcon_data => tcon_data,
+    tcon_rwn  => tcon_rwn,
+
+    clk       => clk,
+    reset     => reset,
+    start     => sd_start,
+    delay     => DONE_LATENCY,
+    done      => sd_done,
+    data      => sd_data,
+    unpause   => '0',
+    is_paused => open
+  );
+
+end architecture behav;
@@ -0,0 +1,293 @@
+#!/usr/bin/python3
+
+import os
+import re
+import sys
+import json
+import glob
+import time
+import socket
+import argparse
+import tempfile
+import socketserver
+from typing import Dict, List, Any, Tuple, Union
+import parser_classes as PC
+import templates_and_constants as TC
+
+# Unix domain sockets are not available on every platform (e.g. Windows
+# python builds), fall back to a localhost TCP port there
+HAS_AF_UNIX = hasattr(socket, "AF_UNIX")
+DEFAULT_ADDRESS = os.path.join(tempfile.gettempdir(), "tcon_infra.sock") \
+    if HAS_AF_UNIX else "127.0.0.1:48611"
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class ComponentState:
+    """In-memory generator state of one component: parsed entities (through
+    the shared EntityCache), the TB object with its generated mapping and the
+    rendered TB file. The TB is rebuilt only when one of the files it was
+    built from changed.
+
+    Args:
+        uutpath: Path to the component
+        cache: EntityCache shared by all components, holds the bus
+               configuration file
+    """
+    def __init__(self, uutpath: str, cache: PC.EntityCache) -> None:
+        self.uutpath = uutpath
+        self.uutname = os.path.basename(uutpath)
+        self.cache = cache
+        self.num_masters = 1
+        self.tb = None
+        self.tb_data = ""
+        self.stamps = None
+
+    def source_files(self) -> List[str]:
+        files = [os.path.join(self.uutpath, "src", f"{self.uutname}.vhd"),
+                 self.cache.config_file]
+        files += sorted(glob.glob(os.path.join(
+            self.uutpath, TC.TB_SRC_LOCATION, "*", "src", "*.vhd")))
+        return files
+
+    def current_stamps(self) -> Tuple:
+        return tuple((f, PC.file_stamp(f)) for f in self.source_files())
+
+    def refresh(self, num_masters: int=1) -> bool:
+        """Rebuild the TB if sources or options changed
+
+        Returns:
+            True if the TB was rebuilt
+        """
+        stamps = self.current_stamps()
+        if self.tb and stamps == self.stamps and \
+                num_masters == self.num_masters:
+            return False
+        tb = PC.TB(self.uutpath, self.uutname, num_masters, self.cache)
+        tb.generate_mapping()
+        self.tb_data = tb.render_tb()
+        self.tb = tb
+        self.stamps = stamps
+        self.num_masters = num_masters
+        return True
+
+
+class GeneratorService:
+    """JSON-RPC methods of the generator daemon. Every method takes the
+    component path as "component".
+
+    Args:
+        config_file: Bus configuration file, resolved once against the
+                     directory the daemon is started in
+    """
+    def __init__(self, config_file: str=TC.BUS_CFG_FILE) -> None:
+        self.config_file = os.path.abspath(config_file)
+        self.cache = PC.EntityCache(self.config_file)
+        self.components = dict()  # {abs path: ComponentState}
+        self.running = True
+
+    def __state(self, component: str) -> ComponentState:
+        uutpath = os.path.abspath(component)
+        if not os.path.isdir(uutpath):
+            raise ValueError(f"{component} is not a directory")
+        if uutpath not in self.components:
+            self.components[uutpath] = ComponentState(uutpath, self.cache)
+        return self.components[uutpath]
+
+    def regenerate_tb(self, component: str, write: bool=True,
+                      num_masters: int=1) -> Dict[str, Any]:
+        """Render the TB of component and patch its changed regions into the
+        TB file"""
+        state = self.__state(component)
+        rebuilt = state.refresh(num_masters)
+        written = False
+        if write:
+            # A TB without region markers is left alone, see patch_tb_file()
+            written = state.tb.patch_tb_file(state.tb_data)
+        return {"path": state.tb.tb_file_path, "rebuilt": rebuilt,
+                "written": written,
+                "tb": state.tb_data if not write else None}
+
+    def port_map(self, component: str, instance: str) -> Dict[str, Any]:
+        """Port map of an instance (uut, tcon_master, tb components) in the
+        generated TB"""
+        state = self.__state(component)
+        state.refresh(state.num_masters)
+        pattern = re.compile(rf"^\s*{re.escape(instance)}\s*:\s*entity",
+                             re.MULTILINE)
+        for section in state.tb.arch_def:
+            if pattern.search(section):
+                ports = re.findall(r"^\s*(\w+)\s*=>\s*([^,\s]+(?:\(\d+\))?)",
+                                   section.split("port map")[-1],
+                                   re.MULTILINE)
+                return {"instance": instance, "text": section.strip("\n"),
+                        "ports": [list(x) for x in ports]}
+        raise ValueError(f"No instance {instance} in the TB of "
+                         f"{state.uutname}")
+
+    def bus_of_port(self, component: str, port: str) -> Dict[str, Any]:
+        """Bus configuration entry the UUT port belongs to"""
+        state = self.__state(component)
+        state.refresh(state.num_masters)
+        for bus, entry in state.tb.uut.port_buses.items():
+            ports = [x.strip() for x in entry[PC.TB.IND_PORT_LIST] or []]
+            if port.strip() in ports:
+                dep = [x for x in state.tb.tb_deps if x.tb_bus_name == bus]
+                return {"port": port, "bus": bus,
+                        "bus_type": entry[PC.TB.IND_BUS_TYPE],
+                        "tb_entity": entry[PC.TB.IND_TB_ENTITY],
+                        "instance": entry[PC.TB.IND_INST_NAME],
+                        "tcon_master": dep[0].tcon_master_no if dep else None,
+                        "tcon_req": dep[0].tcon_req_no if dep else
+                        entry[PC.TB.IND_TCON_REQ]}
+        raise ValueError(f"{port} is not in {TC.BUS_CFG_FILE} of "
+                         f"{state.uutname}")
+
+    def invalidate(self, path: str="") -> Dict[str, Any]:
+        """Drop cached state for a file, or everything if path is empty"""
+        self.cache.invalidate(path)
+        for state in self.components.values():
+            if not path or os.path.abspath(path) in dict(state.stamps or ()):
+                state.tb = None
+        return {"invalidated": path or "all"}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"components": list(self.components.keys()),
+                "cached_files": len(self.cache.files()),
+                "hits": self.cache.hits, "misses": self.cache.misses}
+
+    def shutdown(self) -> Dict[str, Any]:
+        self.running = False
+        return {"shutdown": True}
+
+    METHODS = ["regenerate_tb", "port_map", "bus_of_port", "invalidate",
+               "stats", "shutdown"]
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        req_id = request.get("id")
+        method = request.get("method")
+        params = request.get("params") or {}
+        if method not in self.METHODS:
+            return error_response(req_id, METHOD_NOT_FOUND,
+                                  f"Unknown method {method}")
+        start = time.perf_counter()
+        try:
+            if isinstance(params, list):
+                result = getattr(self, method)(*params)
+            else:
+                result = getattr(self, method)(**params)
+        except TypeError as err:
+            return error_response(req_id, INVALID_PARAMS, str(err))
+        except (Exception, SystemExit) as err:
+            # get_filestring() exits on unreadable files
+            return error_response(req_id, INTERNAL_ERROR,
+                                  f"{type(err).__name__}: {err}")
+        result["ms"] = (time.perf_counter() - start) * 1e3
+        return {"jsonrpc": "2.0", "id": req_id, "result": result}
+
+
+def error_response(req_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": req_id,
+            "error": {"code": code, "message": message}}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Newline delimited JSON-RPC 2.0 requests, one response line each"""
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as err:
+                response = error_response(None, PARSE_ERROR, str(err))
+            else:
+                response = self.server.service.dispatch(request)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+            if not self.server.service.running:
+                break
+
+
+def make_server(address: str,
+                service: GeneratorService) -> socketserver.BaseServer:
+    if HAS_AF_UNIX and ":" not in address:
+        if os.path.exists(address):
+            os.remove(address)
+        server = socketserver.UnixStreamServer(address, RequestHandler)
+    else:
+        host, port = address.rsplit(":", 1)
+        socketserver.TCPServer.allow_reuse_address = True
+        server = socketserver.TCPServer((host, int(port)), RequestHandler)
+    server.service = service
+    return server
+
+
+def serve(address: str=DEFAULT_ADDRESS, config_file: str=TC.BUS_CFG_FILE):
+    service = GeneratorService(config_file)
+    server = make_server(address, service)
+    print(f"TCON infra generator daemon listening on {address}, bus "
+          f"configuration {service.config_file}")
+    try:
+        with server:
+            while service.running:
+                server.handle_request()
+    finally:
+        if HAS_AF_UNIX and ":" not in address and os.path.exists(address):
+            os.remove(address)
+
+
+def call(method: str, params: Union[Dict, List]=None,
+         address: str=DEFAULT_ADDRESS) -> Any:
+    """Send one request to the daemon and return its result
+
+    Example:
+        call("bus_of_port", {"component": "debounce", "port": "out_rts"})
+    """
+    if HAS_AF_UNIX and ":" not in address:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address)
+    else:
+        host, port = address.rsplit(":", 1)
+        sock = socket.create_connection((host, int(port)))
+    request = {"jsonrpc": "2.0", "id": 1, "method": method,
+               "params": params or {}}
+    with sock, sock.makefile("rwb") as stream:
+        stream.write(json.dumps(request).encode() + b"\n")
+        stream.flush()
+        response = json.loads(stream.readline())
+    if "error" in response:
+        raise RuntimeError(response["error"]["message"])
+    return response["result"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="""
+        Long-lived TCON infrastructure generator. Keeps parsed entities, bus
+        configurations and rendered TBs in memory and answers JSON-RPC 2.0
+        requests (one JSON object per line) on a local socket. Methods:
+        regenerate_tb(component, write=true, num_masters=1),
+        port_map(component, instance), bus_of_port(component, port),
+        invalidate(path=""), stats(), shutdown()""")
+
+    parser.add_argument('-a', '--address', type=str, default=DEFAULT_ADDRESS,
+                        help="Unix socket path, or host:port for TCP")
+    parser.add_argument('-c', '--config', type=str, default=TC.BUS_CFG_FILE,
+                        help="Bus configuration file, default: "
+                        f"{TC.BUS_CFG_FILE} in the current directory")
+    parser.add_argument('--call', type=str, nargs=2,
+                        metavar=("METHOD", "PARAMS"),
+                        help="Send one request (PARAMS as JSON) to a running "
+                        "daemon and print the result")
+
+    args = parser.parse_args()
+    if args.call:
+        method, params = args.call
+        print(json.dumps(call(method, json.loads(params), args.address),
+                         indent=2))
+        sys.exit(0)
+    serve(args.address, args.config)
@@ -0,0 +1,149 @@
+import io
+import json
+import time
+import pstats
+import cProfile
+import functools
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Callable
+import parser_classes as PC
+
+# Functions/methods of parser_classes whose calls are counted and timed when
+# profiling. Entries are (owner attribute path, function name).
+INSTRUMENTED = [
+    ("", "get_filestring"),
+    ("", "assign_buses"),
+    ("", "get_instance_name"),
+    ("", "get_entity_from_file"),
+    ("", "find_matching_ports"),
+    ("", "direction_match"),
+    ("ParserType", "__init__"),
+    ("Port_Generic", "__init__"),
+    ("Entity", "__init__"),
+    ("Entity", "find_matching_ports"),
+    ("TB", "_TB__associate_bus_port"),
+    ("TB", "_TB__connect_tb_component"),
+    ("TB", "create_typical_map"),
+]
+
+
+class Profiler:
+    """Collect per-phase wall time, call counts of the generator's hot
+    functions and optionally cProfile statistics and tracemalloc snapshots
+    for a TB generation run.
+
+    Args:
+        use_cprofile: Run cProfile while any phase is active
+        use_tracemalloc: Track memory allocations while any phase is active
+
+    Example:
+        prof = Profiler()
+        with prof.instrumented():
+            with prof.phase("tb_init"):
+                tb = PC.TB(uutpath, uutname)
+        prof.report()
+    """
+    def __init__(self, use_cprofile: bool=False,
+                 use_tracemalloc: bool=False) -> None:
+        self.phases = OrderedDict()  # name: [seconds, count]
+        self.calls = OrderedDict()  # name: [count, seconds]
+        self.cprofile = cProfile.Profile() if use_cprofile else None
+        self.use_tracemalloc = use_tracemalloc
+        self.mem_peak = 0
+        self.mem_top = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a generation phase. Phases with the same name accumulate"""
+        if self.cprofile:
+            self.cprofile.enable()
+        if self.use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.cprofile:
+                self.cprofile.disable()
+            entry = self.phases.setdefault(name, [0.0, 0])
+            entry[0] += elapsed
+            entry[1] += 1
+
+    def __wrap(self, name: str, func: Callable) -> Callable:
+        entry = self.calls.setdefault(name, [0, 0.0])
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                entry[0] += 1
+                entry[1] += time.perf_counter() - start
+        return wrapper
+
+    @contextmanager
+    def instrumented(self) -> Iterator[None]:
+        """Count calls of the INSTRUMENTED parser_classes functions for the
+        duration of the block"""
+        originals = []
+        for owner_name, func_name in INSTRUMENTED:
+            owner = getattr(PC, owner_name) if owner_name else PC
+            func = getattr(owner, func_name)
+            label = f"{owner_name}.{func_name}" if owner_name else func_name
+            originals.append((owner, func_name, func))
+            setattr(owner, func_name, self.__wrap(label, func))
+        try:
+            yield
+        finally:
+            for owner, func_name, func in originals:
+                setattr(owner, func_name, func)
+            if tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                self.mem_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.mem_top = [str(stat) for stat in
+                                snapshot.statistics("lineno")[:10]]
+
+    def cprofile_stats(self, top: int=25) -> str:
+        if not self.cprofile:
+            return ""
+        out = io.StringIO()
+        stats = pstats.Stats(self.cprofile, stream=out)
+        stats.sort_stats("cumulative").print_stats(top)
+        return out.getvalue()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"phases": {k: {"seconds": v[0], "count": v[1]}
+                           for k, v in self.phases.items()},
+                "calls": {k: {"count": v[0], "seconds": v[1]}
+                          for k, v in self.calls.items() if v[0]},
+                "mem_peak_bytes": self.mem_peak,
+                "mem_top": self.mem_top}
+
+    def report(self) -> str:
+        lines = ["", "Generation profile", f"  {'phase':<28}{'ms':>12}"]
+        total = 0.0
+        for name, (seconds, _) in self.phases.items():
+            total += seconds
+            lines.append(f"  {name:<28}{seconds * 1e3:>12.3f}")
+        lines.append(f"  {'total':<28}{total * 1e3:>12.3f}")
+        lines += ["", f"  {'function':<28}{'calls':>10}{'ms':>12}"]
+        for name, (count, seconds) in self.calls.items():
+            if count:
+                lines.append(f"  {name:<28}{count:>10}{seconds * 1e3:>12.3f}")
+        if self.use_tracemalloc:
+            lines += ["", f"  peak traced memory: {self.mem_peak} bytes"]
+            lines += [f"    {stat}" for stat in self.mem_top]
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        """Write the profile to path as JSON. cProfile data, when collected,
+        goes to <path>.prof for use with pstats/snakeviz"""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        if self.cprofile:
+            self.cprofile.dump_stats(f"{path}.prof")
@@ -0,0 +1,161 @@
+import os
+import glob
+import time
+from typing import Dict, List, Tuple
+import parser_classes as PC
+import templates_and_constants as TC
+
+
+class Watcher:
+    """Regenerate the TB of a component whenever its sources change. The
+    component's src/*.vhd, the bus configuration file and the tb components
+    in syn/rtlenv/*/src are polled; a burst of changes is coalesced into one
+    rebuild once the files have been quiet for the settle time.
+
+    Only the affected work is redone: entities come from an EntityCache, so
+    unchanged files are not reparsed, an edit of the UUT file that leaves its
+    entity declaration alone only refreshes tb_info.py, and tb component
+    port associations are memoized per bus, so only buses whose configuration
+    lines changed are associated again. Only changed generated regions of
+    the TB file are patched (atomically, keeping user code outside the
+    markers); there is no overwrite prompt. A TB file without markers (made
+    by an older generator) is left alone, regenerate it once with
+    create_tcon_infra.py to add them.
+
+    Args:
+        uutpath: Path to the component
+        num_masters: Number of TCON masters, see TB
+        interval: Polling interval in seconds
+        settle: Quiet time in seconds that ends a burst of changes
+
+    Example:
+        Watcher(uutpath).run()
+    """
+    def __init__(self, uutpath: str, num_masters: int=1,
+                 interval: float=0.5, settle: float=0.3) -> None:
+        self.uutpath = uutpath
+        self.uutname = os.path.basename(uutpath)
+        self.uut_file = os.path.join(uutpath, "src", f"{self.uutname}.vhd")
+        self.config_file = os.path.abspath(TC.BUS_CFG_FILE)
+        self.num_masters = num_masters
+        self.interval = interval
+        self.settle = settle
+        self.cache = PC.EntityCache()
+        self.entity_sig = None
+        self.bus_sig = dict()
+        self.rebuilds = 0
+
+    def watched_files(self) -> List[str]:
+        files = glob.glob(os.path.join(self.uutpath, "src", "*.vhd"))
+        files += glob.glob(os.path.join(self.uutpath, TC.TB_SRC_LOCATION,
+                                        "*", "src", "*.vhd"))
+        files.append(self.config_file)
+        return sorted(files)
+
+    def snapshot(self) -> Dict[str, Tuple]:
+        return {f: PC.file_stamp(f) for f in self.watched_files()}
+
+    def entity_signature(self) -> str:
+        """Entity declaration of the UUT with comments and whitespace
+        normalized"""
+        filestring = PC.get_filestring(self.uut_file)
+        return PC.ParserType("entity", filestring, self.uutname).string
+
+    def bus_signature(self) -> Dict[str, Tuple]:
+        buses = PC.assign_buses(self.config_file) or {}
+        return {bus: tuple(tuple(x) if isinstance(x, list) else x
+                           for x in entry)
+                for bus, entry in buses.items()}
+
+    def wait_for_change(self, snapshot: Dict[str, Tuple]) -> Tuple[
+            Dict[str, Tuple], List[str]]:
+        """Block until files changed and then stayed quiet for the settle
+        time
+
+        Returns:
+            New snapshot and list of changed files
+        """
+        while True:
+            time.sleep(self.interval)
+            current = self.snapshot()
+            if current != snapshot:
+                break
+        changed = set()
+        while current != snapshot:
+            changed |= {f for f in set(current) | set(snapshot)
+                        if current.get(f) != snapshot.get(f)}
+            snapshot = current
+            time.sleep(self.settle)
+            current = self.snapshot()
+        return current, sorted(changed)
+
+    def rebuild(self, changed: List[str]=None) -> bool:
+        """Regenerate the TB for a set of changed files
+
+        Returns:
+            True if the TB file was written
+        """
+        start = time.perf_counter()
+        if changed is not None:
+            for filename in changed:
+                self.cache.invalidate(filename)
+
+        if changed is not None and os.path.abspath(self.uut_file) in \
+                [os.path.abspath(x) for x in changed]:
+            entity_sig = self.entity_signature()
+            if entity_sig == self.entity_sig and len(changed) == 1:
+                # Architecture signals and package constants of the UUT file
+                # still feed tb_info.py
+                tb = PC.TB(self.uutpath, self.uutname, self.num_masters,
+                           self.cache)
+                info = "updated" if tb.generate_tb_info() else "unchanged"
+                print(f"[{time.strftime('%H:%M:%S')}] Entity of "
+                      f"{self.uutname} unchanged, TB not affected, "
+                      f"tb_info.py {info}")
+                return False
+            self.entity_sig = entity_sig
+        elif self.entity_sig is None:
+            self.entity_sig = self.entity_signature()
+
+        bus_sig = self.bus_signature()
+        changed_buses = [bus for bus in set(bus_sig) | set(self.bus_sig)
+                         if bus_sig.get(bus) != self.bus_sig.get(bus)]
+        self.bus_sig = bus_sig
+
+        tb = PC.TB(self.uutpath, self.uutname, self.num_masters, self.cache)
+        tb.generate_mapping()
+        tb_data = tb.render_tb()
+        written = tb.patch_tb_file(tb_data)
+        if written:
+            tb.generate_sim_common()
+        if written is not None:
+            tb.generate_wave_lists()
+            tb.generate_tb_info()
+        self.rebuilds += 1
+        elapsed = (time.perf_counter() - start) * 1e3
+        buses = ", ".join(str(x) for x in changed_buses if x) or "none"
+        print(f"[{time.strftime('%H:%M:%S')}] "
+              f"{'Updated' if written else 'Unchanged'} {tb.tb_file_path} "
+              f"({elapsed:.1f} ms, changed buses: {buses})")
+        return written
+
+    def run(self):
+        """Build once and then rebuild on every change until interrupted"""
+        print(f"Watching {self.uutpath} (Ctrl-C to stop)")
+        snapshot = self.snapshot()
+        self.rebuild()
+        try:
+            while True:
+                snapshot, changed = self.wait_for_change(snapshot)
+                for filename in changed:
+                    print(f"  changed: {os.path.relpath(filename)}")
+                try:
+                    self.rebuild(changed)
+                except (Exception, SystemExit) as err:
+                    # Sources can be inconsistent mid-edit (e.g. a config line
+                    # for a port not yet in the entity); get_filestring()
+                    # exits on unreadable files
+                    PC.log.error("Rebuild failed (%s: %s), waiting for next "
+                                 "change", type(err).__name__, err)
+        except KeyboardInterrupt:
+            print(f"Stopped after {self.rebuilds} rebuilds")
@@ -2,11 +2,17 @@ import re
 import logging
 import os
 import copy
+import hashlib
+import shutil
+import tempfile
 from collections import OrderedDict
+from contextlib import contextmanager
 from inspect import currentframe
 from datetime import datetime
 import templates_and_constants as TC
-from typing import Union, Dict, Tuple, List, Any, OrderedDict, Optional
+import vhdl_expr
+from typing import (Union, Dict, Tuple, List, Any, OrderedDict, Optional,
+                    Iterator)
 from datetime import date
 
 # Setup logging
@@ -18,6 +24,24 @@ log.addHandler(console)  # prints to console.
 log.setLevel(logging.WARN)  # anything ERROR or above
 
 
+@contextmanager
+def log_scope(level: int) -> Iterator[None]:
+    """Lower the logging threshold to level for the duration of a block and
+    restore the caller's level afterwards. Never raises the threshold, so a
+    more verbose user setting is kept.
+
+    Args:
+        level : logging level to apply inside the block
+    """
+    previous = log.level
+    if level < previous:
+        log.setLevel(level)
+    try:
+        yield
+    finally:
+        log.setLevel(previous)
+
+
 def get_filestring(filename: str, parser: Any=None) -> str:
 
     lines_without_comments = ""
@@ -39,6 +63,160 @@ def get_filestring(filename: str, parser: Any=None) -> str:
     return filestring
 
 
+def write_file_atomic(filename: str, data: str) -> bool:
+    """Write data to filename through a temporary file in the same directory
+    and an atomic rename, so readers never see a partially written file. The
+    file is left untouched (contents and mtime) if it already holds data, and
+    keeps its permissions when it is replaced.
+
+    Args:
+        filename : File to create/replace
+        data : New contents
+
+    Returns:
+        True if the file was written, False if it was already up to date
+    """
+    try:
+        with open(filename, "r") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    dirname = os.path.dirname(os.path.abspath(filename))
+    fd, tmpname = tempfile.mkstemp(dir=dirname, prefix=".tmp_",
+                                   suffix=os.path.basename(filename))
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        # mkstemp creates the file with mode 0600: keep the mode of the
+        # replaced file, or the one open() would give a new file
+        if os.path.exists(filename):
+            shutil.copymode(filename, tmpname)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmpname, 0o666 & ~umask)
+        os.replace(tmpname, filename)
+    except BaseException:
+        os.remove(tmpname)
+        raise
+    return True
+
+
+# Generated regions of the TB file are wrapped in these markers. The hash is
+# the one of the generated region contents, so patching can tell which
+# regions changed. Anything outside the markers belongs to the user
+REGION_BEGIN = "-- @gen-begin"
+REGION_END = "-- @gen-end"
+REGION_RE = re.compile(rf"^[ \t]*{REGION_BEGIN} (\S+) ([0-9a-f]+)[ \t]*\n"
+                       rf".*?^[ \t]*{REGION_END} \1[ \t]*\n",
+                       re.MULTILINE | re.DOTALL)
+# Regions that are always generated ahead of the architecture body
+DECL_REGIONS = ["entity", "constants", "signals"]
+
+
+def region_hash(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def mark_region(name: str, text: str, lfill: str="") -> str:
+    """Wrap generated text in region markers
+
+    Arguments:
+        name -- Unique region name (e.g., signals, uut, instance names)
+        text -- Generated VHDL
+        lfill -- Indentation of the marker comments
+
+    Returns:
+        Marked region, ending with a new line
+    """
+    newline = "" if text.endswith("\n") else "\n"
+    return (f"{lfill}{REGION_BEGIN} {name} {region_hash(text)}\n{text}"
+            f"{newline}{lfill}{REGION_END} {name}\n")
+
+
+def parse_regions(text: str) -> OrderedDict:
+    """Find the marked regions of a file
+
+    Returns:
+        OrderedDict of region name to (hash, full region text)
+    """
+    return OrderedDict((m.group(1), (m.group(2), m.group(0)))
+                       for m in REGION_RE.finditer(text))
+
+
+def patch_regions(old: str, new: str) -> str:
+    """Bring the marked regions of old up to date with the ones in new.
+    Regions whose hash did not change keep their current text, changed ones
+    are replaced, regions missing from new are removed and new regions are
+    inserted next to their neighbours. Text outside the regions is kept.
+
+    Arguments:
+        old -- Current file contents with region markers
+        new -- Freshly rendered file contents with region markers
+
+    Returns:
+        Patched file contents (equal to old if no region changed)
+
+    Raises:
+        ValueError if old has no region markers
+    """
+    old_regions = parse_regions(old)
+    if not old_regions:
+        raise ValueError("no generated region markers found")
+    new_regions = parse_regions(new)
+    result = old
+    current = dict()  # region name: its text in result
+    for name, (_, block) in old_regions.items():
+        if name in new_regions:
+            current[name] = block
+        else:
+            # Drop the region together with its separating blank line
+            start = result.index(block)
+            end = start + len(block)
+            if result[end:end + 1] == "\n":
+                end += 1
+            result = result[:start] + result[end:]
+
+    names = list(new_regions.keys())
+    for index, name in enumerate(names):
+        new_hash, new_block = new_regions[name]
+        if name in current:
+            if old_regions[name][0] != new_hash:
+                result = result.replace(current[name], new_block, 1)
+                current[name] = new_block
+            continue
+        # Insert before the next existing region of the same kind, else
+        # after the previous one
+        kind = name in DECL_REGIONS
+        same = [x for x in names if (x in DECL_REGIONS) == kind]
+        pos = same.index(name)
+        following = [x for x in same[pos + 1:] if x in current]
+        preceding = [x for x in same[:pos] if x in current]
+        if following:
+            at = result.index(current[following[0]])
+            insert = new_block + "\n"
+        elif preceding:
+            at = result.index(current[preceding[-1]]) + \
+                len(current[preceding[-1]])
+            insert = "\n" + new_block
+        else:
+            at = result.rindex("\nend ") + 1
+            insert = new_block + "\n"
+        result = result[:at] + insert + result[at:]
+        current[name] = new_block
+    return result
+
+
+def file_stamp(filename: str) -> Tuple:
+    """(mtime_ns, size) of a file, or None values if it does not exist"""
+    try:
+        stat = os.stat(filename)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return (None, None)
+
+
 def assign_buses(fname: str) -> Union[OrderedDict, None]:
     bus_cfg = OrderedDict()
     try:
@@ -119,9 +297,8 @@ def get_instance_name(bus: str, ports: List) -> Union[str, None]:
     """
     inst_name = ""
     for bus_id, pos_ids in TC.TB_MAP_KEYS.items():
-        # log.setLevel(logging.DEBUG)
         if bus.startswith(bus_id):
-            log.info(f"{bus_id} {pos_ids}")
+            log.debug("%s %s", bus_id, pos_ids)
             for pos_id in pos_ids:
                 for port in ports:
                     if (f"_{pos_id.lower()}" in port or
@@ -129,8 +306,6 @@ def get_instance_name(bus: str, ports: List) -> Union[str, None]:
                              TC.SUPPORTED_BUSSES)):
                         temp = port.strip().split(pos_id.lower())[0]
                         prefix = temp if temp else f"{port.strip()}_"
-                        # log.info(f"{bus_id}, {temp}, {prefix}")
-                        log.setLevel(logging.ERROR)
                         if bus_id == "SAIFM":
                             inst_name = f"{prefix}saif_slave"
                             return inst_name
@@ -235,6 +410,73 @@ def sig_assignment(lfill: str, left: str, right: str) -> str:
     return f"{lfill}{left} <= {right};"
 
 
+def range_width(datatype: str, vrange: str,
+                values: Optional[Dict[str, int]]=None) -> Optional[int]:
+    """Width in bits of a port or signal type
+
+    Args:
+        datatype : VHDL datatype, e.g. std_logic_vector
+        vrange : VHDL range as parsed by Port_Generic, e.g. (7 downto 0)
+        values : Generic and constant values the range may use, see
+                 Entity.generic_values()
+
+    Returns:
+        Number of bits, None for non-vector types and ranges that cannot be
+        resolved from values
+    """
+    return vhdl_expr.type_width(datatype, vrange, values)
+
+
+def package_constants(filestring: str,
+                      packages: Optional[List[str]]=None) -> OrderedDict:
+    """Constants declared in the packages of a VHDL file
+
+    Args:
+        filestring : VHDL source as returned by get_filestring()
+        packages : Package names to look at (all if None)
+
+    Returns:
+        OrderedDict of constant name to default expression, in declaration
+        order
+    """
+    constants = OrderedDict()
+    for name, decl in re.findall(r"package (\w+) is (.+?) end(?: package)?"
+                                 r"(?: \1)?;", filestring, re.IGNORECASE):
+        if packages is not None and name.lower() not in packages:
+            continue
+        for names, expr in re.findall(r"constant ([^:;]+):[^;]+?:=([^;]+);",
+                                      decl, re.IGNORECASE):
+            for const in names.split(","):
+                constants[const.strip()] = expr.strip()
+    return constants
+
+
+def used_packages(filestring: str) -> List[str]:
+    """Names of the work library packages a VHDL file uses, in lower case"""
+    return [x.lower() for x in
+            re.findall(r"use work\.(\w+)\.all", filestring, re.IGNORECASE)]
+
+
+def arch_signals(filestring: str, entity: str) -> List["Port_Generic"]:
+    """Signals declared in the architecture of entity
+
+    Args:
+        filestring : VHDL source as returned by get_filestring()
+        entity : Entity name the architecture belongs to
+
+    Returns:
+        list of Port_Generic objects, one per signal name
+    """
+    if not re.search(rf"architecture \S+ of {entity} is", filestring):
+        return []
+    decl = ParserType("architecture", filestring, entity).string["arch_decl"]
+    signals = []
+    for names, fulltype in re.findall(r"signal ([^:;]+):([^;]+);", decl):
+        for name in names.split(","):
+            signals.append(Port_Generic(f"{name.strip()} : {fulltype}"))
+    return signals
+
+
 class ParserType:
     def __init__(self, globtype: str, glob, name: str="") -> None:
         """
@@ -358,6 +600,10 @@ class Port_Generic:
     def __init__(self, entrystring: str) -> None:
         self.name, self.direc, self.datatype, self.range, self.default = \
             self.__get_typevalues(entrystring)
+        # Width in bits, see Entity.resolve_widths(). Until then only literal
+        # ranges are known
+        self.width = range_width(self.datatype, self.range) \
+            if self.name else None
 
     def __get_typevalues(self, entrystring: str) -> Tuple:
         """Finds default value provided for a generic or a port.
@@ -427,8 +673,8 @@ class Port_Generic:
             else:
                 range = ""
 
-            log.info(f"name: {name}, direc: {direc}, datatype: {datatype}, "
-                     f"range: {range}, default:{default}\n")
+            log.debug("name: %s, direc: %s, datatype: %s, range: %s, "
+                      "default:%s", name, direc, datatype, range, default)
 
             return name, direc, datatype, range, default
         else:
@@ -512,6 +758,7 @@ class Entity:
         self.tb_bus_name = ""
         self.tb_bus_type = ""
         self.tcon_req_no = ""
+        self.resolve_widths()
 
     def __get_entries(self, parserobject: ParserType) -> List[Port_Generic]:
         """Extract entry members of a port or a generic like name of the port,
@@ -539,7 +786,7 @@ class Entity:
         """
         if entries:
             max_len = max([len(entry.name) for entry in entries])
-            log.info(f"{max_len}  {self.name}")
+            log.debug("%s  %s", max_len, self.name)
             for entry in entries:
                 entry.name = entry.name + (max_len - len(entry.name) + 1) * " "
         return entries
@@ -583,6 +830,62 @@ class Entity:
                     names.append((port.name.strip(), port.direc))
         return names
 
+    def generic_values(self, constants: Optional[Dict[str, int]]=None,
+                       overrides: Optional[Dict[str, int]]=None
+                       ) -> Dict[str, int]:
+        """Values of the generics that can be resolved statically
+
+        Args:
+            constants : Package constant values the defaults may use
+            overrides : Generic values replacing the defaults, e.g. from
+                        vhdl_expr.read_sim_params()
+
+        Returns:
+            dict of upper case generic and constant name to value
+        """
+        return vhdl_expr.resolve(((x.name, x.default)
+                                  for x in self.generics or []),
+                                 constants, overrides)
+
+    def resolve_widths(self, values: Optional[Dict[str, int]]=None
+                       ) -> OrderedDict:
+        """Set the width of every port from generic and constant values
+
+        Args:
+            values : See generic_values(). Default: the generic defaults
+
+        Returns:
+            OrderedDict of port name to width in bits (None if unresolved)
+        """
+        if values is None:
+            values = self.generic_values()
+        for port in self.ports or []:
+            port.width = range_width(port.datatype, port.range, values)
+        return OrderedDict((x.name.strip(), x.width)
+                           for x in self.ports or [])
+
+    def stim_file(self) -> Optional[str]:
+        """Command file name the TB passes to this component
+
+        Returns:
+            File name relative to the test folder, None if the component
+            has no command file generic
+        """
+        if any(x.name.strip() in TC.MATCH_CMD_FILE for x in self.generics):
+            return f"{self.inst_name}{TC.STIM_FILE_EXT}"
+        return None
+
+    def log_file(self) -> Optional[str]:
+        """Log file name the TB passes to this component
+
+        Returns:
+            File name relative to the test folder, None if the component
+            has no log file generic
+        """
+        if any(x.name.strip() in TC.MATCH_LOG_FILE for x in self.generics):
+            return f"{self.inst_name}{TC.LOG_FILE_EXT}"
+        return None
+
     def generic_map_template(self, fill_before: str="", def_gen: str="",
                              port_list: List=[]) -> str:
         """Creates a template generic map with all generics of this component
@@ -603,9 +906,9 @@ class Entity:
         map_str = ""
         for generic in self.generics:
             if generic.name.strip() in TC.MATCH_CMD_FILE:
-                gen_value = f'{def_gen} & "/{self.inst_name}.stim"'
+                gen_value = f'{def_gen} & "/{self.stim_file()}"'
             elif generic.name.strip() in TC.MATCH_LOG_FILE:
-                gen_value = f'{def_gen} & "/{self.inst_name}.log"'
+                gen_value = f'{def_gen} & "/{self.log_file()}"'
             elif generic.name.strip() in TC.MATCH_AWIDTH:
                 port_name = find_matching_ports(TC.MATCH_ADDR, port_list)
                 gen_value = f"{port_name}'length"
@@ -660,7 +963,10 @@ class TB:
     IND_TCON_REQ = 3  # Tcon request number
     IND_BUS_TYPE = 4  # Bus type for the tb component
 
-    def __init__(self, uutpath: str, uutname: str) -> None:
+    def __init__(self, uutpath: str, uutname: str,
+                 num_masters: int=1,
+                 cache: Optional["EntityCache"]=None,
+                 config_file: Optional[str]=None) -> None:
         self.tb_comp_path = os.path.abspath(os.path.join(uutpath,
                                             TC.TB_SRC_LOCATION))
         self.uutpath = uutpath
@@ -678,14 +984,26 @@ class TB:
         # List that contains already defined signals and constants in the TB
         # architecture
         self.already_defined = list()
+        # Optional EntityCache shared between TB objects (generator daemon)
+        self.cache = cache
+        # Bus configuration file, the cache's one if a cache is given
+        self.config_file = config_file or (cache.config_file if cache is not None
+                                           else TC.BUS_CFG_FILE)
+        # (name, direction) of all UUT ports, key part of memoized bus maps
+        self.uut_signature = None
         # Entity object for tcon master entity from tb_tcon component diretory
         # in syn\rtlenv
-        self.tcon_master = get_entity_from_file(self.tb_comp_path, "tb_tcon")
-        self.uut = get_entity_from_file(uutpath, "")
+        self.tcon_master = get_entity_from_file(self.tb_comp_path, "tb_tcon",
+                                                cache, self.config_file)
+        self.uut = get_entity_from_file(uutpath, "", cache, self.config_file)
         self.uut.inst_name = "uut"
         # List of Entity objects for tb components
         # used by this testbench
         self.tb_deps = self.__get_tb_deps()  # List of Entity objects
+        # Number of tb_tcon instances the tb components are spread across
+        self.num_masters = max(1, num_masters)
+        if self.num_masters > 1:
+            self.__assign_tcon_masters()
         self.tb_entity = self.__create_tb_entity()
         self.sanity_check_passed = True
 
@@ -725,7 +1043,7 @@ class TB:
     def create_typical_map(self, obj_list: List[Port_Generic],
                            fill_before: str=TC.TB_ENTITY_FILL,
                            prefix: str="", just_tcon: bool=False,
-                           req_no: int=0) -> str:
+                           req_no: int=0, tcon_suffix: str="") -> str:
         """Creates a typical port/generic port map when there are no special
         mapping requirements
 
@@ -734,6 +1052,8 @@ class TB:
             fill_before -- Spaces to fill before port map
             prefix -- The prefix string to be appended to all non-tcon
                       port name
+            tcon_suffix -- Suffix of the TCON master signals the tcon ports
+                           are mapped to
 
         Keyword Arguments:
             fill_before -- Additional space to fill before the mapping
@@ -748,9 +1068,11 @@ class TB:
                 if "tcon_" in obj.name:
 
                     if "tcon_req" in obj.name:
-                        name = f"{obj.name.strip()}({req_no})"
+                        name = f"{obj.name.strip()}{tcon_suffix}({req_no})"
                     else:
-                        name = f"{obj.name} "
+                        name = obj.name.replace(obj.name.strip(),
+                                                obj.name.strip() + tcon_suffix,
+                                                1) + " "
                 else:
                     name = f"{prefix}{obj.name}"
                 # Mapping is create when
@@ -814,15 +1136,51 @@ class TB:
         for bus_name, bus_desc in self.uut.port_buses.items():
             if bus_name:
                 def_tb_file = bus_desc[self.IND_TB_ENTITY]
-                entity = get_entity_from_file(self.tb_comp_path, def_tb_file)
+                entity = get_entity_from_file(self.tb_comp_path, def_tb_file,
+                                              self.cache, self.config_file)
                 entity.inst_name = bus_desc[self.IND_INST_NAME]
                 entity.tb_bus_name = bus_name
                 entity.tb_bus_type = bus_desc[self.IND_BUS_TYPE]
                 entity.tcon_req_no = bus_desc[self.IND_TCON_REQ]
+                entity.tcon_master_no = 0
                 deplist.append(entity)
 
         return deplist
 
+    def __assign_tcon_masters(self):
+        """Spread the tb components round robin across the TCON masters.
+        Components of non-supported bus types (clocker) stay on master 0,
+        whose script sets up clocks and reset. Request numbers restart at 0 on
+        every master
+
+        Returns:
+            Updates tcon_master_no and tcon_req_no of the tb_deps entities
+        """
+        next_req = [0] * self.num_masters
+        slot = 0
+        for entity in self.tb_deps:
+            if entity.tb_bus_type in TC.SUPPORTED_BUSSES:
+                master = slot % self.num_masters
+                slot += 1
+            else:
+                master = 0
+            entity.tcon_master_no = master
+            entity.tcon_req_no = next_req[master]
+            next_req[master] += 1
+            log.info("%s on TCON master %s request %s", entity.inst_name,
+                     master, entity.tcon_req_no)
+
+    def tcon_suffix(self, master: int) -> str:
+        """Suffix of the signal names of a TCON master. Empty for single
+        master TBs to keep the plain tcon_* names"""
+        return f"_{master}" if self.num_masters > 1 else ""
+
+    def tcon_master_inst(self, master: int) -> str:
+        return TC.TCON_MASTER_INST + self.tcon_suffix(master)
+
+    def tcon_script(self, master: int) -> str:
+        return f"tcon{self.tcon_suffix(master)}.py"
+
     def __get_entity_from_tb_dep(self, ent_name: str) -> Union[Entity, None]:
         """Get the entity object from tb_dependency list
 
@@ -887,45 +1245,53 @@ class TB:
             3) Updates already_listed member with signals that are not already
                declared
         """
-        INST_NAME = "tcon_master"
-        CMD = '"py -u " & TEST_PREFIX & "/tcon.py"'
-        generic_map = list()
-        port_map = list()
-        generic_map.append(generic_map_entry(TC.TB_DEP_FILL, "INST_NAME   ",
-                                             f'"{INST_NAME}"', False))
-        generic_map.append(generic_map_entry(TC.TB_DEP_FILL, "COMMAND_LINE",
-                                             CMD, True))
-
-        decl_hdr = "  -- TCON master signals"
-        self.arch_decl.append(f"{decl_hdr}\n  {'-'*len(decl_hdr.strip())} \n")
-        for port in self.tcon_master.ports:
-            if port.range:
-                portrange = f"({port.range})"
-            else:
-                if "_gpio" in port.name:
-                    portrange = "(15 downto 0)"
-                elif "_vector" in port.datatype:
-                    portrange = "(31 downto 0)"
+        for master in range(self.num_masters):
+            suffix = self.tcon_suffix(master)
+            INST_NAME = self.tcon_master_inst(master)
+            CMD = TC.TCON_MASTER_CMD.format(self.tcon_script(master))
+            generic_map = list()
+            port_map = list()
+            generic_map.append(generic_map_entry(TC.TB_DEP_FILL,
+                                                 "INST_NAME   ",
+                                                 f'"{INST_NAME}"', False))
+            generic_map.append(generic_map_entry(TC.TB_DEP_FILL,
+                                                 "COMMAND_LINE", CMD, True))
+
+            decl_hdr = f"  -- TCON master{suffix.replace('_', ' ')} signals"
+            self.arch_decl.append(f"{decl_hdr}\n  "
+                                  f"{'-'*len(decl_hdr.strip())} \n")
+            for port in self.tcon_master.ports:
+                if port.range:
+                    portrange = f"({port.range})"
                 else:
-                    portrange = ""
-
-            fulldatatype = f"{port.datatype}{portrange}"
-            signal = f"{TC.TB_ARCH_FILL}signal {port.name} : {fulldatatype};\n"
-            self.arch_decl.append(signal)
-            self.already_defined.append(port.name.strip())
-
-            last = port == self.tcon_master.ports[-1]
-            port_map.append(port_map_entry(TC.TB_DEP_FILL, port.name,
-                                           port.name, port.direc, last))
-        self.arch_decl.append("\n")
-        block_line = "-" * (len(INST_NAME) + 12)
-        self.arch_def.append(TC.TB_DEP_MAP_WITH_GENERICS.format(block_line,
-                             INST_NAME, INST_NAME, self.tcon_master.name,
-                             "".join(generic_map), "".join(port_map)))
+                    if "_gpio" in port.name:
+                        portrange = "(15 downto 0)"
+                    elif "_vector" in port.datatype:
+                        portrange = "(31 downto 0)"
+                    else:
+                        portrange = ""
 
-        # Connect tcon_clk to clks out of the clocker
-        assignment = sig_assignment(TC.TB_ARCH_FILL, "tcon_clk", "clks(0)")
-        self.arch_def.append(assignment)
+                sig_name = port.name.replace(port.name.strip(),
+                                             port.name.strip() + suffix, 1)
+                fulldatatype = f"{port.datatype}{portrange}"
+                signal = (f"{TC.TB_ARCH_FILL}signal {sig_name} : "
+                          f"{fulldatatype};\n")
+                self.arch_decl.append(signal)
+                self.already_defined.append(sig_name.strip())
+
+                last = port == self.tcon_master.ports[-1]
+                port_map.append(port_map_entry(TC.TB_DEP_FILL, port.name,
+                                               sig_name, port.direc, last))
+            self.arch_decl.append("\n")
+            block_line = "-" * (len(INST_NAME) + 12)
+            self.arch_def.append(TC.TB_DEP_MAP_WITH_GENERICS.format(
+                block_line, INST_NAME, INST_NAME, self.tcon_master.name,
+                "".join(generic_map), "".join(port_map)))
+
+            # Connect tcon_clk to clks out of the clocker
+            assignment = sig_assignment(TC.TB_ARCH_FILL, f"tcon_clk{suffix}",
+                                        "clks(0)")
+            self.arch_def.append(assignment)
 
     def __connect_uut(self):
         """Connect UUT's generics and ports to TB's generic and dedicated
@@ -971,10 +1337,10 @@ class TB:
                 self.arch_decl.append(signal_decl)
                 self.already_defined.append(port_map_name.strip())
             else:
-                log.debug(f"{port_map_name.strip()} for the UUT already exists"
-                          f" in the architecture")
-                defined = '\n'.join(self.already_defined)
-                log.debug(defined)
+                log.debug("%s for the UUT already exists in the architecture",
+                          port_map_name.strip())
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug('\n'.join(self.already_defined))
 
         block_line = "-" * (len(self.uut.name) + 12)
         if generic_map:
@@ -1016,8 +1382,9 @@ class TB:
                     self.arch_constants.append((generic,
                                                 generic.datatype, val))
 
-            port_str = self.create_typical_map(obj_list=entity.ports,
-                                               req_no=entity.tcon_req_no)
+            port_str = self.create_typical_map(
+                obj_list=entity.ports, req_no=entity.tcon_req_no,
+                tcon_suffix=self.tcon_suffix(entity.tcon_master_no))
             inst_name = bus[self.IND_INST_NAME]
 
             block_line = "-" * (len(inst_name) + 12)
@@ -1026,6 +1393,9 @@ class TB:
                                                    inst_name, entity_name,
                                                    gen_str, port_str))
             for port in entity.ports:
+                if "tcon_" in port.name:
+                    # Mapped onto the TCON master signals
+                    continue
                 if port.name.strip() not in self.already_defined:
                     signal = port.form_signal_entry(
                         fill_before=TC.TB_ARCH_FILL)
@@ -1033,10 +1403,10 @@ class TB:
                     self.already_defined.append(port.name)
                     break
                 else:
-                    log.info(f"{port.name.strip()} for tb_tcon_clocker "
-                             f"already exists in the architecture")
-                    defined = '\n'.join(self.already_defined)
-                    log.info(defined)
+                    log.debug("%s for tb_tcon_clocker already exists in the "
+                              "architecture", port.name.strip())
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug('\n'.join(self.already_defined))
 
     def __associate_bus_port(self, entity: Entity, bus_entry: List,
                              portname: str) -> str:
@@ -1052,56 +1422,62 @@ class TB:
             Return a name of the UUT port to be mapped to portname. It could be
             a port on the
         """
-        log.setLevel(logging.DEBUG)
         if "tcon_" not in portname:
-            log.info(f"********** trying to map {portname}")
+            log.debug("********** trying to map %s", portname)
             for tb_hint, uut_hint in TC.TB_MAP[entity.tb_bus_type].items():
                 if tb_hint in portname:
                     port_map_name = ""
+                    tb_pdirec = entity.find_matching_ports([portname])[0][1]
+                    log.debug("tb %s direction is %s", portname, tb_pdirec)
                     for uut_port in bus_entry:
                         uut_pdirec = \
                             self.uut.find_matching_ports(
                                 [uut_port.strip()])[0][1]
-                        log.info(f"{uut_port} direction is {uut_pdirec}")
-                        tb_pdirec = \
-                            entity.find_matching_ports(
-                                [portname])[0][1]
-                        log.info(f"tb {portname} direction is {tb_pdirec}")
+                        log.debug("%s direction is %s", uut_port, uut_pdirec)
                         for hint in uut_hint:
-                            log.info(f"Matching {tb_hint} in {portname}"
-                                     f" and  _{hint} in {uut_port}")
+                            log.debug("Matching %s in %s and  _%s in %s",
+                                      tb_hint, portname, hint, uut_port)
                             if uut_port.endswith(f"_{hint}") and \
                                     direction_match(uut_pdirec, tb_pdirec):
                                 port_map_name = uut_port
-                                log.info("@@@@@ match @@@@@")
-                                log.setLevel(logging.ERROR)
+                                log.debug("@@@@@ match @@@@@")
                                 return port_map_name
 
                     # If did not find a mathing port
                     if port_map_name is None:
                         port_map_name = (f"{entity.tb_bus_name.lower()}_"
                                          f"{portname.strip()}")
-                        log.setLevel(logging.ERROR)
                         return port_map_name
-            log.setLevel(logging.ERROR)
 
-    def __connect_tb_component(self, entity: Entity):
-        """Create component mappings for just the ports
+    def __bus_port_map(self, entity: Entity, bus_entry: List) -> List[Tuple]:
+        """Associate every port of a tb component with a UUT port of its
+        bus. With an EntityCache the result is memoized under everything the
+        association depends on, so only buses whose configuration lines, tb
+        component or UUT ports changed are associated again
 
         Arguments:
-            entity -- TB component Entity used in component mapping
+            entity -- TB component Entity
+            bus_entry -- List of UUT ports on the component's bus
+
+        Returns:
+            List of (tb port, mapped name, direction, datatype, range)
         """
-        port_map = ""
-        bus_entry = self.uut.port_buses[entity.tb_bus_name][self.IND_PORT_LIST]
-        port_map += self.create_typical_map(obj_list=entity.ports,
-                                            just_tcon=True,
-                                            req_no=entity.tcon_req_no)
-        port_map += "\n"
+        key = None
+        if self.cache is not None:
+            if self.uut_signature is None:
+                self.uut_signature = tuple((p.name, p.direc)
+                                           for p in self.uut.ports)
+            key = (entity.name, entity.tb_bus_name, entity.tb_bus_type,
+                   tuple(bus_entry), self.uut_signature,
+                   tuple((p.name, p.direc, p.datatype, p.range)
+                         for p in entity.ports))
+            if key in self.cache.bus_maps:
+                return list(self.cache.bus_maps[key])
+
         clk_rst_ports = entity.find_matching_ports(TC.MATCH_CLK +
                                                    TC.MATCH_RST)
         clk_rst_port_names = [x[0] for x in clk_rst_ports]
         port_map_name = None
-        max_len = 0
         port_map_list = list()
         for port in entity.ports:
             if port.name.strip() in clk_rst_port_names:
@@ -1113,11 +1489,31 @@ class TB:
                 port_map_name = self.__associate_bus_port(entity, bus_entry,
                                                           port.name.strip())
             if port_map_name:
-                max_len = max(max_len, len(port_map_name))
                 port_map_list.append((port.name, port_map_name, port.direc,
                                       port.datatype, port.range))
                 port_map_name = None
 
+        if key is not None:
+            self.cache.bus_maps[key] = tuple(port_map_list)
+            log.info("Associated ports of %s (%s)", entity.inst_name,
+                     entity.tb_bus_name)
+        return port_map_list
+
+    def __connect_tb_component(self, entity: Entity):
+        """Create component mappings for just the ports
+
+        Arguments:
+            entity -- TB component Entity used in component mapping
+        """
+        port_map = ""
+        bus_entry = self.uut.port_buses[entity.tb_bus_name][self.IND_PORT_LIST]
+        port_map += self.create_typical_map(
+            obj_list=entity.ports, just_tcon=True, req_no=entity.tcon_req_no,
+            tcon_suffix=self.tcon_suffix(entity.tcon_master_no))
+        port_map += "\n"
+        port_map_list = self.__bus_port_map(entity, bus_entry)
+        max_len = max([len(x[1]) for x in port_map_list] + [0])
+
         for tb_port, port_map_name, direc, dtype, drange in port_map_list:
             last = tb_port == port_map_list[-1][0]
             rfill = " " * (max_len - len(port_map_name) + 1)
@@ -1134,10 +1530,10 @@ class TB:
                                                   range=drange)
                 self.arch_decl.append(signal)
             else:
-                log.debug(f"{tb_port.strip()} for {entity.inst_name} component"
-                          f"already exists in the architecture")
-                defined = '\n'.join(self.already_defined)
-                log.debug(defined)
+                log.debug("%s for %s component already exists in the "
+                          "architecture", tb_port.strip(), entity.inst_name)
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug('\n'.join(self.already_defined))
 
         block_line = "-" * (len(entity.name) + 12)
         if entity.generics:
@@ -1177,9 +1573,9 @@ class TB:
         connected = 0
         for entity in self.tb_deps:
             if entity.tb_bus_type in TC.SUPPORTED_BUSSES:
-                log.info(f"Generating mapping for {entity.tb_bus_name} of "
-                         f"type {entity.tb_bus_type} "
-                         f"with entity file {entity.name} ")
+                log.info("Generating mapping for %s of type %s with entity "
+                         "file %s", entity.tb_bus_name, entity.tb_bus_type,
+                         entity.name)
                 self.__connect_tb_component(entity)
                 connected += 1
 
@@ -1196,32 +1592,337 @@ class TB:
         self.__connect_uut()
         self.__connect_tb_deps()
 
-    def generate_tb_file(self):
+    def __arch_def_regions(self) -> List[Tuple[str, str]]:
+        """Group the architecture definitions into regions, one per
+        instance together with the assignments that follow it
+
+        Returns:
+            List of (region name, VHDL text)
+        """
+        regions = list()
+        inst_re = re.compile(r"^\s*(\w+)\s*:\s*entity\b", re.MULTILINE)
+        for section in self.arch_def:
+            match = inst_re.search(section)
+            if match or not regions:
+                name = match.group(1) if match else "definitions"
+                regions.append([name, [section]])
+            else:
+                regions[-1][1].append(section)
+        return [(name, "\n".join(sections)) for name, sections in regions]
+
+    def render_tb(self, markers: bool=True) -> str:
+        """Format the TB file contents from the current mappings. Call
+        generate_mapping() first.
+
+        Arguments:
+            markers -- Wrap the generated sections (entity, constants, signal
+                       declarations, every instance) in region markers, see
+                       patch_tb_file()
+
+        Returns:
+            String with the full TB VHDL source
+        """
         year = date.today().year
         uut = self.uut.name
         tb_header = TC.TB_HEADER.format(year, uut, uut)
         tb_entity = self.__create_tb_entity()
-        self.generate_mapping()
         constants = self.__tb_arch_constant_entry()
-        tb_body = TC.TB_BODY.format(uut, constants,
-                                    ''.join(self.arch_decl),
-                                    '\n'.join(self.arch_def))
-        tb_data = tb_header + tb_entity + tb_body
-        tb_src_dir = os.path.join(self.tb_path, "src")
-        if self.sanity_check_passed:
-            os.makedirs(tb_src_dir, exist_ok=True)
-        overwrite = None
-        log.setLevel(logging.DEBUG)
-        if self.sanity_check_passed:
-            if os.path.isfile(self.tb_file_path):
-                overwrite = input("\nTB file exists. Overwrite(y/n):[y] - ")
-            if overwrite is None or overwrite.lower() not in ["n", "no"]:
-                log.info(f"Creating TB file {self.tb_file_path}")
-                with open(self.tb_file_path, "w") as f:
-                    f.write(tb_data)
+        arch_decl = ''.join(self.arch_decl)
+        if markers:
+            tb_entity = "\n" + mark_region("entity", tb_entity.lstrip("\n"))
+            constants = mark_region("constants", constants, TC.TB_ARCH_FILL)
+            arch_decl = mark_region("signals", arch_decl, TC.TB_ARCH_FILL)
+            arch_def = "\n".join(mark_region(name, text, TC.TB_ARCH_FILL)
+                                 for name, text in self.__arch_def_regions())
+        else:
+            arch_def = '\n'.join(self.arch_def)
+        tb_body = TC.TB_BODY.format(uut, constants, arch_decl, arch_def)
+        return tb_header + tb_entity + tb_body
+
+    def patch_tb_file(self, tb_data: str,
+                      overwrite_unmarked: bool=False) -> Optional[bool]:
+        """Update only the generated regions of an existing TB file whose
+        contents changed, keeping user code outside the markers. The file
+        (and its mtime) is left alone if no region changed. A missing TB
+        file is created
+
+        Arguments:
+            tb_data -- TB VHDL source as returned by render_tb()
+            overwrite_unmarked -- Overwrite a TB file without region markers
+                                  instead of leaving it alone
+
+        Returns:
+            True if the TB file was written, False if it was up to date,
+            None if it was left alone for lack of region markers
+        """
+        if not os.path.isfile(self.tb_file_path):
+            self.write_tb_file(tb_data)
+            return True
+        with open(self.tb_file_path, "r") as f:
+            current = f.read()
+        try:
+            patched = patch_regions(current, tb_data)
+        except ValueError:
+            if not overwrite_unmarked:
+                log.error("%s has no generated region markers, regenerate it "
+                          "without patching first", self.tb_file_path)
+                return None
+            patched = tb_data
+        written = write_file_atomic(self.tb_file_path, patched)
+        with log_scope(logging.INFO):
+            log.info("%s TB file %s", "Patched" if written else "Unchanged",
+                     self.tb_file_path)
+        return written
+
+    def confirm_overwrite(self) -> bool:
+        """Ask before overwriting an existing TB file
+
+        Returns:
+            True if the TB file can be created/overwritten
+        """
+        if not self.sanity_check_passed:
+            return False
+        if os.path.isfile(self.tb_file_path):
+            overwrite = input("\nTB file exists. Overwrite(y/n):[y] - ")
+            return overwrite.lower() not in ["n", "no"]
+        return True
+
+    def write_tb_file(self, tb_data: str):
+        """Write rendered TB contents to the TB file without prompting
+
+        Args:
+            tb_data : TB VHDL source as returned by render_tb()
+        """
+        os.makedirs(os.path.join(self.tb_path, "src"), exist_ok=True)
+        with log_scope(logging.INFO):
+            if write_file_atomic(self.tb_file_path, tb_data):
+                log.info("Created TB file %s", self.tb_file_path)
             else:
+                log.info("TB file %s is up to date", self.tb_file_path)
+
+    def generate_sim_common(self):
+        """Create the per TCON master python scaffolding in the sim
+        directory: common/common_<k>.py with the request line numbers of every
+        tb component on master k and a tcon_<k>.py skeleton under
+        sim/templates. Existing tcon_<k>.py skeletons are not overwritten.
+        Nothing is generated for single master TBs
+        """
+        if self.num_masters == 1:
+            return
+        year = date.today().year
+        sim_path = os.path.join(self.uutpath, "sim")
+        common_path = os.path.join(sim_path, "common")
+        template_path = os.path.join(sim_path, "templates")
+        os.makedirs(common_path, exist_ok=True)
+        os.makedirs(template_path, exist_ok=True)
+
+        init_file = os.path.join(common_path, "__init__.py")
+        if not os.path.isfile(init_file):
+            with open(init_file, "w") as f:
+                f.write(TC.INIT_PY.format(year))
+
+        for master in range(self.num_masters):
+            inst = self.tcon_master_inst(master)
+            deps = [x for x in self.tb_deps if x.tcon_master_no == master]
+            max_len = max([len(x.inst_name) for x in deps] + [0])
+            reqs = [f"REQ_{x.inst_name.upper():<{max_len}} = "
+                    f"{x.tcon_req_no}  # {x.name} on {x.tb_bus_name}"
+                    for x in deps]
+            clocker_note = ("\n# Master 0 drives the clocker and reset; run "
+                            "setup_sim() here only.") if master == 0 else ""
+            with open(os.path.join(common_path, f"common_{master}.py"),
+                      "w") as f:
+                f.write(TC.COMMON_MASTER_PY.format(
+                    year=year, inst=inst, k=master, num=self.num_masters,
+                    clocker_note=clocker_note, reqs="\n".join(reqs)))
+
+            script = os.path.join(template_path, self.tcon_script(master))
+            if not os.path.isfile(script):
+                setup = ("    setup_sim()\n" if master == 0 else
+                         "    # Clocks/reset are set up by tcon_0.py\n"
+                         "    tcon.sync(10)\n")
+                # Only master 0 ends the simulation, the others could halt
+                # it before master 0 is done
+                finish = ("    tcon.halt()\n" if master == 0 else
+                          "    # tcon_0.py halts the simulation\n")
+                with open(script, "w") as f:
+                    f.write(TC.TCON_MASTER_PY.format(
+                        year=year, inst=inst, k=master, num=self.num_masters,
+                        setup=setup, finish=finish))
+            log.info("Created TCON master %s scaffolding in %s", master,
+                     sim_path)
+
+    def wave_lists(self) -> OrderedDict:
+        """Named signal lists for the TB: one per TCON master, tb component
+        (bus instance) and the UUT boundary, plus "interfaces" with all of
+        them and the opt-in recursive "all" list
+
+        Returns:
+            OrderedDict of list name to list of log command arguments
+        """
+        lists = OrderedDict()
+        lists[self.uut.inst_name] = [f'"-ports {self.uut.inst_name}/*"']
+        for master in range(self.num_masters):
+            inst = self.tcon_master_inst(master)
+            lists[inst] = [f'"-ports {inst}/*"']
+        for entity in self.tb_deps:
+            if entity.inst_name:
+                lists[entity.inst_name] = [f'"-ports {entity.inst_name}/*"']
+        lists[TC.WAVE_LIST_DEFAULT] = [x for v in lists.values() for x in v]
+        lists["all"] = [TC.WAVE_LIST_ALL]
+        return lists
+
+    def generate_wave_lists(self) -> bool:
+        """Write sim/wave_lists.tcl with the named wave lists of this TB
+
+        Returns:
+            True if the file was written (False if it was up to date)
+        """
+        sim_path = os.path.join(self.uutpath, "sim")
+        os.makedirs(sim_path, exist_ok=True)
+        lists = self.wave_lists()
+        max_len = max([len(x) for x in lists])
+        entries = [f"dict set wave_lists {name:<{max_len}} "
+                   f"{{ {' '.join(signals)} }}"
+                   for name, signals in lists.items()]
+        data = TC.WAVE_LISTS_TCL.format(year=date.today().year,
+                                        uut=self.uut.name,
+                                        cfg=TC.BUS_CFG_FILE,
+                                        lists="\n".join(entries),
+                                        default=TC.WAVE_LIST_DEFAULT)
+        return write_file_atomic(os.path.join(sim_path, TC.WAVE_LISTS_FILE),
+                                 data)
+
+    def uut_constants(self) -> OrderedDict:
+        """Constants of the packages the UUT source declares or uses from
+        work, looked up in the UUT's src folder
+
+        Returns:
+            OrderedDict of constant name to default expression
+        """
+        src_path = os.path.join(self.uutpath, "src")
+        uut_file = os.path.join(src_path, f"{self.uut.name}.vhd")
+        filestring = get_filestring(uut_file)
+        packages = used_packages(filestring)
+        constants = package_constants(filestring)
+        for name in sorted(os.listdir(src_path)):
+            path = os.path.join(src_path, name)
+            if name.endswith(".vhd") and path != uut_file and packages:
+                constants.update(package_constants(get_filestring(path),
+                                                   packages))
+        return constants
+
+    def uut_values(self) -> Dict[str, int]:
+        """Generic defaults and package constants of the UUT, see
+        Entity.generic_values()"""
+        constants = vhdl_expr.resolve(self.uut_constants().items())
+        return self.uut.generic_values(constants)
+
+    def uut_entries(self) -> List[Port_Generic]:
+        """UUT ports and architecture signals"""
+        uut_file = os.path.join(self.uutpath, "src", f"{self.uut.name}.vhd")
+        return list(self.uut.ports or []) + \
+            arch_signals(get_filestring(uut_file), self.uut.name)
+
+    def uut_signals(self) -> OrderedDict:
+        """UUT ports and architecture signals that TCON can read
+
+        Returns:
+            OrderedDict of signal name to width in bits from the generic
+            defaults (None if unknown)
+        """
+        values = self.uut_values()
+        return OrderedDict((x.name.strip().lower(),
+                            range_width(x.datatype, x.range, values))
+                           for x in self.uut_entries())
+
+    def uut_ranges(self) -> OrderedDict:
+        """Type and range of the UUT signals whose width depends on generics
+        or constants, for common.signal_widths()
+
+        Returns:
+            OrderedDict of signal name to (datatype, range)
+        """
+        return OrderedDict((x.name.strip().lower(),
+                            (x.datatype.strip(), x.range))
+                           for x in self.uut_entries()
+                           if x.range and range_width(x.datatype, x.range)
+                           is None)
+
+    def stim_files(self) -> OrderedDict:
+        """Command files of the tb components, see Entity.stim_file()
+
+        Returns:
+            OrderedDict of instance name to command file name
+        """
+        return OrderedDict((x.inst_name, x.stim_file()) for x in self.tb_deps
+                           if x.stim_file())
+
+    def log_files(self) -> OrderedDict:
+        """Log files of the tb components, see Entity.log_file()
+
+        Returns:
+            OrderedDict of instance name to log file name
+        """
+        return OrderedDict((x.inst_name, x.log_file()) for x in self.tb_deps
+                           if x.log_file())
+
+    @staticmethod
+    def __dict_entries(entries: OrderedDict) -> str:
+        """Aligned python dict entries, one per line, keys as strings"""
+        keys = [f'"{name}":' for name in entries]
+        max_len = max([len(x) for x in keys] + [0])
+        return "\n".join(f"    {key:<{max_len}} {value!r},"
+                         for key, value in zip(keys, entries.values()))
+
+    def generate_tb_info(self) -> bool:
+        """Write sim/common/tb_info.py with the UUT signal table that
+        common.py validates get_signal paths against, and the command and
+        log files common.stim_file() and common.log_file() resolve
+
+        Returns:
+            True if the file was written (False if it was up to date)
+        """
+        common_path = os.path.join(self.uutpath, "sim", "common")
+        os.makedirs(common_path, exist_ok=True)
+        signals = self.uut_signals()
+        uut_constants = self.uut_constants()
+        values = vhdl_expr.resolve(uut_constants.items())
+        constants = OrderedDict((x, values[x.upper()]) for x in uut_constants
+                                if x.upper() in values)
+        generics = OrderedDict((x.name.strip(), x.default)
+                               for x in self.uut.generics or [])
+        data = TC.TB_INFO_PY.format(
+            year=date.today().year, uut=self.uut.name,
+            uut_path=(f"{TC.SIGNAL_ROOT.format(self.uut.name)}."
+                      f"{self.uut.inst_name}"),
+            signals=self.__dict_entries(signals),
+            generics=self.__dict_entries(generics),
+            constants=self.__dict_entries(constants),
+            ranges=self.__dict_entries(self.uut_ranges()),
+            stim_files="\n".join(f'    "{inst}": "{name}",'
+                                  for inst, name in self.stim_files().items()),
+            log_files="\n".join(f'    "{inst}": "{name}",'
+                                 for inst, name in self.log_files().items()))
+        return write_file_atomic(os.path.join(common_path, TC.TB_INFO_FILE),
+                                 data)
+
+    def generate_tb_file(self) -> bool:
+        """Render the TB and write it after confirm_overwrite()
+
+        Returns:
+            True if the TB file holds the rendered TB (written or up to
+            date), False if it was skipped
+        """
+        self.generate_mapping()
+        tb_data = self.render_tb()
+        if self.confirm_overwrite():
+            self.write_tb_file(tb_data)
+            return True
+        if self.sanity_check_passed:
+            with log_scope(logging.INFO):
                 log.info("Skipping creating/overwriting TB file")
-        log.setLevel(logging.ERROR)
+        return False
 
 
 def direction_match(first: str, second: str) -> bool:
@@ -1235,13 +1936,18 @@ def direction_match(first: str, second: str) -> bool:
         return False
 
 
-def get_entity_from_file(path: str, name: str) -> Entity:
+def get_entity_from_file(path: str, name: str,
+                         cache: Optional["EntityCache"]=None,
+                         config_file: str=TC.BUS_CFG_FILE) -> Entity:
     """Extract entity declaration of TCON master from tb_tcon.vhd
 
     Args:
         path : os.path type string for entity's source code
         name : name of the tb component whose entity needs to be
                         extracted
+        cache : Optional EntityCache to look the entity up in, it uses its
+                own bus configuration file
+        config_file : Bus configuration file the entity is built with
 
     Returns:
         Entity object for the tb component
@@ -1258,9 +1964,62 @@ def get_entity_from_file(path: str, name: str) -> Entity:
         entity = name
 
     filepath = os.path.join(path, comppath)
+    if cache is not None:
+        return cache.get(filepath, entity)
+    return parse_entity_file(filepath, entity, config_file)
+
+
+def parse_entity_file(filepath: str, entity: str,
+                      config_file: str=TC.BUS_CFG_FILE) -> Entity:
+    """Parse the entity declaration named entity from a VHDL file"""
     filestring = get_filestring(filepath)
     entity_glob = ParserType("entity", filestring, entity).string
     ports_parser = ParserType("port", entity_glob)
     generics_parser = ParserType("generic", entity_glob)
-    entity_inst = Entity(entity, ports_parser, generics_parser)
+    entity_inst = Entity(entity, ports_parser, generics_parser, config_file)
     return entity_inst
+
+
+class EntityCache:
+    """Parsed Entity objects keyed by source file. An entry is reparsed when
+    the VHDL file or the bus configuration file (Entity construction assigns
+    buses from it) changes size or mtime. Callers get deep copies since the
+    TB generation annotates the entities (inst_name, tcon_req_no, ...).
+
+    Args:
+        config_file: Bus configuration file the entities are built with
+    """
+    def __init__(self, config_file: str=TC.BUS_CFG_FILE) -> None:
+        self.config_file = config_file
+        # {abs filepath: (entity name, file stamp, config stamp, Entity)}
+        self.entries = dict()
+        # Memoized tb component to UUT port associations, see
+        # TB.__bus_port_map. Keys hold all inputs, so no invalidation needed
+        self.bus_maps = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, filepath: str, entity: str) -> Entity:
+        key = os.path.abspath(filepath)
+        stamp = file_stamp(key)
+        cfg_stamp = file_stamp(os.path.abspath(self.config_file))
+        entry = self.entries.get(key)
+        if entry and entry[:3] == (entity, stamp, cfg_stamp):
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = (entity, stamp, cfg_stamp,
+                     parse_entity_file(filepath, entity, self.config_file))
+            self.entries[key] = entry
+        return copy.deepcopy(entry[3])
+
+    def invalidate(self, filepath: str=""):
+        """Drop the entry of filepath, or all entries if not given"""
+        if filepath:
+            self.entries.pop(os.path.abspath(filepath), None)
+        else:
+            self.entries.clear()
+            self.bus_maps.clear()
+
+    def files(self) -> List[str]:
+        return list(self.entries.keys())
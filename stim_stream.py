@@ -0,0 +1,251 @@
+"""Stream the command files of tb components through named pipes.
+
+A tb component (tb_tcon_saif, tb_tcon_start_done, ...) reads its commands
+from the COMMAND_FILE the TB passes to it. StimulusStream creates a FIFO at
+that path and writes the commands from a generator while the simulator reads
+them, so arbitrarily long stimulus needs neither memory nor disk.
+
+The module does not connect to TCON and only needs tb_info.py (for the
+command file names), so a test's before_sim command can import it; the
+generated common.py re-exports it. Put it on PYTHONPATH like tcon_trace.py.
+"""
+import os
+import sys
+import stat
+import time
+import errno
+import logging
+import threading
+
+try:
+    # Generated by create_tcon_infra.py in sim/common
+    import tb_info
+except ImportError:
+    tb_info = None
+STIM_FILES = getattr(tb_info, "STIM_FILES", {})
+
+log = logging.getLogger()
+
+# Command lines written per FIFO write by StimulusStream
+STREAM_CHUNK_LINES = 4096
+
+
+class StimulusStream:
+    """Command file of a tb component (tb_tcon_saif, tb_tcon_start_done, ...)
+    produced lazily through a named pipe (FIFO).
+
+    The FIFO is created at the path the TB passes as COMMAND_FILE and the
+    commands are written while the simulator reads them, so memory and disk
+    use do not depend on the length of the stream. Writes block while the
+    pipe is full, which throttles the producer to the simulator's pace. The
+    stream is closed after the last command, which the component reads as
+    end of file.
+
+    The tb components restart their command file at end of file, and
+    reopening a FIFO blocks until a new writer appears. A final "pause" is
+    therefore appended by default so the component stops after the last
+    command.
+
+    On platforms without os.mkfifo the commands are written to a regular
+    file instead.
+
+    Args:
+        path (str): COMMAND_FILE path, see stim_file()
+        commands (iterable): Command lines without newline, e.g. a generator
+        final_pause (bool): Append "pause" after the last command
+        open_timeout (float): Seconds to wait for the simulator to open the
+                              FIFO
+
+    Example:
+        >>> def words(count):
+        ...     yield "burst 1 16"
+        ...     for i in range(count):
+        ...         yield f"0x{i:08x}"
+        >>> StimulusStream(stim_file(test_dir, "saif_in"), words(10**8)).start()
+
+    """
+
+    def __init__(self, path, commands, final_pause=True, open_timeout=600.0):
+        self.path = path
+        self.commands = commands
+        self.final_pause = final_pause
+        self.open_timeout = open_timeout
+        self.lines = 0
+        self.error = None
+        self._thread = None
+
+    def create(self):
+        """Create the FIFO, replacing a regular file left at the path"""
+        if not hasattr(os, "mkfifo"):
+            return
+        if os.path.lexists(self.path) and not \
+                stat.S_ISFIFO(os.stat(self.path).st_mode):
+            os.remove(self.path)
+        if not os.path.exists(self.path):
+            os.mkfifo(self.path)
+
+    def _open(self):
+        """Open the FIFO for writing once the simulator opened it for reading
+
+        Opening a FIFO blocks until there is a reader; a non-blocking open
+        is retried instead so a simulation that never starts does not leave
+        the producer hanging.
+        """
+        if not hasattr(os, "mkfifo"):
+            return open(self.path, "w")
+        deadline = time.time() + self.open_timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+                break
+            except OSError as err:
+                # ENXIO: no reader yet
+                if err.errno != errno.ENXIO:
+                    raise
+                if time.time() > deadline:
+                    raise TimeoutError(f"not opened by the simulator within "
+                                       f"{self.open_timeout} s") from err
+                time.sleep(0.05)
+        os.set_blocking(fd, True)
+        return os.fdopen(fd, "w")
+
+    def run(self):
+        """Create the FIFO and write all commands
+
+        Returns:
+            int: Number of lines written
+        """
+        self.create()
+        try:
+            with self._open() as stim:
+                chunk = []
+                for command in self.commands:
+                    chunk.append(command)
+                    if len(chunk) >= STREAM_CHUNK_LINES:
+                        stim.write("\n".join(chunk) + "\n")
+                        self.lines += len(chunk)
+                        chunk = []
+                if self.final_pause:
+                    chunk.append("pause")
+                if chunk:
+                    stim.write("\n".join(chunk) + "\n")
+                    self.lines += len(chunk)
+        except BrokenPipeError:
+            # The simulator closed the file, e.g. the test halted early
+            self.error = f"{self.path}: reader closed after {self.lines} lines"
+        except OSError as err:
+            self.error = f"{self.path}: {err}"
+        if self.error:
+            log.error(f"StimulusStream {self.error}")
+        return self.lines
+
+    def start(self):
+        """Run the stream in a background thread
+
+        Returns:
+            StimulusStream: self
+        """
+        self.create()
+        self._thread = threading.Thread(target=self.run, daemon=True,
+                                        name=f"stim:{self.path}")
+        self._thread.start()
+        return self
+
+    def join(self, timeout=None):
+        """Wait for a started stream to finish
+
+        Returns:
+            bool: True if the stream is done
+        """
+        if self._thread:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+
+def stim_file(test_dir, inst):
+    """Path of the COMMAND_FILE of a tb component instance
+
+    Args:
+        test_dir (str): Test directory (TEST_FOLDER of the TB)
+        inst (str): Instance name of the tb component in the TB
+
+    Returns:
+        str: Path of the command file
+
+    Raises:
+        KeyError: If tb_info.py lists the command files of the TB and inst
+                  is not one of them
+
+    """
+    if STIM_FILES and inst not in STIM_FILES:
+        raise KeyError(f"{inst} has no COMMAND_FILE generic (see tb_info.py)")
+    return os.path.join(test_dir, STIM_FILES.get(inst, f"{inst}.stim"))
+
+
+def stream_stimulus(test_dir, streams, detach=True, **kwargs):
+    """Stream the command files of several tb component instances
+
+    Called from a test's before_sim command (e.g. gen_data.py). The FIFOs
+    must exist and have a writer waiting before the simulator opens the
+    command files at time 0; with detach=True the producers run in a
+    forked background process, so the before_sim command returns at once
+    and the simulation can start.
+
+    The commands are generators, so the producer must be a fork of the
+    calling process. Forking a process that already uses ZeroMQ is unsafe
+    (the child inherits the context's sockets and I/O threads), so detach
+    is refused once zmq is imported: import this module, not common.py, in
+    the before_sim command.
+
+    Without os.mkfifo (Windows) the command files are regular files. They
+    are written completely before the function returns, whatever detach
+    says, since the before_sim command exits right after and would end
+    producer threads with it.
+
+    Args:
+        test_dir (str): Test directory
+        streams (dict): Instance name to iterable of command lines
+        detach (bool): Produce from a detached background process. With
+                       detach=False the streams run in daemon threads of
+                       the caller, which must join() them
+        kwargs: Passed on to StimulusStream
+
+    Returns:
+        list: StimulusStream objects (empty in the calling process if
+              detached, finished without os.mkfifo)
+
+    Raises:
+        RuntimeError: If detach is set and zmq is already imported
+
+    Example:
+        >>> stream_stimulus(testdir, {"saif_in": words(10**8),
+        ...                           "saif_out": iter(["read"])})
+
+    """
+    stim = [StimulusStream(stim_file(test_dir, inst), commands, **kwargs)
+            for inst, commands in streams.items()]
+    if not hasattr(os, "mkfifo"):
+        for stream in stim:
+            stream.run()
+        return stim
+    detach = detach and hasattr(os, "fork")
+    if detach and "zmq" in sys.modules:
+        raise RuntimeError("stream_stimulus(detach=True) cannot fork after "
+                           "zmq is imported, call it before connecting to "
+                           "TCON (import stim_stream instead of common)")
+    for stream in stim:
+        stream.create()
+    if detach:
+        if os.fork():
+            return []
+        # Detached producer: own session, no controlling terminal
+        os.setsid()
+        for stream in stim:
+            stream.start()
+        errors = [stream.error for stream in stim
+                  if stream.join() and stream.error]
+        os._exit(1 if errors else 0)
+    for stream in stim:
+        stream.start()
+    return stim
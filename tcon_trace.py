@@ -0,0 +1,403 @@
+"""Record the TCON transactions of a tcon.py script and replay them offline.
+
+Recording wraps the pytcon.Tcon object of the script. Every call (read,
+write, sync, now, gpio_*, get_signal, halt, ...) is written with its
+arguments and its response to a gzip compressed binary trace. Set TCON_TRACE
+before the simulation to enable it in scripts whose common.py calls
+install_from_env() (common_py_template.py and the rtlenv sim common.py files
+do): TCON_TRACE=1 writes <script>.trace next to each TCON script, any other
+value is used as the trace path. tcon_trace.py must be importable by the
+script, e.g. through PYTHONPATH. TCON_TRACE_TIMES=1 also records the
+simulation time after every call, at the cost of one more round trip per
+call.
+
+Replaying runs the unmodified script against the trace instead of the
+simulator: pytcon and zeromq_manager are replaced by stand-ins whose Tcon
+serves the recorded responses. pytcon_objects must still be importable.
+A call that differs from the recorded one (method or arguments) is a
+divergence, as is a script that ends before the trace does. This validates
+refactors of a test script and measures its Python overhead in seconds.
+
+Usage:
+    TCON_TRACE=1 vsim ...            (record)
+    TCON_TRACE=1 TCON_TRACE_TIMES=1 vsim ...   (record with sim times)
+    py -3 tcon_trace.py replay <trace> <tcon.py> [script arguments]
+    py -3 tcon_trace.py dump <trace> [--limit N]
+"""
+import io
+import os
+import sys
+import gzip
+import json
+import time
+import types
+import runpy
+import struct
+import argparse
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b"TCONTRC1"
+# Version 2 adds keyword arguments to the records
+VERSION = 2
+# Methods with a one byte code; other methods are stored by name
+OPS = ["read", "write", "sync", "now", "gpio_set", "gpio_clr",
+       "gpio_set_as_outputs", "gpio_get", "get_signal", "halt"]
+OP_CODES = {name: code for code, name in enumerate(OPS)}
+OP_NAMED = 0xFF
+# Value tags
+T_NONE, T_INT, T_STR, T_BIGINT, T_FLOAT, T_BYTES, T_LIST, T_TUPLE, \
+    T_DICT = range(9)
+# Simulation time is not sampled after these calls
+NO_TIME = {"now", "halt"}
+
+_U8 = struct.Struct("<B")
+_I64 = struct.Struct("<q")
+_U32 = struct.Struct("<I")
+_F64 = struct.Struct("<d")
+_HEAD = struct.Struct("<Bq")  # op code, simulation time (-1 if unknown)
+
+# method, args, kwargs, response, sim time
+Record = Tuple[str, tuple, Dict[str, Any], Any, int]
+
+
+class TraceDivergence(Exception):
+    """The replayed script made a call the trace does not have"""
+
+
+def _pack_value(value: Any, out: List[bytes]) -> None:
+    if value is None:
+        out.append(_U8.pack(T_NONE))
+    elif isinstance(value, bool) or (isinstance(value, int) and
+                                     -(1 << 63) <= value < (1 << 63)):
+        out.append(_U8.pack(T_INT) + _I64.pack(value))
+    elif isinstance(value, int):
+        data = str(value).encode()
+        out.append(_U8.pack(T_BIGINT) + _U32.pack(len(data)) + data)
+    elif isinstance(value, float):
+        out.append(_U8.pack(T_FLOAT) + _F64.pack(value))
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(_U8.pack(T_BYTES) + _U32.pack(len(value)) + bytes(value))
+    elif isinstance(value, (list, tuple)):
+        out.append(_U8.pack(T_LIST if isinstance(value, list) else T_TUPLE) +
+                   _U32.pack(len(value)))
+        for item in value:
+            _pack_value(item, out)
+    elif isinstance(value, dict):
+        out.append(_U8.pack(T_DICT) + _U32.pack(len(value)))
+        for key, item in value.items():
+            _pack_value(key, out)
+            _pack_value(item, out)
+    elif hasattr(value, "__index__"):
+        # NumPy integers
+        _pack_value(value.__index__(), out)
+    elif hasattr(value, "__float__") and not isinstance(value, str):
+        _pack_value(float(value), out)
+    else:
+        data = str(value).encode()
+        out.append(_U8.pack(T_STR) + _U32.pack(len(data)) + data)
+
+
+def _read(stream: io.BufferedIOBase, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise EOFError("truncated trace")
+    return data
+
+
+def _unpack_value(stream: io.BufferedIOBase) -> Any:
+    tag = _read(stream, 1)[0]
+    if tag == T_NONE:
+        return None
+    if tag == T_INT:
+        return _I64.unpack(_read(stream, 8))[0]
+    if tag == T_FLOAT:
+        return _F64.unpack(_read(stream, 8))[0]
+    size = _U32.unpack(_read(stream, 4))[0]
+    if tag == T_BYTES:
+        return _read(stream, size)
+    if tag == T_LIST:
+        return [_unpack_value(stream) for _ in range(size)]
+    if tag == T_TUPLE:
+        return tuple(_unpack_value(stream) for _ in range(size))
+    if tag == T_DICT:
+        return {_unpack_value(stream): _unpack_value(stream)
+                for _ in range(size)}
+    data = _read(stream, size).decode()
+    return int(data) if tag == T_BIGINT else data
+
+
+def format_call(name: str, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """name(arg, ..., key=value) of a recorded call"""
+    params = [repr(x) for x in args] + [f"{k}={v!r}" for k, v in
+                                         kwargs.items()]
+    return f"{name}({', '.join(params)})"
+
+
+def encode_record(name: str, args: tuple, kwargs: Dict[str, Any],
+                  result: Any, sim_time: int) -> bytes:
+    code = OP_CODES.get(name, OP_NAMED)
+    out = [_HEAD.pack(code, sim_time)]
+    if code == OP_NAMED:
+        _pack_value(name, out)
+    out.append(_U8.pack(len(args)))
+    for arg in args:
+        _pack_value(arg, out)
+    _pack_value(kwargs, out)
+    _pack_value(result, out)
+    return b"".join(out)
+
+
+def read_trace(path: str) -> Tuple[Dict[str, Any], Iterator[Record]]:
+    """Header and lazy record iterator of a trace file"""
+    stream = gzip.open(path, "rb")
+    if stream.read(len(MAGIC)) != MAGIC:
+        stream.close()
+        raise ValueError(f"{path} is not a TCON trace")
+    header = json.loads(_read(stream, _U32.unpack(_read(stream, 4))[0]))
+    # Version 1 traces have no keyword arguments
+    has_kwargs = header.get("version", 1) >= 2
+
+    def records() -> Iterator[Record]:
+        with stream:
+            while True:
+                head = stream.read(_HEAD.size)
+                if not head:
+                    return
+                if len(head) != _HEAD.size:
+                    raise EOFError("truncated trace")
+                code, sim_time = _HEAD.unpack(head)
+                name = _unpack_value(stream) if code == OP_NAMED else OPS[code]
+                args = tuple(_unpack_value(stream)
+                             for _ in range(_read(stream, 1)[0]))
+                kwargs = _unpack_value(stream) if has_kwargs else {}
+                yield name, args, kwargs, _unpack_value(stream), sim_time
+    return header, records()
+
+
+def default_trace_path() -> str:
+    """<script>.trace next to the running TCON script"""
+    return os.path.splitext(os.path.abspath(sys.argv[0]))[0] + ".trace"
+
+
+class TconRecorder:
+    """pytcon.Tcon wrapper that writes every call to a trace
+
+    Args:
+        tcon: The pytcon.Tcon connection to the simulator
+        path: Trace file
+        timestamps: Sample tcon.now() after every call. Off by default, it
+                    costs one more round trip per transaction
+
+    Example:
+        >>> tcon = TconRecorder(pytcon.Tcon(ZeromqManager(url)), "tcon.trace")
+    """
+    def __init__(self, tcon: Any, path: str, timestamps: bool = False
+                 ) -> None:
+        object.__setattr__(self, "_tcon", tcon)
+        object.__setattr__(self, "_timestamps", timestamps)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_file", gzip.open(path, "wb",
+                                                    compresslevel=1))
+        constants = {x: getattr(tcon, x) for x in dir(tcon)
+                     if x.isupper() and isinstance(getattr(tcon, x), int)}
+        header = json.dumps({"version": VERSION, "script": sys.argv[0],
+                             "created": time.time(),
+                             "constants": constants}).encode()
+        self._file.write(MAGIC + _U32.pack(len(header)) + header)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._tcon, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                result = attr(*args, **kwargs)
+                sim_time = self._tcon.now() if self._timestamps and \
+                    name not in NO_TIME else (result if name == "now" else -1)
+                self._file.write(encode_record(name, args, kwargs, result,
+                                               sim_time))
+                if name == "halt":
+                    self.close()
+            return result
+        call.__name__ = name
+        # Cache the wrapper, __getattr__ is only called on misses
+        object.__setattr__(self, name, call)
+        return call
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._tcon, name, value)
+
+    def close(self) -> None:
+        """Finish the trace. Called by halt()"""
+        if not self._file.closed:
+            self._file.close()
+
+
+def install_recorder(path: Optional[str] = None,
+                     timestamps: bool = False) -> None:
+    """Make pytcon.Tcon return TconRecorder objects. Call before the script
+    creates its Tcon object."""
+    import pytcon
+    real = pytcon.Tcon
+    if getattr(real, "tcon_trace_recorder", False):
+        return
+
+    def Tcon(*args, **kwargs):
+        return TconRecorder(real(*args, **kwargs),
+                            path or default_trace_path(), timestamps)
+    Tcon.tcon_trace_recorder = True
+    pytcon.Tcon = Tcon
+
+
+def install_from_env() -> None:
+    """install_recorder() if TCON_TRACE is set (1: default_trace_path()).
+    TCON_TRACE_TIMES=1 adds the simulation time samples."""
+    value = os.environ.get("TCON_TRACE")
+    if value:
+        install_recorder(None if value == "1" else value,
+                         os.environ.get("TCON_TRACE_TIMES", "0") == "1")
+
+
+class ReplayTcon:
+    """Serves the responses of a trace to a script in place of pytcon.Tcon
+
+    Args:
+        path: Trace file
+        strict: Raise TraceDivergence on the first divergence, otherwise
+                count it and answer with the recorded response
+    """
+    def __init__(self, path: str, strict: bool = True) -> None:
+        header, self._records = read_trace(path)
+        for name, value in header["constants"].items():
+            setattr(self, name, value)
+        self.header = header
+        self.strict = strict
+        self.calls = 0
+        self.divergences = []
+        self.sim_time = 0
+
+    def _diverge(self, msg: str) -> None:
+        self.divergences.append(msg)
+        if self.strict:
+            raise TraceDivergence(msg)
+
+    def _replay(self, name: str, args: tuple, kwargs: Dict[str, Any]
+                ) -> Any:
+        self.calls += 1
+        record = next(self._records, None)
+        if record is None:
+            self._diverge(f"call {self.calls}: "
+                          f"{format_call(name, args, kwargs)} after the end "
+                          f"of the trace")
+            return None
+        rec_name, rec_args, rec_kwargs, result, sim_time = record
+        if rec_name != name or rec_args != args or rec_kwargs != kwargs:
+            self._diverge(f"call {self.calls} (t={self.sim_time}): script "
+                          f"called {format_call(name, args, kwargs)}, trace "
+                          f"has {format_call(rec_name, rec_args, rec_kwargs)}")
+        if sim_time >= 0:
+            self.sim_time = sim_time
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            return self._replay(name, args, kwargs)
+        call.__name__ = name
+        return call
+
+    def remaining(self) -> int:
+        """Number of trace records the script did not replay"""
+        return sum(1 for _ in self._records)
+
+
+def replay(trace: str, script: str, script_args: List[str],
+           strict: bool = True) -> Tuple[ReplayTcon, float]:
+    """Run a TCON script against a trace
+
+    Returns:
+        The ReplayTcon and the wall time of the script in seconds
+    """
+    os.environ.pop("TCON_TRACE", None)
+    tcon = ReplayTcon(trace, strict)
+    pytcon = types.ModuleType("pytcon")
+    pytcon.Tcon = lambda *args, **kwargs: tcon
+    for name, value in tcon.header["constants"].items():
+        setattr(pytcon, name, value)
+    zeromq_manager = types.ModuleType("zeromq_manager")
+    zeromq_manager.ZeromqManager = lambda *args, **kwargs: None
+    sys.modules["pytcon"] = pytcon
+    sys.modules["zeromq_manager"] = zeromq_manager
+
+    script = os.path.abspath(script)
+    sys.argv = [script] + script_args
+    sys.path.insert(0, os.path.dirname(script))
+    start = time.perf_counter()
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit:
+        pass
+    wall_s = time.perf_counter() - start
+    left = tcon.remaining()
+    if left:
+        tcon.divergences.append(f"script ended with {left} trace records "
+                                f"left")
+    return tcon, wall_s
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="TCON trace replay")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rep = commands.add_parser("replay", help="Run a TCON script against a "
+                              "trace")
+    rep.add_argument('trace')
+    rep.add_argument('script')
+    rep.add_argument('script_args', nargs=argparse.REMAINDER,
+                     help="Default: tcon 0, the instance name and port the "
+                     "simulator passes")
+    rep.add_argument('--keep-going', action='store_true',
+                     help="Count divergences instead of stopping at the "
+                     "first one")
+    dump = commands.add_parser("dump", help="Print the records of a trace")
+    dump.add_argument('trace')
+    dump.add_argument('--limit', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "dump":
+        header, records = read_trace(args.trace)
+        print(f"# {header['script']}, recorded "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(header['created']))}")
+        counts = Counter()
+        for index, (name, call_args, call_kwargs, result, sim_time) in \
+                enumerate(records):
+            counts[name] += 1
+            if not args.limit or index < args.limit:
+                print(f"{index:>8} t={sim_time:<12} "
+                      f"{format_call(name, call_args, call_kwargs)} -> "
+                      f"{result!r}")
+        print("# " + ", ".join(f"{name}: {count}"
+                               for name, count in counts.most_common()))
+        return 0
+
+    try:
+        tcon, wall_s = replay(args.trace, args.script,
+                              args.script_args or ["tcon", "0"],
+                              not args.keep_going)
+    except TraceDivergence as err:
+        print(f"TCONTRACE: DIVERGENCE: {err}", file=sys.stderr)
+        return 1
+    print(f"TCONTRACE: Replayed {tcon.calls} calls in {wall_s:.3f} s "
+          f"({tcon.calls / wall_s if wall_s else 0:.0f} calls/s), "
+          f"t={tcon.sim_time}")
+    for msg in tcon.divergences:
+        print(f"TCONTRACE: DIVERGENCE: {msg}", file=sys.stderr)
+    return 1 if tcon.divergences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -99,6 +99,111 @@ INIT_PY = """
 from .common import *
 """
 
+# Named signal lists for RTL_make, written to sim/wave_lists.tcl. Each entry
+# is an argument to the simulator's log/add wave command
+WAVE_LISTS_FILE = "wave_lists.tcl"
+WAVE_LIST_ALL = '"-rec *"'
+WAVE_LIST_DEFAULT = "interfaces"
+WAVE_LISTS_TCL = """#-------------------------------------------------------------------------------
+# @copyright
+# Copyright (c) {year} Schweitzer Engineering Laboratories, Inc.
+# SEL Confidential
+#
+# Generated by create_tcon_infra.py for {uut}_tb from {cfg}.
+# Regenerate instead of editing. Sourced by test_parameters.tcl.
+#
+# Named wave lists for 'simulate loglist <name>' or per test through
+# test_wave_lists (testno -> list name). Tests without either use
+# default_wave_list, which only logs interface signals. "all" records the
+# whole hierarchy and is opt-in.
+#-------------------------------------------------------------------------------
+{lists}
+set default_wave_list {default}
+"""
+
+# UUT signal table for the SignalRegistry of common.py, written to
+# sim/common/tb_info.py. SIGNAL_ROOT is the TB top in TCON signal paths, the
+# entity of the generated TB (formatted with the UUT name, see TB_ENTITY)
+TB_INFO_FILE = "tb_info.py"
+STIM_FILE_EXT = ".stim"
+LOG_FILE_EXT = ".log"
+SIGNAL_ROOT = ".{}_tb"
+TB_INFO_PY = """
+# Copyright (c) {year}, Schweitzer Engineering Laboratories, Inc.
+# SEL Confidential
+#
+# Generated by create_tcon_infra.py for {uut}_tb from the {uut} entity and
+# architecture declarations. Regenerate instead of editing.
+#
+# Signals common.SignalRegistry accepts under UUT_PATH, with their width in
+# bits for the generic defaults (None for other types and ranges that cannot
+# be resolved statically).
+UUT_PATH = "{uut_path}"
+UUT_SIGNALS = {{
+{signals}
+}}
+
+# Generic default expressions and package constants of the UUT, and the type
+# and range of the signals whose width depends on them. common.signal_widths()
+# recomputes these widths with the sim_params.txt generics of a test.
+UUT_GENERICS = {{
+{generics}
+}}
+UUT_CONSTANTS = {{
+{constants}
+}}
+UUT_RANGES = {{
+{ranges}
+}}
+
+# Command file of each tb component instance, relative to the test folder.
+# stim_stream.StimulusStream can feed these through a named pipe.
+STIM_FILES = {{
+{stim_files}
+}}
+
+# Log file of each tb component instance, relative to the test folder.
+# common.LogChecker can check these while the simulation runs.
+LOG_FILES = {{
+{log_files}
+}}
+"""
+
+# Per TCON master scaffolding when the TB uses more than one tb_tcon instance.
+# Each master runs its own python process (tcon_<k>.py)
+TCON_MASTER_INST = "tcon_master"
+TCON_MASTER_CMD = '"py -u " & TEST_PREFIX & "/{}"'
+
+COMMON_MASTER_PY = """
+# Copyright (c) {year}, Schweitzer Engineering Laboratories, Inc.
+# SEL Confidential
+#
+# Generated: TCON request lines of {inst} (master {k} of {num}). Stimulus for
+# this master runs in tcon_{k}.py.{clocker_note}
+from common import *
+
+{reqs}
+"""
+
+TCON_MASTER_PY = """#!/usr/bin/python3
+################################################################################
+## COPYRIGHT (c) {year} Schweitzer Engineering Laboratories, Inc.
+## SEL Confidential
+################################################################################
+# Stimulus for {inst} (master {k} of {num}). Copy into each test directory
+# next to the other tcon_<k>.py scripts.
+import sys
+import os
+testdir = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(os.path.join(testdir, "..", "common"))
+from common_{k} import *
+
+if __name__ == "__main__":
+{setup}
+    # Drive the buses of this master here
+
+{finish}"""
+
 TB_DEP_MAP_WITH_GENERICS = """
   {}
   -- {} instance
@@ -7,7 +7,22 @@
 puts ""
 puts "Dynamic test_parameters.tcl is starting..."
 
-dict set wave_lists all { "-rec *" }
+# Named wave lists generated from the bus configuration (per bus instance,
+# UUT boundary, TCON master, "interfaces" and the opt-in recursive "all").
+# default_wave_list applies to tests without an entry in test_wave_lists.
+if {[file exists wave_lists.tcl]} {
+  source wave_lists.tcl
+} else {
+  dict set wave_lists all { "-rec *" }
+}
+# Per test list selection, e.g.:
+#   dict set test_wave_lists 101_8k irbm_irb_slave
+#   dict set test_wave_lists 999_debug all
+set test_wave_lists [dict create]
+# Files outside the test folders that are inputs of every test, for the
+# 'cached' result cache of RTL_sim_lib::run_tests, e.g.:
+#   set cache_inputs { *.dat stim/*.stim }
+set cache_inputs {}
 dict set after_all_commands pass_fail { py -m pysim -vsj }
 
 # Variable initializations
@@ -0,0 +1,318 @@
+"""Static evaluation of VHDL generic, constant and range expressions.
+
+Resolves the integer expressions found in entity and package declarations,
+e.g. "(DWIDTH-1 downto 0)" or "integer(ceil(log2(real(DEPTH))))", from
+generic defaults, sim_params.txt overrides and package constants. Supported:
+decimal, based (16#FF#) and real literals, names (case insensitive, the last
+part of a selected name), + - * / ** mod rem abs, parentheses, and the
+conversion and math functions in FUNCTIONS.
+
+parser_classes.py uses it to put numeric widths on Port_Generic objects and
+into tb_info.py. It has no dependencies, so common.py can import it too (put
+this file on PYTHONPATH) to recompute widths with the generics of a test.
+"""
+import re
+import math
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+Number = Union[int, float]
+
+TOKEN_RE = re.compile(r"""\s*(?:
+    (?P<based>\d+\#[0-9a-fA-F_]+\#)|
+    (?P<real>\d[\d_]*\.\d[\d_]*(?:[eE][+-]?\d+)?)|
+    (?P<int>\d[\d_]*(?:[eE]\+?\d+)?)|
+    (?P<name>[A-Za-z][\w.]*)|
+    (?P<op>\*\*|[-+*/(),]))""", re.VERBOSE)
+DIRECTION_RE = re.compile(r"\s(downto|to)\s", re.IGNORECASE)
+HEX_LITERAL_RE = re.compile(r'^[xX]"([0-9a-fA-F_]+)"$')
+
+SCALAR_TYPES = ["std_logic", "std_ulogic", "bit", "boolean"]
+VECTOR_TYPES = ["std_logic_vector", "std_ulogic_vector", "unsigned", "signed",
+                "bit_vector"]
+# Width of integer subtypes without range constraint
+INTEGER_WIDTHS = {"integer": 32, "natural": 31, "positive": 31}
+
+
+def _clog2(value: Number) -> int:
+    return max(0, (int(math.ceil(value)) - 1).bit_length())
+
+
+def _to_integer(value: Number) -> int:
+    # integer(real) rounds half away from zero
+    if isinstance(value, int):
+        return value
+    return int(math.floor(abs(value) + 0.5)) * (1 if value >= 0 else -1)
+
+
+FUNCTIONS = {
+    "integer": _to_integer,
+    "natural": _to_integer,
+    "positive": _to_integer,
+    "real": float,
+    "ceil": lambda x: float(math.ceil(x)),
+    "floor": lambda x: float(math.floor(x)),
+    "round": lambda x: float(_to_integer(x)),
+    "log2": lambda x: math.log2(x),
+    "sqrt": math.sqrt,
+    "abs": abs,
+    "maximum": max,
+    "minimum": min,
+    # Common user defined helpers
+    "clog2": _clog2,
+    "log2ceil": _clog2,
+    "ceil_log2": _clog2,
+}
+
+
+class Unresolved(Exception):
+    """The expression uses a name, function or operator that is not known"""
+
+
+def _tokenize(expr: str) -> list:
+    tokens = []
+    pos = 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        found = TOKEN_RE.match(expr, pos)
+        if not found:
+            raise Unresolved(f"unexpected {expr[pos:]!r}")
+        kind = found.lastgroup
+        text = found.group(kind)
+        if kind == "based":
+            base, digits = text.replace("_", "").split("#")[:2]
+            tokens.append(("num", int(digits, int(base))))
+        elif kind == "real":
+            tokens.append(("num", float(text.replace("_", ""))))
+        elif kind == "int":
+            mantissa, _, exp = text.replace("_", "").lower().partition("e")
+            tokens.append(("num", int(mantissa) * 10 ** int(exp or 0)))
+        elif kind == "name":
+            word = text.lower()
+            tokens.append(("op", word) if word in ("mod", "rem", "abs") else
+                          ("name", text.split(".")[-1].upper()))
+        else:
+            tokens.append(("op", text))
+        pos = found.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over the VHDL expression grammar:
+    simple_expression ::= [sign] term {adding_operator term}
+    term ::= factor {multiplying_operator factor}
+    factor ::= primary [** primary] | abs primary
+    """
+    def __init__(self, tokens: list, values: Dict[str, Number]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+        self.values = values
+
+    def peek(self) -> Optional[Tuple[str, Number]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, op: Optional[str] = None) -> Tuple[str, Number]:
+        token = self.peek()
+        if token is None or (op is not None and token != ("op", op)):
+            raise Unresolved(f"expected {op or 'operand'}")
+        self.pos += 1
+        return token
+
+    def expression(self) -> Number:
+        sign = 1
+        if self.peek() in (("op", "+"), ("op", "-")):
+            sign = -1 if self.take()[1] == "-" else 1
+        value = sign * self.term()
+        while self.peek() in (("op", "+"), ("op", "-")):
+            if self.take()[1] == "+":
+                value = value + self.term()
+            else:
+                value = value - self.term()
+        return value
+
+    def term(self) -> Number:
+        value = self.factor()
+        while self.peek() in (("op", "*"), ("op", "/"), ("op", "mod"),
+                              ("op", "rem")):
+            op = self.take()[1]
+            right = self.factor()
+            if op == "*":
+                value = value * right
+            elif right == 0:
+                raise Unresolved("division by zero")
+            elif isinstance(value, float) or isinstance(right, float):
+                if op != "/":
+                    raise Unresolved(f"{op} of real operands")
+                value = value / right
+            elif op == "/":
+                # Integer division truncates toward zero
+                quotient = abs(value) // abs(right)
+                value = quotient if (value < 0) == (right < 0) else -quotient
+            elif op == "mod":
+                value = value % right  # Sign of the right operand
+            else:
+                value = value - right * int(value / right)
+        return value
+
+    def factor(self) -> Number:
+        if self.peek() == ("op", "abs"):
+            self.take()
+            return abs(self.primary())
+        value = self.primary()
+        if self.peek() == ("op", "**"):
+            self.take()
+            value = value ** self.primary()
+        return value
+
+    def primary(self) -> Number:
+        kind, value = self.take()
+        if kind == "num":
+            return value
+        if kind == "op" and value == "(":
+            value = self.expression()
+            self.take(")")
+            return value
+        if kind != "name":
+            raise Unresolved(f"unexpected {value}")
+        if self.peek() == ("op", "("):
+            func = FUNCTIONS.get(value.lower())
+            if func is None:
+                raise Unresolved(f"unknown function {value}")
+            self.take()
+            args = [self.expression()]
+            while self.peek() == ("op", ","):
+                self.take()
+                args.append(self.expression())
+            self.take(")")
+            return func(*args)
+        if value not in self.values:
+            raise Unresolved(f"unknown name {value}")
+        return self.values[value]
+
+
+def evaluate(expr: str, values: Optional[Dict[str, Number]] = None
+             ) -> Optional[Number]:
+    """Value of a VHDL integer or real expression
+
+    Args:
+        expr : Expression, e.g. "DWIDTH - 1"
+        values : Known generics and constants, names in upper case
+
+    Returns:
+        The value, None if the expression cannot be resolved statically
+    """
+    try:
+        parser = _Parser(_tokenize(expr), values or {})
+        value = parser.expression()
+        if parser.peek() is not None:
+            return None
+    except (Unresolved, ValueError, OverflowError, TypeError):
+        return None
+    return value
+
+
+def resolve(decls: Iterable[Tuple[str, str]],
+            values: Optional[Dict[str, Number]] = None,
+            overrides: Optional[Dict[str, Number]] = None
+            ) -> Dict[str, Number]:
+    """Evaluate declarations in order, each one may use the previous ones
+
+    Args:
+        decls : (name, expression) of generics or constants
+        values : Values known beforehand (package constants)
+        overrides : Values that replace the expression of a declaration,
+                    e.g. sim_params.txt generics
+
+    Returns:
+        values extended with every declaration that could be resolved
+    """
+    resolved = {k.upper(): v for k, v in (values or {}).items()}
+    overrides = {k.upper(): v for k, v in (overrides or {}).items()}
+    for name, expr in decls:
+        name = name.strip().upper()
+        value = overrides[name] if name in overrides else \
+            evaluate(expr, resolved)
+        if value is not None:
+            resolved[name] = value
+    return resolved
+
+
+def range_bounds(vrange: str, values: Optional[Dict[str, Number]] = None
+                 ) -> Optional[Tuple[int, int]]:
+    """Left and right bound of "(L downto R)", "(L to R)" or "range L to R"
+
+    Returns:
+        (left, right), None if a bound cannot be resolved
+    """
+    text = vrange.strip()
+    if text.lower().startswith("range "):
+        text = text[len("range "):]
+    elif text.startswith("(") and text.endswith(")"):
+        text = text[1:-1]
+    # The direction keyword outside of parentheses splits the bounds
+    depth = 0
+    for found in DIRECTION_RE.finditer(text):
+        before = text[:found.start()]
+        depth = before.count("(") - before.count(")")
+        if depth == 0:
+            left = evaluate(before, values)
+            right = evaluate(text[found.end():], values)
+            if isinstance(left, int) and isinstance(right, int):
+                return left, right
+            return None
+    return None
+
+
+def type_width(datatype: str, vrange: str,
+               values: Optional[Dict[str, Number]] = None) -> Optional[int]:
+    """Width in bits of a port or signal type
+
+    Args:
+        datatype : VHDL datatype, e.g. std_logic_vector
+        vrange : VHDL range as parsed by Port_Generic, e.g. (DWIDTH-1 downto 0)
+        values : Generic and constant values the range may use
+
+    Returns:
+        Number of bits, None for other types and unresolved ranges
+    """
+    datatype = datatype.strip().lower()
+    if datatype in SCALAR_TYPES:
+        return 1
+    if not vrange:
+        return INTEGER_WIDTHS.get(datatype)
+    bounds = range_bounds(vrange, values)
+    if bounds is None:
+        return None
+    left, right = bounds
+    if datatype in INTEGER_WIDTHS:
+        low, high = min(bounds), max(bounds)
+        if low >= 0:
+            return max(1, high.bit_length())
+        return max((-low - 1).bit_length(), high.bit_length()) + 1
+    return abs(left - right) + 1
+
+
+def parse_literal(text: str) -> Optional[Number]:
+    """Value of a generic literal as written in sim_params.txt: an integer
+    expression, x"ABC" or TRUE/FALSE (1/0)"""
+    text = text.strip()
+    found = HEX_LITERAL_RE.match(text)
+    if found:
+        return int(found.group(1).replace("_", ""), 16)
+    if text.upper() in ("TRUE", "FALSE"):
+        return int(text.upper() == "TRUE")
+    return evaluate(text)
+
+
+def read_sim_params(path: str) -> Dict[str, Number]:
+    """Numeric generics of a sim_params.txt ("NAME value" or "NAME = value"
+    per line). Other values are skipped.
+    """
+    params = {}
+    with open(path) as sim_params:
+        for line in sim_params:
+            fields = line.replace("=", " ").split(None, 1)
+            if len(fields) == 2:
+                value = parse_literal(fields[1])
+                if value is not None:
+                    params[fields[0].upper()] = value
+    return params